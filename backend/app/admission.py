@@ -0,0 +1,152 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from fastapi import HTTPException
+
+from .metrics import ADMISSION_ACTIVE, ADMISSION_QUEUED, ADMISSION_REJECTIONS_TOTAL, ADMISSION_WAIT_SECONDS
+
+MAX_RETRY_AFTER = 300
+
+
+class Overloaded(HTTPException):
+    """429 raised when a request can't be admitted; carries a Retry-After estimate"""
+
+    def __init__(self, pool: str, reason: str, retry_after: int):
+        super().__init__(
+            status_code=429,
+            detail=f"Server busy ({pool} {reason.replace('_', ' ')}), retry in {retry_after}s",
+            headers={"Retry-After": str(retry_after)}
+        )
+        self.pool = pool
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded concurrency with a bounded FIFO wait queue.
+
+    Up to `limit` holders run at once; up to `max_queue` more wait, each for at
+    most `queue_timeout` seconds. Anything beyond that is rejected immediately
+    with Overloaded, whose Retry-After is the expected wait: the average hold
+    time multiplied by how many "waves" of the pool are queued ahead.
+
+    `patient` callers (background jobs, batch items) skip the queue cap and the
+    timeout; they still never exceed `limit`.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int, queue_timeout: float,
+                 default_hold: float = 5.0):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._avg_hold = default_hold
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {}
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        waves = (self.queued + 1) / max(self.limit, 1)
+        return max(1, min(MAX_RETRY_AFTER, math.ceil(self._avg_hold * waves)))
+
+    def _reject(self, reason: str):
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        ADMISSION_REJECTIONS_TOTAL.inc(pool=self.name, reason=reason)
+        raise Overloaded(self.name, reason, self.retry_after())
+
+    def check(self):
+        """Reject now if a new request would be turned away, without reserving anything.
+        Lets multi-stage endpoints fail before doing work the later stage would waste."""
+        if self.active >= self.limit and self.queued >= self.max_queue:
+            self._reject("queue_full")
+
+    def _update_gauges(self):
+        ADMISSION_ACTIVE.set(self.active, pool=self.name)
+        ADMISSION_QUEUED.set(self.queued, pool=self.name)
+
+    async def acquire(self, timeout: Optional[float] = None, patient: bool = False):
+        start = time.monotonic()
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            self._update_gauges()
+            ADMISSION_WAIT_SECONDS.observe(0.0, pool=self.name)
+            return
+        if not patient and self.queued >= self.max_queue:
+            self._reject("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._update_gauges()
+        try:
+            wait_timeout = None if patient else (timeout if timeout is not None else self.queue_timeout)
+            # asyncio.wait doesn't cancel the future, so a slot handed over at the
+            # moment of the timeout is still seen below
+            await asyncio.wait({waiter}, timeout=wait_timeout)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            else:
+                waiter.cancel()
+                self._remove(waiter)
+            raise
+        if not waiter.done():
+            waiter.cancel()
+            self._remove(waiter)
+            self._reject("queue_timeout")
+        self.admitted += 1
+        ADMISSION_WAIT_SECONDS.observe(time.monotonic() - start, pool=self.name)
+
+    def _remove(self, waiter: asyncio.Future):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+        self._update_gauges()
+
+    def _release_slot(self):
+        # Hand the slot straight to the next live waiter, keeping FIFO order
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._update_gauges()
+                return
+        self.active -= 1
+        self._update_gauges()
+
+    def release(self, held: Optional[float] = None):
+        if held is not None:
+            self._avg_hold = 0.8 * self._avg_hold + 0.2 * held
+        self._release_slot()
+
+    @asynccontextmanager
+    async def slot(self, timeout: Optional[float] = None, patient: bool = False) -> AsyncIterator[None]:
+        await self.acquire(timeout=timeout, patient=patient)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "avg_hold_seconds": round(self._avg_hold, 3),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "retry_after": self.retry_after()
+        }
@@ -0,0 +1,258 @@
+import asyncio
+import ipaddress
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+
+from .blob_store import BlobStore
+from .host_scheduler import MAX_TRACKED_HOSTS, host_key
+from .metrics import ASSET_FETCHES_TOTAL
+from .scrape_cache import normalize_url
+
+# Content types worth keeping; anything else (HTML error pages, scripts) is refused.
+# SVG can carry script, so it is refused too.
+ASSET_CONTENT_TYPES = ("image/", "font/", "text/css", "application/font", "application/x-font",
+                       "application/vnd.ms-fontobject")
+REFUSED_CONTENT_TYPES = ("image/svg+xml",)
+MAX_REDIRECTS = 5
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+
+
+class AssetFetchError(Exception):
+    pass
+
+
+async def check_public_url(url: str):
+    """Refuse URLs that aren't http(s) or whose host resolves to a loopback, private,
+    link-local or otherwise non-public address, so scraped pages can't point the
+    fetcher at internal services"""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise AssetFetchError(f"unsupported URL {url[:100]}")
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            parts.hostname, parts.port or (443 if parts.scheme == "https" else 80), type=socket.SOCK_STREAM
+        )
+    except socket.gaierror as e:
+        raise AssetFetchError(f"cannot resolve {parts.hostname}: {e}")
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%", 1)[0])
+        if not address.is_global:
+            raise AssetFetchError(f"{parts.hostname} resolves to non-public address {address}")
+
+
+class _HostLimit:
+    """Per-host download cap and the downloads holding or waiting on it"""
+
+    def __init__(self, per_host: int):
+        self.semaphore = asyncio.Semaphore(per_host)
+        self.users = 0
+
+
+class AssetStore:
+    """Downloads page assets (images, backgrounds, font CSS) into the blob store.
+
+    Downloads share one pooled HTTP client, run concurrently with a per-host cap,
+    and are de-duplicated three ways: concurrent requests for a URL share one
+    download, a persistent URL index skips URLs fetched within `ttl`, and the blob
+    store keeps identical bytes once. Stored assets are served from
+    /assets/{hash}, a stable URL clones can reference.
+    """
+
+    def __init__(self, blob_store: BlobStore, base_url: str = "", index_path: Optional[str] = None,
+                 max_connections: Optional[int] = None, per_host: Optional[int] = None,
+                 max_bytes: Optional[int] = None, timeout: Optional[float] = None, ttl: Optional[float] = None):
+        self.blob_store = blob_store
+        self.base_url = base_url.rstrip("/")
+        self.index_path = index_path or os.getenv("ASSET_INDEX_PATH", "asset_index.sqlite3")
+        self.max_connections = max_connections or int(os.getenv("ASSET_MAX_CONNECTIONS", "32"))
+        self.per_host = per_host or int(os.getenv("ASSET_HOST_CONCURRENCY", "6"))
+        self.max_bytes = max_bytes or int(float(os.getenv("ASSET_MAX_MB", "10")) * 1024 * 1024)
+        self.timeout = timeout or float(os.getenv("ASSET_FETCH_TIMEOUT", "20"))
+        self.ttl = ttl or float(os.getenv("ASSET_TTL", "604800"))
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, _HostLimit] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.downloaded = 0
+        self.indexed = 0
+        self.shared = 0
+        self.failed = 0
+        self.bytes_downloaded = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.index_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.index_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS assets (
+                    url TEXT PRIMARY KEY,
+                    digest TEXT NOT NULL,
+                    content_type TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL
+                )
+            """)
+            self._conn = conn
+        return self._conn
+
+    def _lookup(self, url: str) -> Optional[Tuple[str, str, int]]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT digest, content_type, size, fetched_at FROM assets WHERE url = ?", (url,)
+            ).fetchone()
+        # The blob may have been evicted since, or stored under a type now refused
+        if row is None or time.time() - row[3] > self.ttl or not self.blob_store.has(row[0]):
+            return None
+        if not row[1].startswith(ASSET_CONTENT_TYPES) or row[1] in REFUSED_CONTENT_TYPES:
+            return None
+        return row[0], row[1], row[2]
+
+    def _remember(self, url: str, digest: str, content_type: str, size: int):
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO assets (url, digest, content_type, size, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (url, digest, content_type, size, time.time())
+            )
+            conn.commit()
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                timeout=self.timeout,
+                # Redirects are followed in _download, so every hop is address-checked
+                follow_redirects=False,
+                headers={"User-Agent": USER_AGENT}
+            )
+        return self._client
+
+    def local_url(self, digest: str) -> str:
+        return f"{self.base_url}/assets/{digest}"
+
+    async def _download(self, url: str, key: str) -> Dict[str, Any]:
+        host = host_key(url)
+        if host not in self._host_limits:
+            # Forget hosts nothing is downloading from, as HostScheduler does
+            if len(self._host_limits) >= MAX_TRACKED_HOSTS:
+                for idle in [k for k, limit in self._host_limits.items() if not limit.users]:
+                    del self._host_limits[idle]
+            self._host_limits[host] = _HostLimit(self.per_host)
+        limit = self._host_limits[host]
+        limit.users += 1
+        try:
+            async with limit.semaphore:
+                target = url
+                for _ in range(MAX_REDIRECTS + 1):
+                    await check_public_url(target)
+                    async with self._http().stream("GET", target) as response:
+                        if response.is_redirect:
+                            target = urljoin(target, response.headers.get("location", ""))
+                            continue
+                        if response.status_code >= 400:
+                            raise AssetFetchError(f"HTTP {response.status_code}")
+                        content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+                        if not content_type.startswith(ASSET_CONTENT_TYPES) or content_type in REFUSED_CONTENT_TYPES:
+                            raise AssetFetchError(f"unexpected content type {content_type or 'none'}")
+                        length = response.headers.get("content-length")
+                        if length and length.isdigit() and int(length) > self.max_bytes:
+                            raise AssetFetchError(f"too large ({length} bytes)")
+                        chunks = []
+                        size = 0
+                        async for chunk in response.aiter_bytes():
+                            size += len(chunk)
+                            if size > self.max_bytes:
+                                raise AssetFetchError(f"too large (over {self.max_bytes} bytes)")
+                            chunks.append(chunk)
+                        break
+                else:
+                    raise AssetFetchError(f"more than {MAX_REDIRECTS} redirects")
+        finally:
+            limit.users -= 1
+        digest = await self.blob_store.aput(b"".join(chunks), content_type)
+        await asyncio.to_thread(self._remember, key, digest, content_type, size)
+        self.downloaded += 1
+        self.bytes_downloaded += size
+        return {"hash": digest, "content_type": content_type, "bytes": size}
+
+    async def fetch(self, url: str) -> Dict[str, Any]:
+        """Stored asset for a URL ({hash, content_type, bytes}), downloading it if needed"""
+        key = normalize_url(url)
+        stored = await asyncio.to_thread(self._lookup, key)
+        if stored is not None:
+            self.indexed += 1
+            ASSET_FETCHES_TOTAL.inc(result="indexed")
+            digest, content_type, size = stored
+            return {"hash": digest, "content_type": content_type, "bytes": size}
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.shared += 1
+            ASSET_FETCHES_TOTAL.inc(result="shared")
+            return await asyncio.shield(pending)
+
+        pending = asyncio.ensure_future(self._download(url, key))
+        self._in_flight[key] = pending
+        pending.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        try:
+            result = await asyncio.shield(pending)
+        except Exception:
+            self.failed += 1
+            ASSET_FETCHES_TOTAL.inc(result="error")
+            raise
+        ASSET_FETCHES_TOTAL.inc(result="downloaded")
+        return result
+
+    async def fetch_all(self, assets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Download a scrape's assets concurrently. Returns copies annotated with hash,
+        local_url, content_type and bytes, or fetch_error."""
+        urls = list(dict.fromkeys(
+            asset["src"] for asset in assets
+            if isinstance(asset.get("src"), str) and asset["src"].startswith(("http://", "https://"))
+        ))
+        results = await asyncio.gather(*(self.fetch(url) for url in urls), return_exceptions=True)
+        by_url = dict(zip(urls, results))
+
+        annotated = []
+        for asset in assets:
+            asset = dict(asset)
+            result = by_url.get(asset.get("src"))
+            if isinstance(result, dict):
+                asset.update(result)
+                asset["local_url"] = self.local_url(result["hash"])
+            elif isinstance(result, BaseException):
+                asset["fetch_error"] = str(result) or type(result).__name__
+            annotated.append(asset)
+        stored = sum(1 for result in results if isinstance(result, dict))
+        print(f"Stored {stored}/{len(urls)} assets")
+        return annotated
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "index_path": self.index_path,
+            "downloaded": self.downloaded,
+            "indexed": self.indexed,
+            "shared": self.shared,
+            "failed": self.failed,
+            "bytes_downloaded": self.bytes_downloaded,
+            "max_connections": self.max_connections,
+            "per_host": self.per_host
+        }
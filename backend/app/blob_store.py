@@ -0,0 +1,150 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobStore:
+    """Content-addressed file store for binary artifacts (screenshots, assets).
+
+    Blobs are named by the sha256 of their bytes and sharded by the first two hex
+    digits, with the content type kept in a small sidecar file. Storing the same
+    bytes twice is a no-op. Storing, re-storing and reading a blob all refresh its
+    mtime, so once the store passes `max_bytes` the least recently used blobs are
+    removed.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.root = root or os.getenv("BLOB_STORE_DIR", "blobs")
+        self.max_bytes = max_bytes or int(float(os.getenv("BLOB_STORE_MAX_MB", "4096")) * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+        self.writes = 0
+        self.dedup_hits = 0
+        self.evictions = 0
+
+    @staticmethod
+    def is_valid_hash(digest: str) -> bool:
+        return bool(_HASH_RE.match(digest))
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def _scan_size(self) -> int:
+        total = 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(directory, name))
+                except FileNotFoundError:
+                    pass
+        return total
+
+    @staticmethod
+    def _touch(path: str) -> bool:
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def put(self, data: bytes, content_type: str = "application/octet-stream") -> str:
+        """Store bytes and return their sha256 hex digest"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if self._touch(path):
+            self.dedup_hits += 1
+            return digest
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        meta = json.dumps({"content_type": content_type, "size": len(data)}).encode()
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        with open(f"{path}.meta", "wb") as f:
+            f.write(meta)
+        # The blob appears atomically, after its metadata
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += len(data) + len(meta)
+            self.writes += 1
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+        return digest
+
+    def has(self, digest: str) -> bool:
+        return self.is_valid_hash(digest) and os.path.exists(self._path(digest))
+
+    def has_all(self, digests: Iterable[str]) -> bool:
+        """True if every blob is still stored. Found blobs count as used, since the
+        caller is about to hand out URLs to them."""
+        return all(self.is_valid_hash(digest) and self._touch(self._path(digest)) for digest in digests)
+
+    def get(self, digest: str) -> Optional[Tuple[bytes, str]]:
+        """Return (bytes, content type), or None if the blob is unknown"""
+        if not self.is_valid_hash(digest):
+            return None
+        path = self._path(digest)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        self._touch(path)
+        try:
+            with open(f"{path}.meta", "rb") as f:
+                content_type = json.loads(f.read())["content_type"]
+        except (FileNotFoundError, ValueError, KeyError):
+            content_type = "application/octet-stream"
+        return data, content_type
+
+    def _evict(self):
+        blobs = []
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if self.is_valid_hash(name):
+                    path = os.path.join(directory, name)
+                    try:
+                        blobs.append((os.path.getmtime(path), path))
+                    except FileNotFoundError:
+                        pass
+        blobs.sort()
+        for _, path in blobs:
+            if self._total_bytes <= self.max_bytes * 0.9:
+                break
+            for victim in (path, f"{path}.meta"):
+                try:
+                    size = os.path.getsize(victim)
+                    os.remove(victim)
+                    self._total_bytes -= size
+                except FileNotFoundError:
+                    pass
+            self.evictions += 1
+
+    async def aput(self, data: bytes, content_type: str = "application/octet-stream") -> str:
+        return await asyncio.to_thread(self.put, data, content_type)
+
+    async def aget(self, digest: str) -> Optional[Tuple[bytes, str]]:
+        return await asyncio.to_thread(self.get, digest)
+
+    async def ahas_all(self, digests: Iterable[str]) -> bool:
+        return await asyncio.to_thread(self.has_all, list(digests))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "root": self.root,
+            "writes": self.writes,
+            "dedup_hits": self.dedup_hits,
+            "evictions": self.evictions,
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes
+        }
@@ -0,0 +1,275 @@
+import asyncio
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from playwright.async_api import Browser, BrowserContext, Playwright, async_playwright
+
+from .admission import Overloaded
+from .process_memory import find_process, process_tree_rss_mb
+
+CHROMIUM_ARGS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--disable-web-security',
+    '--disable-features=VizDisplayCompositor',
+    '--disable-blink-features=AutomationControlled'
+]
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+class _PooledBrowser:
+    """A single pooled Chromium and its usage counters"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.browser: Optional[Browser] = None
+        self.marker = ""
+        # Found on the first memory sample after each launch
+        self.root_pid: Optional[int] = None
+        self.pages_served = 0
+        self.launches = 0
+        self.memory_mb = 0.0
+        # Held while the browser is being (re)launched so leases wait for it
+        self.lock = asyncio.Lock()
+        # While draining for a recycle, returned slots are parked here instead of re-queued
+        self.draining = False
+        self.parked = 0
+
+    async def launch(self, playwright: Playwright):
+        self.marker = f"--orchids-pool-slot={uuid.uuid4().hex}"
+        self.root_pid = None
+        self.browser = await playwright.chromium.launch(
+            headless=True,
+            args=CHROMIUM_ARGS + [self.marker]
+        )
+        self.pages_served = 0
+        self.memory_mb = 0.0
+        self.launches += 1
+
+    async def close(self):
+        if self.browser is None:
+            return
+        try:
+            await self.browser.close()
+        except Exception as e:
+            print(f"Browser {self.index} close warning: {e}")
+        self.browser = None
+
+
+class BrowserPool:
+    """Long-lived pool of local Chromium browsers.
+
+    Each request gets a fresh, isolated BrowserContext on a warm browser. Browsers
+    are relaunched after `max_pages_per_browser` contexts or once their process
+    tree grows past `max_memory_mb`. Memory is sampled in the background every
+    `memory_sample_interval` seconds; releases only compare the last sample.
+    """
+
+    def __init__(self,
+                 size: Optional[int] = None,
+                 max_pages_per_browser: Optional[int] = None,
+                 max_memory_mb: Optional[float] = None,
+                 acquire_timeout: Optional[float] = None,
+                 memory_sample_interval: Optional[float] = None):
+        self.size = size or int(os.getenv("BROWSER_POOL_SIZE", "2"))
+        self.max_pages_per_browser = max_pages_per_browser if max_pages_per_browser is not None \
+            else int(os.getenv("BROWSER_MAX_PAGES", "50"))
+        self.max_memory_mb = max_memory_mb if max_memory_mb is not None \
+            else float(os.getenv("BROWSER_MAX_MEMORY_MB", "1024"))
+        self.acquire_timeout = acquire_timeout or float(os.getenv("BROWSER_ACQUIRE_TIMEOUT", "60"))
+        self.memory_sample_interval = memory_sample_interval or \
+            float(os.getenv("BROWSER_MEMORY_SAMPLE_SECONDS", "15"))
+        # Contexts are cheap, so each browser can serve several requests at once
+        self.contexts_per_browser = int(os.getenv("BROWSER_CONTEXTS_PER_BROWSER", "4"))
+
+        self._playwright: Optional[Playwright] = None
+        self._browsers: List[_PooledBrowser] = []
+        self._slots: Optional[asyncio.Queue] = None
+        self._active: Dict[int, int] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self._sampler: Optional[asyncio.Task] = None
+
+    @property
+    def started(self) -> bool:
+        return self._playwright is not None
+
+    @property
+    def capacity(self) -> int:
+        """Contexts the pool can have open at once"""
+        return self.size * self.contexts_per_browser
+
+    async def start(self):
+        """Launch every browser in the pool (idempotent)"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self.started:
+                return
+            playwright = await async_playwright().start()
+            browsers = [_PooledBrowser(i) for i in range(self.size)]
+            try:
+                await asyncio.gather(*(b.launch(playwright) for b in browsers))
+            except BaseException:
+                await asyncio.gather(*(b.close() for b in browsers))
+                await playwright.stop()
+                raise
+
+            self._slots = asyncio.Queue()
+            # Interleave slots so load spreads across browsers
+            for _ in range(self.contexts_per_browser):
+                for pooled in browsers:
+                    self._slots.put_nowait(pooled)
+            self._browsers = browsers
+            self._active = {b.index: 0 for b in browsers}
+            self._playwright = playwright
+            if self.max_memory_mb:
+                self._sampler = asyncio.create_task(self._sample_loop())
+            print(f"Browser pool warmed with {self.size} browser(s)")
+
+    async def stop(self):
+        if self._lock is None:
+            return
+        async with self._lock:
+            if self._sampler is not None:
+                self._sampler.cancel()
+                await asyncio.gather(self._sampler, return_exceptions=True)
+                self._sampler = None
+            await asyncio.gather(*(b.close() for b in self._browsers))
+            if self._playwright is not None:
+                await self._playwright.stop()
+            self._playwright = None
+            self._browsers = []
+            self._slots = None
+
+    async def _acquire(self) -> _PooledBrowser:
+        if not self.started:
+            await self.start()
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            try:
+                pooled = await asyncio.wait_for(
+                    self._slots.get(), timeout=max(0.0, deadline - time.monotonic())
+                )
+            except asyncio.TimeoutError:
+                # Admission keeps this rare; when it happens it is overload, not a scrape failure
+                raise Overloaded("browser pool", "acquire_timeout", max(1, round(self.acquire_timeout / 10)))
+            if not pooled.draining:
+                break
+            pooled.parked += 1
+
+        self._active[pooled.index] += 1
+        try:
+            async with pooled.lock:
+                if pooled.browser is None or not pooled.browser.is_connected():
+                    print(f"Browser {pooled.index} disconnected, relaunching")
+                    await self._relaunch(pooled)
+        except BaseException:
+            self._active[pooled.index] -= 1
+            self._slots.put_nowait(pooled)
+            raise
+        return pooled
+
+    async def _relaunch(self, pooled: _PooledBrowser):
+        await pooled.close()
+        await pooled.launch(self._playwright)
+
+    def _sample_memory(self, pooled: _PooledBrowser) -> float:
+        # Blocking /proc walk; run in a worker thread
+        if pooled.root_pid is None:
+            pooled.root_pid = find_process(pooled.marker)
+        if pooled.root_pid is None:
+            return 0.0
+        return process_tree_rss_mb(pooled.root_pid)
+
+    async def _sample_loop(self):
+        """Refresh each browser's memory_mb; a /proc walk is too slow for every release"""
+        while True:
+            await asyncio.sleep(self.memory_sample_interval)
+            for pooled in self._browsers:
+                if pooled.browser is None or pooled.draining:
+                    continue
+                launches = pooled.launches
+                try:
+                    memory_mb = await asyncio.to_thread(self._sample_memory, pooled)
+                except Exception as e:
+                    print(f"Browser {pooled.index} memory sample failed: {e}")
+                    continue
+                # A relaunch during the sample makes it describe the old process tree
+                if pooled.launches == launches:
+                    pooled.memory_mb = memory_mb
+
+    def _should_recycle(self, pooled: _PooledBrowser) -> bool:
+        if self.max_pages_per_browser and pooled.pages_served >= self.max_pages_per_browser:
+            print(f"Recycling browser {pooled.index} after {pooled.pages_served} pages")
+            return True
+        if self.max_memory_mb and pooled.memory_mb > self.max_memory_mb:
+            print(f"Recycling browser {pooled.index} at {pooled.memory_mb:.0f} MB")
+            return True
+        return False
+
+    async def _release(self, pooled: _PooledBrowser):
+        pooled.pages_served += 1
+        self._active[pooled.index] -= 1
+        if self._slots is None:
+            return
+
+        if not pooled.draining and self._should_recycle(pooled):
+            pooled.draining = True
+        if not pooled.draining:
+            self._slots.put_nowait(pooled)
+            return
+
+        # Stop handing out this browser and relaunch it once its last context closes
+        pooled.parked += 1
+        if self._active[pooled.index] > 0:
+            return
+        try:
+            async with pooled.lock:
+                await self._relaunch(pooled)
+        except Exception as e:
+            print(f"Browser {pooled.index} recycle failed: {e}")
+        finally:
+            pooled.draining = False
+            for _ in range(pooled.parked):
+                self._slots.put_nowait(pooled)
+            pooled.parked = 0
+
+    @asynccontextmanager
+    async def context(self, **context_options) -> AsyncIterator[BrowserContext]:
+        """Lease a fresh, isolated BrowserContext on a pooled browser"""
+        context_options.setdefault("user_agent", DEFAULT_USER_AGENT)
+        pooled = await self._acquire()
+        try:
+            context = await pooled.browser.new_context(**context_options)
+            try:
+                yield context
+            finally:
+                try:
+                    await context.close()
+                except Exception as cleanup_error:
+                    print(f"Context cleanup warning: {cleanup_error}")
+        finally:
+            await self._release(pooled)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "contexts_per_browser": self.contexts_per_browser,
+            "idle_slots": self._slots.qsize() if self._slots is not None else 0,
+            "started": self.started,
+            "browsers": [
+                {
+                    "index": b.index,
+                    "active_contexts": self._active.get(b.index, 0),
+                    "pages_served": b.pages_served,
+                    "launches": b.launches,
+                    "memory_mb": round(b.memory_mb, 1)
+                }
+                for b in self._browsers
+            ]
+        }
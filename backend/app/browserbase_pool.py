@@ -0,0 +1,389 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Coroutine, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from browserbase import AsyncBrowserbase
+from playwright.async_api import Browser, BrowserContext, Playwright, async_playwright
+
+from .admission import Overloaded
+from .browser_pool import CHROMIUM_ARGS
+
+
+class BrowserbaseSessionProvider:
+    """Creates and releases keep-alive Browserbase sessions"""
+
+    def __init__(self, api_key: str, project_id: str, session_timeout: int):
+        self.client = AsyncBrowserbase(api_key=api_key)
+        self.project_id = project_id
+        self.session_timeout = session_timeout
+
+    async def create(self) -> Tuple[str, str]:
+        session = await self.client.sessions.create(
+            project_id=self.project_id,
+            keep_alive=True,
+            # Browserbase ends the session on its own if we ever lose track of it
+            api_timeout=self.session_timeout
+        )
+        print("Session replay URL:", f"https://browserbase.com/sessions/{session.id}")
+        return session.id, session.connect_url
+
+    async def is_alive(self, session_id: str) -> bool:
+        session = await self.client.sessions.retrieve(session_id)
+        return session.status == "RUNNING"
+
+    async def release(self, session_id: str):
+        await self.client.sessions.update(
+            session_id,
+            project_id=self.project_id,
+            status="REQUEST_RELEASE"
+        )
+
+
+class LocalCDPSessionProvider:
+    """Offline stand-in for Browserbase that serves local Chromium CDP endpoints.
+
+    Each "session" is a headless Chromium started with remote debugging on a free
+    port, so the pool connects to it over CDP exactly like a remote session.
+    """
+
+    def __init__(self, executable_path: Optional[str] = None):
+        self.executable_path = executable_path
+        self._processes: Dict[str, Tuple[asyncio.subprocess.Process, str, asyncio.Task]] = {}
+
+    @staticmethod
+    async def _drain(stream: asyncio.StreamReader):
+        # Chromium keeps logging to stderr; an unread pipe would eventually block it
+        while await stream.readline():
+            pass
+
+    async def create(self) -> Tuple[str, str]:
+        user_data_dir = tempfile.mkdtemp(prefix="orchids-cdp-")
+        proc = await asyncio.create_subprocess_exec(
+            self.executable_path,
+            "--headless=new",
+            "--remote-debugging-port=0",
+            f"--user-data-dir={user_data_dir}",
+            *CHROMIUM_ARGS,
+            "about:blank",
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+
+        connect_url = None
+        try:
+            while connect_url is None:
+                line = await asyncio.wait_for(proc.stderr.readline(), timeout=30)
+                if not line:
+                    raise RuntimeError("Local Chromium exited before exposing a CDP endpoint")
+                text = line.decode(errors="replace").strip()
+                if text.startswith("DevTools listening on "):
+                    connect_url = text[len("DevTools listening on "):]
+        except BaseException:
+            proc.kill()
+            await proc.wait()
+            shutil.rmtree(user_data_dir, ignore_errors=True)
+            raise
+
+        session_id = f"local-{proc.pid}"
+        drain_task = asyncio.create_task(self._drain(proc.stderr))
+        self._processes[session_id] = (proc, user_data_dir, drain_task)
+        print(f"Local CDP session {session_id} at {connect_url}")
+        return session_id, connect_url
+
+    async def is_alive(self, session_id: str) -> bool:
+        entry = self._processes.get(session_id)
+        return entry is not None and entry[0].returncode is None
+
+    async def release(self, session_id: str):
+        entry = self._processes.pop(session_id, None)
+        if entry is None:
+            return
+        proc, user_data_dir, drain_task = entry
+        if proc.returncode is None:
+            proc.terminate()
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=10)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+        drain_task.cancel()
+        shutil.rmtree(user_data_dir, ignore_errors=True)
+
+
+class _PooledSession:
+    """A connected session and its bookkeeping"""
+
+    def __init__(self, session_id: str, browser: Browser):
+        self.id = session_id
+        self.browser = browser
+        self.created_at = time.monotonic()
+        self.leases = 0
+        # Origins the current lease talked to, whose storage is cleared on release
+        self.origins: Set[str] = set()
+
+    def _track(self, request):
+        parts = urlsplit(request.url)
+        if parts.scheme in ("http", "https") and parts.netloc:
+            self.origins.add(f"{parts.scheme}://{parts.netloc}")
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+
+class BrowserbaseSessionPool:
+    """Pool of pre-created, keep-alive browser sessions reached over CDP.
+
+    Requests lease a session, scrape in its default context and hand it back, so
+    session creation and the CDP handshake happen once per session rather than once
+    per request. Sessions are health-checked while idle and rotated once they are
+    older than `max_age`. The pool never holds more than `size` sessions, which
+    bounds spend, and scraper admission is capped at `size` to match.
+    """
+
+    def __init__(self,
+                 provider,
+                 size: Optional[int] = None,
+                 max_age: Optional[float] = None,
+                 health_check_interval: Optional[float] = None,
+                 acquire_timeout: Optional[float] = None):
+        self.provider = provider
+        self.size = size or int(os.getenv("BROWSERBASE_POOL_SIZE", "2"))
+        self.max_age = max_age or float(os.getenv("BROWSERBASE_SESSION_MAX_AGE", "600"))
+        self.health_check_interval = health_check_interval or \
+            float(os.getenv("BROWSERBASE_HEALTH_CHECK_INTERVAL", "30"))
+        self.acquire_timeout = acquire_timeout or float(os.getenv("BROWSER_ACQUIRE_TIMEOUT", "60"))
+
+        self._playwright: Optional[Playwright] = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._leased: Dict[str, _PooledSession] = {}
+        self._health_task: Optional[asyncio.Task] = None
+        # Session replacements in flight; kept so they aren't collected mid-flight
+        # and so stop() can wind them down
+        self._background: Set[asyncio.Task] = set()
+        self._stopping = False
+        self._lock: Optional[asyncio.Lock] = None
+        self.sessions_created = 0
+        self.sessions_retired = 0
+
+    @property
+    def started(self) -> bool:
+        return self._playwright is not None
+
+    async def start(self):
+        """Create and connect every session in the pool (idempotent)"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self.started:
+                return
+            self._stopping = False
+            self._playwright = await async_playwright().start()
+            if isinstance(self.provider, LocalCDPSessionProvider) and not self.provider.executable_path:
+                self.provider.executable_path = self._playwright.chromium.executable_path
+
+            self._idle = asyncio.Queue()
+            results = await asyncio.gather(
+                *(self._create_session() for _ in range(self.size)),
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, BaseException):
+                    print(f"Session warm-up failed: {result}")
+                    # Fill the slot later instead of shrinking the pool
+                    self._spawn(self._replace())
+                else:
+                    self._idle.put_nowait(result)
+
+            self._health_task = asyncio.create_task(self._health_loop())
+            print(f"Browserbase session pool warmed with {self._idle.qsize()}/{self.size} session(s)")
+
+    async def stop(self):
+        if self._lock is None:
+            return
+        async with self._lock:
+            if self._health_task is not None:
+                self._health_task.cancel()
+                self._health_task = None
+            # Let in-flight replacements finish (they retire what they create once
+            # stopping), then cancel any still backing off
+            self._stopping = True
+            if self._background:
+                _, pending = await asyncio.wait(set(self._background), timeout=10)
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+            sessions: List[_PooledSession] = list(self._leased.values())
+            while self._idle is not None and not self._idle.empty():
+                sessions.append(self._idle.get_nowait())
+            await asyncio.gather(*(self._retire(s) for s in sessions))
+            self._leased = {}
+            self._idle = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    def _spawn(self, coro: Coroutine):
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background_done)
+
+    def _background_done(self, task: asyncio.Task):
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Session pool background task failed: {task.exception()}")
+
+    async def _create_session(self) -> _PooledSession:
+        session_id, connect_url = await self.provider.create()
+        try:
+            browser = await self._playwright.chromium.connect_over_cdp(connect_url)
+        except BaseException:
+            await self.provider.release(session_id)
+            raise
+        self.sessions_created += 1
+        return _PooledSession(session_id, browser)
+
+    async def _retire(self, pooled: _PooledSession):
+        self.sessions_retired += 1
+        try:
+            await pooled.browser.close()
+        except Exception as e:
+            print(f"Session {pooled.id} disconnect warning: {e}")
+        try:
+            await self.provider.release(pooled.id)
+        except Exception as e:
+            print(f"Session {pooled.id} release warning: {e}")
+
+    async def _replace(self, retired: Optional[_PooledSession] = None):
+        """Retire a session (if given) and put a fresh one in its slot"""
+        if retired is not None:
+            await self._retire(retired)
+        delay = 1.0
+        while self._idle is not None and not self._stopping:
+            try:
+                fresh = await self._create_session()
+            except Exception as e:
+                print(f"Session replacement failed, retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60.0)
+                continue
+            if self._idle is None or self._stopping:
+                await self._retire(fresh)
+            else:
+                self._idle.put_nowait(fresh)
+            return
+
+    async def _is_healthy(self, pooled: _PooledSession) -> bool:
+        if pooled.age > self.max_age or not pooled.browser.is_connected():
+            return False
+        try:
+            return await self.provider.is_alive(pooled.id)
+        except Exception as e:
+            print(f"Session {pooled.id} health check failed: {e}")
+            return False
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            if self._idle is None:
+                return
+            # Only idle sessions are checked; leased ones are checked on return
+            for _ in range(self._idle.qsize()):
+                try:
+                    pooled = self._idle.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if await self._is_healthy(pooled):
+                    self._idle.put_nowait(pooled)
+                else:
+                    print(f"Rotating session {pooled.id} (age {pooled.age:.0f}s)")
+                    self._spawn(self._replace(pooled))
+
+    async def _acquire(self) -> _PooledSession:
+        if not self.started:
+            await self.start()
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            try:
+                pooled = await asyncio.wait_for(
+                    self._idle.get(), timeout=max(0.0, deadline - time.monotonic())
+                )
+            except asyncio.TimeoutError:
+                # Admission keeps this rare (sessions being replaced); it is overload, not a scrape failure
+                raise Overloaded("browser sessions", "acquire_timeout", max(1, round(self.acquire_timeout / 10)))
+            # Cheap local checks only; the remote status call runs in the health loop
+            if pooled.age <= self.max_age and pooled.browser.is_connected():
+                break
+            self._spawn(self._replace(pooled))
+
+        pooled.leases += 1
+        self._leased[pooled.id] = pooled
+        return pooled
+
+    async def _release(self, pooled: _PooledSession):
+        self._leased.pop(pooled.id, None)
+        if self._idle is None:
+            await self._retire(pooled)
+            return
+
+        context = pooled.browser.contexts[0] if pooled.browser.contexts else None
+        try:
+            if context is None:
+                raise RuntimeError("session has no default context")
+            context.remove_listener("request", pooled._track)
+            # Keep the session's initial page so keep-alive sessions stay open
+            for page in context.pages[1:]:
+                await page.close()
+            await self._clear_state(context, pooled.origins)
+            pooled.origins = set()
+        except Exception as e:
+            print(f"Session {pooled.id} reset failed: {e}")
+            self._spawn(self._replace(pooled))
+            return
+
+        if pooled.age > self.max_age or not pooled.browser.is_connected():
+            self._spawn(self._replace(pooled))
+        else:
+            self._idle.put_nowait(pooled)
+
+    @staticmethod
+    async def _clear_state(context: BrowserContext, origins: Set[str]):
+        """Wipe what one lease leaves behind before the next (possibly another
+        tenant's) request: cookies, the HTTP cache, and every origin's storage
+        (local/session storage, IndexedDB, service workers, Cache Storage)"""
+        await context.clear_cookies()
+        session = await context.new_cdp_session(context.pages[0])
+        try:
+            await session.send("Network.clearBrowserCache")
+            for origin in origins:
+                await session.send("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+        finally:
+            await session.detach()
+
+    @asynccontextmanager
+    async def context(self) -> AsyncIterator[BrowserContext]:
+        """Lease a session and yield its default BrowserContext"""
+        pooled = await self._acquire()
+        try:
+            context = pooled.browser.contexts[0]
+            context.on("request", pooled._track)
+            yield context
+        finally:
+            await self._release(pooled)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize() if self._idle is not None else 0,
+            "leased": len(self._leased),
+            "started": self.started,
+            "max_age": self.max_age,
+            "sessions_created": self.sessions_created,
+            "sessions_retired": self.sessions_retired,
+            "provider": "local-cdp" if isinstance(self.provider, LocalCDPSessionProvider) else "browserbase"
+        }
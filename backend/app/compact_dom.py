@@ -0,0 +1,232 @@
+from typing import Any, Dict, Iterator, List, Optional
+
+COMPACT_DOM_VERSION = 1
+
+# Per-node columns; string-valued columns hold indices into `strings`, -1 for none
+NODE_COLUMNS = ("tag", "parent", "first_child", "next_sibling", "node_id", "classes", "text")
+
+
+def is_compact(dom_structure: Optional[Dict[str, Any]]) -> bool:
+    return bool(dom_structure) and dom_structure.get("format") == "compact"
+
+
+class CompactDOMBuilder:
+    """Builds the columnar DOM payload one node at a time, in document order.
+
+    Nodes are rows of parallel integer arrays. Tag names, ids, class strings, text
+    and attribute names/values are interned once in a shared string table, and
+    attributes are stored CSR-style: node i owns pairs attr_start[i]..attr_start[i+1].
+    """
+
+    def __init__(self):
+        self.columns: Dict[str, List[int]] = {name: [] for name in NODE_COLUMNS}
+        self.attr_start: List[int] = [0]
+        self.attr_name: List[int] = []
+        self.attr_value: List[int] = []
+        self.strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        self._last_child: List[int] = []
+
+    def intern(self, value: Optional[str], keep_empty: bool = False) -> int:
+        if value is None or (value == "" and not keep_empty):
+            return -1
+        index = self._string_ids.get(value)
+        if index is None:
+            index = self._string_ids[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def add(self,
+            tag: str,
+            parent: int = -1,
+            node_id: Optional[str] = None,
+            classes: Optional[str] = None,
+            attributes: Optional[Dict[str, str]] = None,
+            text: Optional[str] = None) -> int:
+        """Append a node after all earlier children of `parent`; returns its index"""
+        index = len(self._last_child)
+        columns = self.columns
+        columns["tag"].append(self.intern(tag))
+        columns["parent"].append(parent)
+        columns["first_child"].append(-1)
+        columns["next_sibling"].append(-1)
+        columns["node_id"].append(self.intern(node_id))
+        columns["classes"].append(self.intern(" ".join((classes or "").split())))
+        columns["text"].append(self.intern(text))
+        self._last_child.append(-1)
+        if parent >= 0:
+            previous = self._last_child[parent]
+            if previous < 0:
+                columns["first_child"][parent] = index
+            else:
+                columns["next_sibling"][previous] = index
+            self._last_child[parent] = index
+
+        for name, value in (attributes or {}).items():
+            self.attr_name.append(self.intern(name))
+            # Attribute values may legitimately be empty (data-foo="")
+            self.attr_value.append(self.intern(value, keep_empty=True))
+        self.attr_start.append(len(self.attr_name))
+        return index
+
+    def build(self) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
+            "format": "compact",
+            "version": COMPACT_DOM_VERSION,
+            "size": len(self._last_child),
+            "strings": self.strings
+        }
+        payload.update(self.columns)
+        payload["attr_start"] = self.attr_start
+        payload["attr_name"] = self.attr_name
+        payload["attr_value"] = self.attr_value
+        return payload
+
+
+def encode_tree(tree: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Convert a nested `dom_structure` tree into the compact payload"""
+    builder = CompactDOMBuilder()
+    if not tree:
+        return builder.build()
+    # Children are pushed in reverse so nodes are numbered in document order
+    stack = [(tree, -1)]
+    while stack:
+        node, parent = stack.pop()
+        index = builder.add(
+            node.get("tag") or "",
+            parent,
+            node_id=node.get("id"),
+            classes=" ".join(node.get("classes") or []),
+            attributes=node.get("attributes"),
+            text=node.get("text")
+        )
+        for child in reversed(node.get("children") or []):
+            stack.append((child, index))
+    return builder.build()
+
+
+class CompactDOM:
+    """Read-only view over a compact DOM payload.
+
+    Lookups decode only the nodes they touch; `to_tree()` rebuilds the nested
+    form for consumers that need it.
+    """
+
+    def __init__(self, payload: Dict[str, Any]):
+        if not is_compact(payload):
+            raise ValueError("Not a compact DOM payload")
+        self.payload = payload
+        self.strings: List[str] = payload["strings"]
+        self.tags: List[int] = payload["tag"]
+        self.parents: List[int] = payload["parent"]
+        self.first_child: List[int] = payload["first_child"]
+        self.next_sibling: List[int] = payload["next_sibling"]
+        self.node_ids: List[int] = payload["node_id"]
+        self.class_ids: List[int] = payload["classes"]
+        self.texts: List[int] = payload["text"]
+        self.attr_start: List[int] = payload["attr_start"]
+        self.attr_name: List[int] = payload["attr_name"]
+        self.attr_value: List[int] = payload["attr_value"]
+        self._string_ids: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def __iter__(self) -> Iterator[int]:
+        """Node indices in document order"""
+        return iter(range(len(self.tags)))
+
+    def string(self, index: int) -> Optional[str]:
+        return self.strings[index] if index >= 0 else None
+
+    def tag(self, node: int) -> str:
+        return self.string(self.tags[node]) or ""
+
+    def parent(self, node: int) -> Optional[int]:
+        parent = self.parents[node]
+        return parent if parent >= 0 else None
+
+    def node_id(self, node: int) -> Optional[str]:
+        return self.string(self.node_ids[node])
+
+    def classes(self, node: int) -> List[str]:
+        value = self.string(self.class_ids[node])
+        return value.split(" ") if value else []
+
+    def text(self, node: int) -> Optional[str]:
+        return self.string(self.texts[node])
+
+    def attributes(self, node: int) -> Dict[str, str]:
+        return {
+            self.strings[self.attr_name[i]]: self.strings[self.attr_value[i]]
+            for i in range(self.attr_start[node], self.attr_start[node + 1])
+        }
+
+    def children(self, node: int) -> Iterator[int]:
+        child = self.first_child[node]
+        while child >= 0:
+            yield child
+            child = self.next_sibling[child]
+
+    def node(self, node: int) -> Dict[str, Any]:
+        """One node in the tree form, without its children"""
+        result = {
+            "tag": self.tag(node),
+            "id": self.node_id(node),
+            "classes": self.classes(node),
+            "attributes": self.attributes(node)
+        }
+        text = self.text(node)
+        if text is not None:
+            result["text"] = text
+        return result
+
+    def find_by_id(self, node_id: str) -> Optional[int]:
+        string = self._string_index(node_id)
+        if string < 0:
+            return None
+        for node, value in enumerate(self.node_ids):
+            if value == string:
+                return node
+        return None
+
+    def find_all(self, tag: Optional[str] = None, class_name: Optional[str] = None) -> List[int]:
+        """Indices of nodes matching a tag and/or a single class, in document order"""
+        tag_index = self._string_index(tag.lower()) if tag else None
+        if tag_index == -1:
+            return []
+        # Test each distinct class string once instead of once per node
+        class_match: Dict[int, bool] = {}
+        matches = []
+        for node in range(len(self.tags)):
+            if tag_index is not None and self.tags[node] != tag_index:
+                continue
+            if class_name:
+                class_id = self.class_ids[node]
+                if class_id not in class_match:
+                    class_match[class_id] = class_id >= 0 and class_name in self.strings[class_id].split(" ")
+                if not class_match[class_id]:
+                    continue
+            matches.append(node)
+        return matches
+
+    def to_tree(self, root: int = 0) -> Dict[str, Any]:
+        """Rebuild the nested `dom_structure` form below `root`"""
+        if not self.tags:
+            return {}
+        tree = self.node(root)
+        tree["children"] = []
+        stack = [(root, tree)]
+        while stack:
+            node, result = stack.pop()
+            for child in self.children(node):
+                child_result = self.node(child)
+                child_result["children"] = []
+                result["children"].append(child_result)
+                stack.append((child, child_result))
+        return tree
+
+    def _string_index(self, value: str) -> int:
+        if self._string_ids is None:
+            self._string_ids = {s: i for i, s in enumerate(self.strings)}
+        return self._string_ids.get(value, -1)
@@ -0,0 +1,88 @@
+import asyncio
+import os
+from typing import Any, AsyncIterator, List, Optional, Tuple
+from urllib.parse import urldefrag, urlsplit
+
+from .metrics import CRAWL_PAGES_TOTAL
+from .scrape_cache import normalize_url
+
+CRAWL_MAX_DEPTH = int(os.getenv("CRAWL_MAX_DEPTH", "2"))
+# Default and ceiling for the pages one crawl visits
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "30"))
+# Pages of a crawl open at once in its browser context
+CRAWL_PAGE_CONCURRENCY = int(os.getenv("CRAWL_PAGE_CONCURRENCY", "4"))
+
+# Links to files rather than pages
+SKIPPED_EXTENSIONS = (
+    ".pdf", ".zip", ".gz", ".tar", ".dmg", ".exe", ".jpg", ".jpeg", ".png", ".gif", ".webp",
+    ".svg", ".ico", ".mp3", ".mp4", ".webm", ".mov", ".xml", ".json", ".css", ".js", ".txt"
+)
+
+
+def origin(url: str) -> Tuple[str, str]:
+    """(scheme, host[:port]) of a URL, with default ports dropped"""
+    parts = urlsplit(normalize_url(url))
+    return parts.scheme, parts.netloc
+
+
+def crawl_links(result: Any, seed_origin: Tuple[str, str]) -> List[str]:
+    """Same-origin page links found on a scraped page, in page order"""
+    links = []
+    for link in (result.visual_context or {}).get("links") or []:
+        href = urldefrag(link.get("href") or "")[0]
+        if not href.startswith(("http://", "https://")) or origin(href) != seed_origin:
+            continue
+        if urlsplit(href).path.lower().endswith(SKIPPED_EXTENSIONS):
+            continue
+        links.append(href)
+    return links
+
+
+async def crawl(scraper: Any, seed: Any, max_depth: Optional[int] = None, max_pages: Optional[int] = None,
+                cache_policy: Any = None) -> AsyncIterator[Tuple[int, Any]]:
+    """Breadth-first crawl from `seed` (a ScrapingRequest) over same-origin links,
+    yielding (depth, ScrapingResult) in discovery order.
+
+    URLs are de-duplicated after normalization. The whole crawl runs in one browser
+    context, so the HTTP cache and cookies carry over between pages (requests are
+    blocked through CDP, which leaves the cache on). Each page still goes through
+    the host scheduler, the browser admission queue and the scrape cache.
+    """
+    max_depth = CRAWL_MAX_DEPTH if max_depth is None else max_depth
+    max_pages = min(max_pages or CRAWL_MAX_PAGES, CRAWL_MAX_PAGES)
+    seed_url = str(seed.url)
+    seed_origin = origin(seed_url)
+    seen = {normalize_url(seed_url)}
+    frontier = [(seed_url, 0)]
+    limit = asyncio.Semaphore(CRAWL_PAGE_CONCURRENCY)
+
+    async with scraper.crawl_context(seed) as browser_context:
+        async def visit(url: str, depth: int):
+            request = type(seed)(**{**seed.model_dump(), "url": url})
+            async with limit:
+                return await scraper.scrape_website(request, cache_policy, patient=True,
+                                                    browser_context=browser_context)
+
+        while frontier:
+            # A whole level is scraped concurrently, then yielded in discovery order
+            tasks = [asyncio.create_task(visit(url, depth)) for url, depth in frontier]
+            depths = [depth for _, depth in frontier]
+            frontier = []
+            try:
+                for depth, task in zip(depths, tasks):
+                    result = await task
+                    failed = result.status.startswith("error")
+                    CRAWL_PAGES_TOTAL.inc(outcome="error" if failed else "success")
+                    yield depth, result
+                    if failed or depth >= max_depth:
+                        continue
+                    for link in crawl_links(result, seed_origin):
+                        key = normalize_url(link)
+                        if key in seen or len(seen) >= max_pages:
+                            continue
+                        seen.add(key)
+                        frontier.append((link, depth + 1))
+            finally:
+                for task in tasks:
+                    task.cancel()
+        print(f"Crawl of {seed_url} visited {len(seen)} page(s)")
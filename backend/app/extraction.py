@@ -0,0 +1,412 @@
+from typing import Any, Dict
+
+# One in-page pass that fills every section of a scrape. The DOM is walked once and
+# each element's computed style is read at most once; sections that are switched
+# off are skipped entirely.
+EXTRACTION_SCRIPT = """
+(options) => {
+    const result = {};
+
+    // Stylesheets
+    if (options.styles) {
+        const sheets = [];
+        for (let sheet of document.styleSheets) {
+            try {
+                if (sheet.href) {
+                    sheets.push({
+                        type: 'external',
+                        href: sheet.href,
+                        rules: sheet.cssRules ? sheet.cssRules.length : 0
+                    });
+                } else {
+                    const content = sheet.ownerNode ? sheet.ownerNode.textContent : '';
+                    if (content.trim()) {
+                        sheets.push({
+                            type: 'inline',
+                            content: content.substring(0, 5000), // Limit size
+                            rules: sheet.cssRules ? sheet.cssRules.length : 0
+                        });
+                    }
+                }
+            } catch (e) {
+                // Cross-origin stylesheet, skip
+            }
+        }
+        result.styles = sheets;
+    }
+
+    // Meta data
+    if (options.meta) {
+        const meta = {};
+        const content = (selector) => {
+            const el = document.querySelector(selector);
+            return el ? el.content : null;
+        };
+        const fields = {
+            description: 'meta[name="description"]',
+            keywords: 'meta[name="keywords"]',
+            author: 'meta[name="author"]',
+            og_title: 'meta[property="og:title"]',
+            og_description: 'meta[property="og:description"]',
+            og_image: 'meta[property="og:image"]',
+            twitter_card: 'meta[name="twitter:card"]',
+            viewport: 'meta[name="viewport"]'
+        };
+        for (const [key, selector] of Object.entries(fields)) {
+            const value = content(selector);
+            if (value) meta[key] = value;
+        }
+        const favicon = document.querySelector('link[rel="icon"]') ||
+                        document.querySelector('link[rel="shortcut icon"]');
+        if (favicon) meta.favicon = favicon.href;
+        const canonical = document.querySelector('link[rel="canonical"]');
+        if (canonical) meta.canonical = canonical.href;
+        result.meta_data = meta;
+    }
+
+    if (!options.assets && !options.dom && !options.visual) {
+        return result;
+    }
+
+    // Key structural selectors for visual context, matched without el.matches()
+    const importantSelectors = [
+        'header', 'nav', 'main', 'footer', 'section', 'article', 'aside',
+        'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'div',
+        '.hero', '#hero', '.container', '.wrapper', '.navbar', '.header',
+        '.footer', '.content', '.main', '.sidebar'
+    ];
+    const byTag = Object.create(null), byClass = Object.create(null), byId = Object.create(null);
+    const buckets = importantSelectors.map(() => []);
+    importantSelectors.forEach((selector, i) => {
+        if (selector[0] === '.') byClass[selector.slice(1)] = i;
+        else if (selector[0] === '#') byId[selector.slice(1)] = i;
+        else byTag[selector.toUpperCase()] = i;
+    });
+
+    const colors = new Set();
+    const fontInfo = new Set();
+    const images = [];
+    const links = [];
+    const imageAssets = [];
+    const backgroundAssets = [];
+    const fontAssets = [];
+    const importantAttrs = ['src', 'href', 'alt', 'title', 'type', 'name', 'value'];
+    const needStyle = options.visual || options.assets;
+
+    function describeElement(el, selector, styles) {
+        const rect = el.getBoundingClientRect();
+        return {
+            selector: selector,
+            tagName: el.tagName,
+            className: el.className,
+            id: el.id,
+            position: {
+                top: rect.top,
+                left: rect.left,
+                width: rect.width,
+                height: rect.height
+            },
+            styles: {
+                display: styles.display,
+                position: styles.position,
+                width: styles.width,
+                height: styles.height,
+                padding: styles.padding,
+                margin: styles.margin,
+                backgroundColor: styles.backgroundColor,
+                color: styles.color,
+                fontSize: styles.fontSize,
+                fontFamily: styles.fontFamily,
+                fontWeight: styles.fontWeight,
+                textAlign: styles.textAlign,
+                border: styles.border,
+                borderRadius: styles.borderRadius,
+                boxShadow: styles.boxShadow,
+                transform: styles.transform,
+                opacity: styles.opacity,
+                zIndex: styles.zIndex,
+                flexDirection: styles.flexDirection,
+                justifyContent: styles.justifyContent,
+                alignItems: styles.alignItems,
+                gridTemplateColumns: styles.gridTemplateColumns,
+                gridTemplateRows: styles.gridTemplateRows
+            },
+            textContent: el.textContent?.substring(0, 200)
+        };
+    }
+
+    function domNode(el) {
+        const node = {
+            tag: el.tagName?.toLowerCase(),
+            id: el.id || null,
+            classes: el.className && typeof el.className === 'string'
+                ? el.className.split(' ').filter(c => c) : [],
+            attributes: {},
+            children: []
+        };
+        for (let attr of el.attributes || []) {
+            if (importantAttrs.includes(attr.name) || attr.name.startsWith('data-')) {
+                node.attributes[attr.name] = attr.value;
+            }
+        }
+        if (el.children.length === 0 && el.textContent) {
+            const text = el.textContent.trim();
+            if (text && text.length < 200) {
+                node.text = text;
+            }
+        }
+        return node;
+    }
+
+    // Columnar DOM: parallel arrays of string-table indices (-1 for none), so a
+    // large page serializes as a handful of flat arrays instead of nested objects
+    const compact = options.dom && options.domFormat === 'compact';
+    const cols = compact ? {
+        tag: [], parent: [], first_child: [], next_sibling: [],
+        node_id: [], classes: [], text: [],
+        attr_start: [0], attr_name: [], attr_value: []
+    } : null;
+    const strings = [];
+    const stringIds = new Map();
+    const lastChild = [];
+    function intern(value, keepEmpty) {
+        if (value === null || value === undefined || (value === '' && !keepEmpty)) return -1;
+        let index = stringIds.get(value);
+        if (index === undefined) {
+            index = strings.length;
+            stringIds.set(value, index);
+            strings.push(value);
+        }
+        return index;
+    }
+
+    function compactNode(el, parent) {
+        const index = cols.tag.length;
+        cols.tag.push(intern(el.tagName?.toLowerCase()));
+        cols.parent.push(parent);
+        cols.first_child.push(-1);
+        cols.next_sibling.push(-1);
+        cols.node_id.push(intern(el.id));
+        cols.classes.push(intern(el.className && typeof el.className === 'string'
+            ? el.className.split(' ').filter(c => c).join(' ') : ''));
+        let text = -1;
+        if (el.children.length === 0 && el.textContent) {
+            const value = el.textContent.trim();
+            if (value && value.length < 200) text = intern(value);
+        }
+        cols.text.push(text);
+        lastChild.push(-1);
+        if (parent >= 0) {
+            if (lastChild[parent] < 0) cols.first_child[parent] = index;
+            else cols.next_sibling[lastChild[parent]] = index;
+            lastChild[parent] = index;
+        }
+        for (let attr of el.attributes || []) {
+            if (importantAttrs.includes(attr.name) || attr.name.startsWith('data-')) {
+                cols.attr_name.push(intern(attr.name));
+                cols.attr_value.push(intern(attr.value, true));
+            }
+        }
+        cols.attr_start.push(cols.attr_name.length);
+        return index;
+    }
+
+    const body = document.body;
+    let bodyStyles = null;
+    let domRoot = null;
+
+    // Iterative pre-order walk; each entry carries its DOM-tree parent and its depth
+    // below <body> (-1 outside it)
+    const stack = [[document.documentElement, null, -1]];
+    while (stack.length) {
+        const [el, parentNode, depth] = stack.pop();
+        const tag = el.tagName;
+
+        const styles = needStyle ? window.getComputedStyle(el) : null;
+        if (el === body) bodyStyles = styles;
+
+        if (options.visual) {
+            const color = styles.color;
+            const bgColor = styles.backgroundColor;
+            const borderColor = styles.borderColor;
+            if (color && color !== 'rgba(0, 0, 0, 0)' && color !== 'rgb(0, 0, 0)') {
+                colors.add(color);
+            }
+            if (bgColor && bgColor !== 'rgba(0, 0, 0, 0)' && bgColor !== 'rgb(255, 255, 255)') {
+                colors.add(bgColor);
+            }
+            if (borderColor && borderColor !== 'rgba(0, 0, 0, 0)') {
+                colors.add(borderColor);
+            }
+            const fontFamily = styles.fontFamily;
+            if (fontFamily && fontFamily !== 'inherit') {
+                fontInfo.add(`${fontFamily}|${styles.fontSize}|${styles.fontWeight}`);
+            }
+
+            const matched = [];
+            if (tag in byTag) matched.push(byTag[tag]);
+            if (el.id && el.id in byId) matched.push(byId[el.id]);
+            if (el.classList) {
+                for (const cls of el.classList) {
+                    if (cls in byClass) matched.push(byClass[cls]);
+                }
+            }
+            for (const i of matched) {
+                if (buckets[i].length < 5) { // Limit to prevent overwhelming data
+                    buckets[i].push(describeElement(el, importantSelectors[i], styles));
+                }
+            }
+
+            if (tag === 'IMG') {
+                images.push({
+                    src: el.src,
+                    alt: el.alt || '',
+                    width: el.width || el.naturalWidth,
+                    height: el.height || el.naturalHeight,
+                    className: el.className,
+                    id: el.id
+                });
+            } else if (tag === 'A' && links.length < 20) { // Limit links
+                const text = el.textContent.trim();
+                if (text) {
+                    links.push({
+                        href: el.href,
+                        text: text,
+                        className: el.className,
+                        id: el.id
+                    });
+                }
+            }
+        }
+
+        if (options.assets) {
+            if (tag === 'IMG' && el.src && el.src.startsWith('http')) {
+                imageAssets.push({
+                    type: 'image',
+                    src: el.src,
+                    alt: el.alt || '',
+                    width: el.naturalWidth || el.width,
+                    height: el.naturalHeight || el.height,
+                    className: el.className,
+                    id: el.id
+                });
+            } else if (tag === 'LINK' && el.rel === 'stylesheet' &&
+                       el.href && (el.href.includes('fonts') || el.href.includes('font'))) {
+                fontAssets.push({
+                    type: 'font',
+                    src: el.href
+                });
+            }
+            const bgImage = styles.backgroundImage;
+            if (bgImage && bgImage !== 'none' && bgImage.includes('url(')) {
+                const match = bgImage.match(/url\\(["']?([^"'\\)]+)["']?\\)/);
+                if (match && match[1].startsWith('http')) {
+                    backgroundAssets.push({
+                        type: 'background-image',
+                        src: match[1],
+                        element: tag,
+                        className: el.className
+                    });
+                }
+            }
+        }
+
+        // Build the DOM tree (body plus 8 levels) during the same walk. `node` is the
+        // tree object, or the row index in compact mode
+        let node = null;
+        if (options.dom && depth >= 0 && depth <= 8 && (el === body || parentNode !== null)) { // Prevent deep recursion
+            if (compact) {
+                node = compactNode(el, parentNode === null ? -1 : parentNode);
+            } else {
+                node = domNode(el);
+                if (parentNode) parentNode.children.push(node);
+                else domRoot = node;
+            }
+        }
+
+        // Below the depth limit only the style/asset walk needs to continue
+        if (!needStyle && depth >= 0 && node === null) continue;
+
+        const children = el.children;
+        for (let i = children.length - 1; i >= 0; i--) {
+            const child = children[i];
+            const childDepth = child === body ? 0 : (depth >= 0 ? depth + 1 : -1);
+            stack.push([child, node, childDepth]);
+        }
+    }
+
+    if (compact) {
+        result.dom_structure = Object.assign({
+            format: 'compact',
+            version: 1,
+            size: cols.tag.length,
+            strings: strings
+        }, cols);
+    } else if (options.dom) {
+        result.dom_structure = domRoot;
+    }
+
+    if (options.assets) {
+        result.assets = imageAssets.concat(backgroundAssets, fontAssets);
+    }
+
+    if (options.visual) {
+        result.visual_context = {
+            colors: Array.from(colors),
+            fonts: Array.from(fontInfo),
+            layout: {
+                display: bodyStyles.display,
+                flexDirection: bodyStyles.flexDirection,
+                justifyContent: bodyStyles.justifyContent,
+                alignItems: bodyStyles.alignItems,
+                padding: bodyStyles.padding,
+                margin: bodyStyles.margin,
+                backgroundColor: bodyStyles.backgroundColor,
+                width: bodyStyles.width,
+                minHeight: bodyStyles.minHeight,
+                fontFamily: bodyStyles.fontFamily
+            },
+            elements: [].concat(...buckets),
+            images: images,
+            links: links
+        };
+    }
+
+    return result;
+}
+"""
+
+
+async def extract_page_data(page,
+                            include_styles: bool = True,
+                            include_assets: bool = True,
+                            include_dom: bool = True,
+                            include_visual: bool = True,
+                            include_meta: bool = True,
+                            dom_format: str = "tree") -> Dict[str, Any]:
+    """Extract every requested section of the page in a single page.evaluate call.
+
+    With dom_format="compact", `dom_structure` is the columnar payload read by
+    compact_dom.CompactDOM instead of a nested tree.
+    """
+    options = {
+        "styles": include_styles,
+        "assets": include_assets,
+        "dom": include_dom,
+        "domFormat": dom_format,
+        "visual": include_visual,
+        "meta": include_meta
+    }
+    try:
+        data = await page.evaluate(EXTRACTION_SCRIPT, options)
+    except Exception as e:
+        print(f"Page extraction error: {str(e)}")
+        data = {}
+
+    return {
+        "styles": data.get("styles", []) if include_styles else [],
+        "assets": data.get("assets", []) if include_assets else [],
+        "dom_structure": data.get("dom_structure", {}) if include_dom else None,
+        "meta_data": data.get("meta_data", {}) if include_meta else {},
+        "visual_context": data.get("visual_context") if include_visual else None
+    }
@@ -0,0 +1,207 @@
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+from urllib.parse import urlparse
+
+from .admission import Overloaded
+from .metrics import HOST_BACKOFFS_TOTAL
+
+# Idle hosts are forgotten once the table grows past this
+MAX_TRACKED_HOSTS = 1024
+
+
+def host_key(url: str) -> str:
+    """Scheduling key for a URL: its lowercased host name"""
+    return (urlparse(url).hostname or "").lower()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter: uniform in [0, min(cap, base * 2**attempt)]"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self) -> float:
+        """Take a token; returns how long to wait before using it (0 if one was free).
+        Tokens may go negative, which reserves them for the callers already waiting."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def is_full(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.burst
+
+
+class _HostState:
+    def __init__(self, rate: float, burst: float):
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.bucket = TokenBucket(rate, burst)
+        self.failures = 0
+        self.backoff_until = 0.0
+        self.requests = 0
+
+    def is_idle(self) -> bool:
+        return (not self.active and not self.waiters and self.failures == 0
+                and self.backoff_until <= time.monotonic() and self.bucket.is_full())
+
+
+class HostScheduler:
+    """Politeness for outbound scrapes, keyed by host.
+
+    Each host gets at most `max_per_host` scrapes at once and `rate` navigations
+    per second (bursting to `burst`). Failures push the host into exponential
+    backoff with jitter, which every request to that host then honours.
+
+    Requests wait for their host before taking a browser slot, so a large batch
+    against one site queues behind its own host cap instead of filling the
+    shared browser queue, and other hosts keep getting through.
+    """
+
+    def __init__(self, max_per_host: int, rate: float, burst: float,
+                 backoff_base: float, backoff_max: float, queue_timeout: float):
+        self.max_per_host = max_per_host
+        self.rate = rate
+        self.burst = burst
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.queue_timeout = queue_timeout
+        self._hosts: Dict[str, _HostState] = {}
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            if len(self._hosts) >= MAX_TRACKED_HOSTS:
+                for key in [k for k, s in self._hosts.items() if s.is_idle()]:
+                    del self._hosts[key]
+            state = self._hosts[host] = _HostState(self.rate, self.burst)
+        return state
+
+    async def _acquire(self, host: str, state: _HostState, patient: bool):
+        if state.active < self.max_per_host and not state.waiters:
+            state.active += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        state.waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=None if patient else self.queue_timeout)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release(state)
+            else:
+                waiter.cancel()
+                state.waiters.remove(waiter)
+            raise
+        if not waiter.done():
+            waiter.cancel()
+            state.waiters.remove(waiter)
+            retry_after = max(1, round(self.queue_timeout * (len(state.waiters) + 1) / self.max_per_host))
+            raise Overloaded(f"host {host}", "queue_timeout", retry_after)
+
+    def _release(self, state: _HostState):
+        while state.waiters:
+            waiter = state.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        state.active -= 1
+
+    async def pace(self, host: str):
+        """Wait out any backoff for the host, then for a rate-limit token"""
+        state = self._state(host)
+        delay = state.backoff_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        delay = state.bucket.take()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        state.requests += 1
+
+    def record_failure(self, host: str, retry_after: Optional[float] = None) -> float:
+        """Back the host off after a failed or throttled navigation; returns the delay.
+        A Retry-After from the site wins over the computed delay, up to backoff_max."""
+        state = self._state(host)
+        if retry_after is not None:
+            delay = min(self.backoff_max, max(retry_after, 0.0))
+        else:
+            delay = backoff_delay(state.failures, self.backoff_base, self.backoff_max)
+        state.failures += 1
+        state.backoff_until = max(state.backoff_until, time.monotonic() + delay)
+        HOST_BACKOFFS_TOTAL.inc()
+        return delay
+
+    def record_success(self, host: str):
+        state = self._hosts.get(host)
+        if state is not None:
+            state.failures = 0
+
+    @asynccontextmanager
+    async def slot(self, url: str, patient: bool = False) -> AsyncIterator[str]:
+        """Hold one of the host's concurrency slots; yields the host key.
+        Interactive callers give up after queue_timeout with Overloaded."""
+        host = host_key(url)
+        state = self._state(host)
+        await self._acquire(host, state, patient)
+        try:
+            yield host
+        finally:
+            self._release(state)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        busy = sorted(self._hosts.items(), key=lambda item: -(item[1].active + len(item[1].waiters)))
+        return {
+            "max_per_host": self.max_per_host,
+            "rate": self.rate,
+            "burst": self.burst,
+            "tracked_hosts": len(self._hosts),
+            "backing_off": sum(1 for s in self._hosts.values() if s.backoff_until > now),
+            "busiest": [
+                {
+                    "host": host,
+                    "active": state.active,
+                    "queued": len(state.waiters),
+                    "failures": state.failures,
+                    "backoff_remaining": round(max(0.0, state.backoff_until - now), 2),
+                    "requests": state.requests
+                }
+                for host, state in busy[:10] if state.active or state.waiters or state.backoff_until > now
+            ]
+        }
@@ -0,0 +1,210 @@
+import os
+from collections import Counter
+from html.parser import HTMLParser
+from typing import List, Optional
+
+LANDMARK_TAGS = {"header", "nav", "main", "footer", "aside", "section", "article", "form"}
+LANDMARK_ROLES = {"banner", "navigation", "main", "contentinfo", "complementary", "search", "region"}
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+SKIPPED_TAGS = {"script", "style", "noscript", "template", "svg"}
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+    "meta", "param", "source", "track", "wbr"
+}
+
+# Siblings sharing a signature this often are reported once as a repeated block
+REPEAT_THRESHOLD = 3
+MAX_NAV_LINKS = 12
+MAX_TEXT_CHARS = 80
+
+
+class _Frame:
+    __slots__ = ("tag", "signature", "landmark", "suppressed", "children", "links")
+
+    def __init__(self, tag: str, signature: str, landmark: bool, suppressed: bool):
+        self.tag = tag
+        self.signature = signature
+        self.landmark = landmark
+        self.suppressed = suppressed
+        self.children = Counter()
+        self.links: Optional[List[str]] = None
+
+
+class _OutlineParser(HTMLParser):
+    """Builds the outline as the document streams through; never keeps the DOM"""
+
+    def __init__(self, max_lines: int, max_elements: int):
+        super().__init__(convert_charrefs=True)
+        self.max_lines = max_lines
+        self.max_elements = max_elements
+        self.elements = 0
+        self.lines: List[str] = []
+        self.stack: List[_Frame] = []
+        self.skip_depth = 0
+        self.landmark_depth = 0
+        self.heading: Optional[List[str]] = None
+        self.link: Optional[List[str]] = None
+        self.text_sample: List[str] = []
+        self.text_chars = 0
+
+    @property
+    def done(self) -> bool:
+        return len(self.lines) >= self.max_lines
+
+    @property
+    def exhausted(self) -> bool:
+        return self.elements >= self.max_elements
+
+    def _emit(self, text: str, depth: Optional[int] = None):
+        if not self.done:
+            indent = "  " * (self.landmark_depth if depth is None else depth)
+            self.lines.append(f"{indent}{text}")
+
+    @staticmethod
+    def _describe(tag: str, attrs) -> str:
+        attrs = dict(attrs)
+        label = tag
+        if attrs.get("id"):
+            label += f"#{attrs['id']}"
+        classes = (attrs.get("class") or "").split()
+        if classes:
+            label += "." + ".".join(classes[:2])
+        if attrs.get("role"):
+            label += f"[role={attrs['role']}]"
+        return label
+
+    def _nav(self) -> Optional[_Frame]:
+        for frame in reversed(self.stack):
+            if frame.links is not None:
+                return frame
+        return None
+
+    def handle_starttag(self, tag, attrs):
+        self.elements += 1
+        if self.skip_depth:
+            if tag in SKIPPED_TAGS:
+                self.skip_depth += 1
+            return
+        if tag in SKIPPED_TAGS:
+            self.skip_depth = 1
+            return
+
+        attr_map = dict(attrs)
+        classes = (attr_map.get("class") or "").split()
+        signature = f"{tag}.{classes[0]}" if classes else tag
+        parent = self.stack[-1] if self.stack else None
+        suppressed = False
+        if parent is not None:
+            parent.children[signature] += 1
+            # Only the first couple of repeated siblings are outlined in full
+            suppressed = parent.suppressed or parent.children[signature] >= REPEAT_THRESHOLD
+
+        if tag in VOID_TAGS:
+            return
+
+        landmark = tag in LANDMARK_TAGS or attr_map.get("role") in LANDMARK_ROLES
+        frame = _Frame(tag, signature, landmark and not suppressed, suppressed)
+        self.stack.append(frame)
+
+        if suppressed:
+            return
+        if frame.landmark:
+            self._emit(f"<{self._describe(tag, attrs)}>")
+            self.landmark_depth += 1
+            if tag == "nav" or attr_map.get("role") == "navigation":
+                frame.links = []
+        elif tag in HEADING_TAGS:
+            self.heading = []
+        elif tag == "a" and self._nav() is not None:
+            self.link = []
+
+    def handle_endtag(self, tag):
+        if self.skip_depth:
+            if tag in SKIPPED_TAGS:
+                self.skip_depth -= 1
+            return
+        if tag in VOID_TAGS or not any(frame.tag == tag for frame in self.stack):
+            return
+        # Pop implicitly closed elements (unclosed <p>, <li>, ...) along the way
+        while self.stack:
+            frame = self.stack.pop()
+            self._close(frame)
+            if frame.tag == tag:
+                break
+
+    def _close(self, frame: _Frame):
+        if frame.suppressed:
+            return
+        if frame.tag in HEADING_TAGS and self.heading is not None:
+            text = " ".join("".join(self.heading).split())
+            if text:
+                self._emit(f"{frame.tag}: {text[:MAX_TEXT_CHARS]}")
+            self.heading = None
+        elif frame.tag == "a" and self.link is not None:
+            text = " ".join("".join(self.link).split())
+            nav = self._nav()
+            if text and nav is not None and len(nav.links) < MAX_NAV_LINKS:
+                nav.links.append(text[:40])
+            self.link = None
+
+        repeated = [(count, sig) for sig, count in frame.children.items() if count >= REPEAT_THRESHOLD]
+        if frame.landmark:
+            if frame.links:
+                self._emit("links: " + " | ".join(frame.links))
+        for count, sig in sorted(repeated, reverse=True)[:3]:
+            self._emit(f"{count}x {sig}")
+        if frame.landmark:
+            self.landmark_depth -= 1
+
+    def handle_data(self, data):
+        if self.skip_depth or (self.stack and self.stack[-1].suppressed):
+            return
+        if self.heading is not None:
+            self.heading.append(data)
+        if self.link is not None:
+            self.link.append(data)
+        if self.text_chars < 300:
+            text = " ".join(data.split())
+            if text:
+                self.text_sample.append(text)
+                self.text_chars += len(text)
+
+
+def summarize_html(html: str,
+                   max_lines: Optional[int] = None,
+                   max_bytes: Optional[int] = None,
+                   max_elements: Optional[int] = None,
+                   chunk_size: int = 65536) -> str:
+    """Structural outline of a page: landmarks, headings, nav links and repeated blocks.
+
+    One streaming pass that ignores script, style and comments. It stops once the
+    outline has `max_lines` lines, `max_bytes` characters have been read or
+    `max_elements` start tags have been parsed, so the cost is bounded however large
+    the page is. The limits are on input, never on time, so the same page always
+    gives the same outline (and the same prompt and LLM cache key).
+    """
+    if not html:
+        return ""
+    max_lines = max_lines or int(os.getenv("HTML_SUMMARY_MAX_LINES", "120"))
+    max_bytes = max_bytes or int(os.getenv("HTML_SUMMARY_MAX_BYTES", "2000000"))
+    max_elements = max_elements or int(os.getenv("HTML_SUMMARY_MAX_ELEMENTS", "20000"))
+
+    parser = _OutlineParser(max_lines, max_elements)
+    limit = min(len(html), max_bytes)
+    truncated = limit < len(html)
+    for start in range(0, limit, chunk_size):
+        parser.feed(html[start:min(start + chunk_size, limit)])
+        if parser.done or parser.exhausted:
+            truncated = truncated or start + chunk_size < limit
+            break
+    # Close anything still open so trailing repeated blocks are reported
+    while parser.stack and not parser.done:
+        parser._close(parser.stack.pop())
+
+    lines = parser.lines
+    if len(lines) < 3 and parser.text_sample:
+        # Little structure (e.g. a client-rendered shell): fall back to visible text
+        lines = lines + ["text: " + " ".join(parser.text_sample)[:300]]
+    if truncated or parser.done:
+        lines.append("(outline truncated)")
+    return "\n".join(lines)
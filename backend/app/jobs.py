@@ -0,0 +1,311 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# A job runner receives the job payload and a `report(stage, progress)` callback and
+# returns the JSON-serializable result
+JobRunner = Callable[[Dict[str, Any], Callable[[str, float], Awaitable[None]]], Awaitable[Dict[str, Any]]]
+
+FINISHED_STATES = ("succeeded", "failed", "cancelled")
+
+
+class JobStore:
+    """SQLite-backed job table, so queued work survives a restart.
+
+    Several processes may share the file. A claimed job records the claiming
+    store's `worker_id` and a heartbeat; only jobs whose heartbeat has lapsed
+    (their process died or hung) are put back on the queue, never jobs a live
+    peer is running.
+    """
+
+    def __init__(self, path: Optional[str] = None, worker_id: Optional[str] = None):
+        self.path = path or os.getenv("JOBS_DB_PATH", "jobs.sqlite3")
+        self.worker_id = worker_id or uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+            """)
+            # Lease columns, added to tables created before they existed
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("worker_id", "TEXT"), ("heartbeat_at", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, created_at)")
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        if job["result"] is not None:
+            job["result"] = json.loads(job["result"])
+        return job
+
+    def insert(self, kind: str, payload: Dict[str, Any], priority: int) -> Dict[str, Any]:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload, priority, status, stage, created_at) "
+                "VALUES (?, ?, ?, ?, 'queued', 'queued', ?)",
+                (job_id, kind, json.dumps(payload), priority, time.time())
+            )
+            conn.commit()
+            return self._to_dict(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """Mark the highest-priority, oldest queued job as running and return it.
+
+        The lock only covers this process, so the UPDATE is conditional on the job
+        still being queued; if another process sharing the database got there
+        first, the next queued job is tried."""
+        with self._lock:
+            conn = self._connect()
+            while True:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' ORDER BY priority DESC, created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    return None
+                now = time.time()
+                cursor = conn.execute(
+                    "UPDATE jobs SET status = 'running', stage = 'starting', started_at = ?, "
+                    "worker_id = ?, heartbeat_at = ? WHERE id = ? AND status = 'queued'",
+                    (now, self.worker_id, now, row["id"])
+                )
+                conn.commit()
+                if cursor.rowcount == 1:
+                    job = self._to_dict(row)
+                    job.update(status="running", stage="starting", started_at=now,
+                               worker_id=self.worker_id, heartbeat_at=now)
+                    return job
+
+    def update(self, job_id: str, **fields):
+        if "result" in fields and fields["result"] is not None:
+            fields["result"] = json.dumps(fields["result"])
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+            conn.commit()
+
+    def cancel_queued(self, job_id: str) -> bool:
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', stage = 'cancelled', finished_at = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id)
+            )
+            conn.commit()
+            return cursor.rowcount > 0
+
+    def heartbeat(self, job_ids: List[str]):
+        """Renew the lease on jobs this store is running"""
+        if not job_ids:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                f"UPDATE jobs SET heartbeat_at = ? WHERE status = 'running' AND worker_id = ? "
+                f"AND id IN ({', '.join('?' * len(job_ids))})",
+                (time.time(), self.worker_id, *job_ids)
+            )
+            conn.commit()
+
+    def requeue_expired(self, lease: float) -> int:
+        """Put running jobs back on the queue when their worker stopped heartbeating
+        for `lease` seconds (crashed, killed or hung), or when they were left
+        running by an earlier run of this store"""
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', stage = 'queued', progress = 0, started_at = NULL, "
+                "worker_id = NULL, heartbeat_at = NULL "
+                "WHERE status = 'running' AND (worker_id = ? OR heartbeat_at IS NULL OR heartbeat_at < ?)",
+                (self.worker_id, time.time() - lease)
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    def prune(self, older_than: float) -> int:
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(
+                f"DELETE FROM jobs WHERE status IN {FINISHED_STATES} AND finished_at < ?",
+                (time.time() - older_than,)
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+
+class JobQueue:
+    """Persistent priority queue of background jobs processed by a fixed set of workers.
+
+    Higher `priority` runs first, ties run oldest first. Queued jobs can be cancelled
+    outright; running jobs have their task cancelled. Jobs still running at
+    shutdown go back on the queue. Running jobs are heartbeated every third of
+    `lease`, and jobs of a process that stopped heartbeating are requeued once
+    their lease lapses, by whichever process notices first.
+    """
+
+    def __init__(self,
+                 runner: JobRunner,
+                 store: Optional[JobStore] = None,
+                 workers: Optional[int] = None,
+                 retention: Optional[float] = None,
+                 lease: Optional[float] = None,
+                 poll_interval: float = 5.0):
+        self.runner = runner
+        self.store = store or JobStore()
+        self.workers = workers or int(os.getenv("JOB_WORKERS", "4"))
+        self.retention = retention or float(os.getenv("JOB_RETENTION", "86400"))
+        self.lease = lease or float(os.getenv("JOB_LEASE_SECONDS", "60"))
+        self.poll_interval = poll_interval
+        self._worker_tasks: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._cancel_requested = set()
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def started(self) -> bool:
+        return bool(self._worker_tasks)
+
+    async def start(self):
+        if self.started:
+            return
+        self._wakeup = asyncio.Event()
+        requeued = await asyncio.to_thread(self.store.requeue_expired, self.lease)
+        pruned = await asyncio.to_thread(self.store.prune, self.retention)
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._worker_tasks.append(asyncio.create_task(self._heartbeat()))
+        print(f"Job queue started with {self.workers} worker(s); requeued {requeued}, pruned {pruned}")
+
+    async def stop(self):
+        tasks = self._worker_tasks + list(self._running.values())
+        self._worker_tasks = []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Covers jobs whose task was cancelled before it started running
+        await asyncio.to_thread(self.store.requeue_expired, self.lease)
+
+    async def submit(self, kind: str, payload: Dict[str, Any], priority: int = 0) -> Dict[str, Any]:
+        job = await asyncio.to_thread(self.store.insert, kind, payload, priority)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued or running job; returns the job, or None if unknown"""
+        if not await asyncio.to_thread(self.store.cancel_queued, job_id):
+            task = self._running.get(job_id)
+            if task is not None:
+                self._cancel_requested.add(job_id)
+                task.cancel()
+                await asyncio.wait({task})
+        return await self.get(job_id)
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                await asyncio.to_thread(self.store.heartbeat, list(self._running))
+                if await asyncio.to_thread(self.store.requeue_expired, self.lease):
+                    self._wakeup.set()
+            except Exception as e:
+                print(f"Job heartbeat failed: {str(e)}")
+
+    async def _worker(self):
+        while True:
+            job = await asyncio.to_thread(self.store.claim)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            task = asyncio.create_task(self._run(job))
+            self._running[job["id"]] = task
+            try:
+                # asyncio.wait does not propagate the job's own cancellation into the worker
+                await asyncio.wait({task})
+            finally:
+                self._running.pop(job["id"], None)
+
+    async def _run(self, job: Dict[str, Any]):
+        job_id = job["id"]
+
+        async def report(stage: str, progress: float):
+            await asyncio.to_thread(self.store.update, job_id, stage=stage, progress=progress)
+
+        try:
+            result = await self.runner(job["payload"], report)
+            await asyncio.to_thread(
+                self.store.update, job_id,
+                status="succeeded", stage="done", progress=1.0, result=result, finished_at=time.time()
+            )
+        except asyncio.CancelledError:
+            if job_id in self._cancel_requested:
+                self._cancel_requested.discard(job_id)
+                self.store.update(job_id, status="cancelled", stage="cancelled", finished_at=time.time())
+            else:
+                # Shutdown: leave it for the next start
+                self.store.update(job_id, status="queued", stage="queued", progress=0, started_at=None,
+                                  worker_id=None, heartbeat_at=None)
+        except Exception as e:
+            print(f"Job {job_id} failed: {str(e)}")
+            await asyncio.to_thread(
+                self.store.update, job_id,
+                status="failed", stage="failed", error=str(e), finished_at=time.time()
+            )
+
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": len(self._running),
+            "jobs": await asyncio.to_thread(self.store.counts)
+        }
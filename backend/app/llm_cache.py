@@ -0,0 +1,118 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+
+class LLMCache:
+    """Persistent, content-addressed cache of raw LLM generations.
+
+    Entries live in a SQLite file keyed by a hash of everything that determines the
+    model's output. Values are zlib-compressed; once the stored size passes
+    `max_bytes` the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.path = path or os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+        self.max_bytes = max_bytes or int(float(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model: str, temperature: Any, system_message: str, prompt: str) -> str:
+        digest = hashlib.sha256()
+        for part in (model, repr(temperature), system_message, prompt):
+            digest.update(str(part).encode())
+            # Separator so ("ab", "c") and ("a", "bc") hash differently
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS generations (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS generations_last_used ON generations (last_used)")
+            self._total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM generations").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value FROM generations WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE generations SET last_used = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+            self.hits += 1
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def put(self, key: str, value: str, model: str = ""):
+        blob = zlib.compress(value.encode("utf-8"), 6)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT size FROM generations WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO generations (key, model, value, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, blob, len(blob), now, now)
+            )
+            self._total_bytes += len(blob) - (row[0] if row else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict(conn)
+            conn.commit()
+            self.stores += 1
+
+    def _evict(self, conn: sqlite3.Connection):
+        # Trim to 90% so a cache at its limit doesn't evict on every write
+        target = self.max_bytes * 0.9
+        rows = conn.execute("SELECT key, size FROM generations ORDER BY last_used").fetchall()
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            conn.execute("DELETE FROM generations WHERE key = ?", (key,))
+            self._total_bytes -= size
+            self.evictions += 1
+
+    async def aget(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, value: str, model: str = ""):
+        await asyncio.to_thread(self.put, key, value, model)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes
+        }
@@ -1,4 +1,8 @@
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Optional, Tuple
+import asyncio
+import time
+import contextlib
+import tempfile
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 from langchain.schema import SystemMessage, HumanMessage
@@ -7,6 +11,14 @@ import os
 from langchain_anthropic import ChatAnthropic
 import json
 import re
+from .admission import AdmissionController, Overloaded
+from .extraction import extract_page_data
+from .llm_cache import LLMCache
+from .html_summary import summarize_html
+from .prompt_builder import DEFAULT_TOKEN_BUDGET, PromptBuild, assemble_prompt, build_sections, count_tokens
+from .metrics import (
+    CACHE_REQUESTS_TOTAL, GENERATION_STAGE_SECONDS, GENERATIONS_TOTAL, LLM_REQUESTS_IN_FLIGHT, LLM_TOKENS_TOTAL
+)
 
 load_dotenv()
 
@@ -18,210 +30,39 @@ if USE_CLAUDE:
 else:
     llm = ChatOpenAI(model="gpt-4o", temperature=0.1, api_key=USE_GPT)
 
-def extract_visual_context(page) -> Dict[str, Any]:
+llm_cache = LLMCache()
+
+# Cap on concurrent calls to the model provider, independent of browser concurrency.
+# Calls beyond it wait in a bounded queue; past that they are rejected with 429.
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+llm_admission = AdmissionController(
+    "llm",
+    limit=LLM_CONCURRENCY,
+    max_queue=int(os.getenv("LLM_QUEUE_SIZE", "64")),
+    queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", "60")),
+    default_hold=20.0
+)
+
+async def extract_visual_context(page) -> Dict[str, Any]:
     """Extract comprehensive visual context from the page"""
-    visual_context = page.evaluate("""
-        () => {
-            const context = {
-                colors: new Set(),
-                fonts: new Set(),
-                layout: {},
-                elements: [],
-                images: [],
-                links: []
-            };
-            
-            // Extract color palette with better specificity
-            const allElements = document.querySelectorAll('*');
-            allElements.forEach(el => {
-                const styles = window.getComputedStyle(el);
-                const color = styles.color;
-                const bgColor = styles.backgroundColor;
-                const borderColor = styles.borderColor;
-                
-                if (color && color !== 'rgba(0, 0, 0, 0)' && color !== 'rgb(0, 0, 0)') {
-                    context.colors.add(color);
-                }
-                if (bgColor && bgColor !== 'rgba(0, 0, 0, 0)' && bgColor !== 'rgb(255, 255, 255)') {
-                    context.colors.add(bgColor);
-                }
-                if (borderColor && borderColor !== 'rgba(0, 0, 0, 0)') {
-                    context.colors.add(borderColor);
-                }
-            });
-            
-            // Extract fonts with weights and sizes
-            const fontInfo = new Set();
-            allElements.forEach(el => {
-                const styles = window.getComputedStyle(el);
-                const fontFamily = styles.fontFamily;
-                const fontSize = styles.fontSize;
-                const fontWeight = styles.fontWeight;
-                if (fontFamily && fontFamily !== 'inherit') {
-                    fontInfo.add(`${fontFamily}|${fontSize}|${fontWeight}`);
-                }
-            });
-            context.fonts = Array.from(fontInfo);
-            
-            // Extract comprehensive layout information
-            const body = document.body;
-            const bodyStyles = window.getComputedStyle(body);
-            context.layout = {
-                display: bodyStyles.display,
-                flexDirection: bodyStyles.flexDirection,
-                justifyContent: bodyStyles.justifyContent,
-                alignItems: bodyStyles.alignItems,
-                padding: bodyStyles.padding,
-                margin: bodyStyles.margin,
-                backgroundColor: bodyStyles.backgroundColor,
-                width: bodyStyles.width,
-                minHeight: bodyStyles.minHeight,
-                fontFamily: bodyStyles.fontFamily
-            };
-            
-            // Extract images with better details
-            document.querySelectorAll('img').forEach(img => {
-                context.images.push({
-                    src: img.src,
-                    alt: img.alt || '',
-                    width: img.width || img.naturalWidth,
-                    height: img.height || img.naturalHeight,
-                    className: img.className,
-                    id: img.id
-                });
-            });
-            
-            // Extract navigation links
-            document.querySelectorAll('a').forEach(link => {
-                if (link.textContent.trim()) {
-                    context.links.push({
-                        href: link.href,
-                        text: link.textContent.trim(),
-                        className: link.className,
-                        id: link.id
-                    });
-                }
-            });
-            
-            // Extract key structural elements with precise styling
-            const importantSelectors = [
-                'header', 'nav', 'main', 'footer', 'section', 'article', 'aside',
-                'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'div',
-                '.hero', '#hero', '.container', '.wrapper', '.navbar', '.header',
-                '.footer', '.content', '.main', '.sidebar'
-            ];
-            
-            importantSelectors.forEach(selector => {
-                const elements = document.querySelectorAll(selector);
-                elements.forEach((el, index) => {
-                    if (index < 5) { // Limit to prevent overwhelming data
-                        const styles = window.getComputedStyle(el);
-                        const rect = el.getBoundingClientRect();
-                        
-                        context.elements.push({
-                            selector: selector,
-                            tagName: el.tagName,
-                            className: el.className,
-                            id: el.id,
-                            position: {
-                                top: rect.top,
-                                left: rect.left,
-                                width: rect.width,
-                                height: rect.height
-                            },
-                            styles: {
-                                display: styles.display,
-                                position: styles.position,
-                                width: styles.width,
-                                height: styles.height,
-                                padding: styles.padding,
-                                margin: styles.margin,
-                                backgroundColor: styles.backgroundColor,
-                                color: styles.color,
-                                fontSize: styles.fontSize,
-                                fontFamily: styles.fontFamily,
-                                fontWeight: styles.fontWeight,
-                                textAlign: styles.textAlign,
-                                border: styles.border,
-                                borderRadius: styles.borderRadius,
-                                boxShadow: styles.boxShadow,
-                                transform: styles.transform,
-                                opacity: styles.opacity,
-                                zIndex: styles.zIndex,
-                                flexDirection: styles.flexDirection,
-                                justifyContent: styles.justifyContent,
-                                alignItems: styles.alignItems,
-                                gridTemplateColumns: styles.gridTemplateColumns,
-                                gridTemplateRows: styles.gridTemplateRows
-                            },
-                            textContent: el.textContent?.substring(0, 200)
-                        });
-                    }
-                });
-            });
-            
-            return {
-                colors: Array.from(context.colors),
-                fonts: context.fonts,
-                layout: context.layout,
-                elements: context.elements,
-                images: context.images,
-                links: context.links.slice(0, 20) // Limit links
-            };
-        }
-    """)
-    
-    return visual_context
+    extracted = await extract_page_data(
+        page,
+        include_styles=False,
+        include_assets=False,
+        include_dom=False,
+        include_meta=False
+    )
+    return extracted["visual_context"]
 
-def build_enhanced_prompt(context: Dict[str, Any]) -> str:
-    """Build a comprehensive prompt with visual context for better HTML generation"""
-    title = context.get("title", "")
-    meta = context.get("meta_data", {})
-    dom = context.get("dom_structure", {})
-    html_content = context.get("html", "")
-    
-    # Extract visual context
-    visual_context = context.get("visual_context", {})
-    colors = visual_context.get("colors", [])
-    fonts = visual_context.get("fonts", [])
-    layout = visual_context.get("layout", {})
-    key_elements = visual_context.get("elements", [])
-    images = visual_context.get("images", [])
-    links = visual_context.get("links", [])
-    
-    # Clean HTML content and extract key structure
-    html_summary = clean_html_for_analysis(html_content)
-    
-    prompt = f"""
-You are a world-class web designer and front-end developer. Your task is to create a pixel-perfect HTML clone of a website based on the comprehensive design context provided.
+PROMPT_HEADER = """You are a world-class web designer and front-end developer. Your task is to create a pixel-perfect HTML clone of a website based on the comprehensive design context provided.
 
 ## WEBSITE INFORMATION:
 - Title: {title}
-- Meta Description: {meta.get('description', 'N/A')}
-
-## VISUAL DESIGN CONTEXT:
-### Color Palette:
-{json.dumps(colors[:15], indent=2)}
-
-### Typography:
-{json.dumps(fonts[:10], indent=2)}
+- Meta Description: {description}
 
-### Layout Structure:
-{json.dumps(layout, indent=2)}
+## VISUAL DESIGN CONTEXT:"""
 
-### Key Elements (with precise styling):
-{json.dumps(key_elements[:15], indent=2)}
-
-### Images:
-{json.dumps(images[:10], indent=2)}
-
-### Navigation Links:
-{json.dumps(links[:15], indent=2)}
-
-## ORIGINAL HTML STRUCTURE ANALYSIS:
-{html_summary}
-
-## CRITICAL REQUIREMENTS:
+PROMPT_FOOTER = """## CRITICAL REQUIREMENTS:
 
 1. **EXACT VISUAL REPLICATION**: Create HTML that looks identical to the original
 2. **COMPLETE HTML DOCUMENT**: Include <!DOCTYPE html>, <html>, <head>, and <body>
@@ -229,7 +70,7 @@ You are a world-class web designer and front-end developer. Your task is to crea
 4. **RESPONSIVE DESIGN**: Ensure it works on different screen sizes
 5. **SEMANTIC HTML**: Use proper HTML5 semantic elements
 6. **NO JAVASCRIPT**: Static HTML/CSS only
-7. **PLACEHOLDER IMAGES**: Use https://via.placeholder.com for images with appropriate dimensions
+7. **IMAGES**: Use the Downloaded Assets URLs for their images, backgrounds and font stylesheets; https://via.placeholder.com with appropriate dimensions for anything else
 8. **WORKING NAVIGATION**: Include all navigation elements (even if links are placeholder)
 
 ## STYLING GUIDELINES:
@@ -244,40 +85,27 @@ You are a world-class web designer and front-end developer. Your task is to crea
 ## OUTPUT FORMAT:
 Return ONLY the complete, valid HTML document. No explanations, no code blocks, just the raw HTML.
 
-Generate the pixel-perfect HTML clone now:
-"""
-    
-    return prompt
+Generate the pixel-perfect HTML clone now:"""
+
+def build_prompt(context: Dict[str, Any], token_budget: Optional[int] = None) -> PromptBuild:
+    """Assemble the clone prompt within a token budget, most important context first"""
+    meta = context.get("meta_data") or {}
+    header = PROMPT_HEADER.format(
+        title=context.get("title", ""),
+        description=meta.get('description', 'N/A')
+    )
+    sections = build_sections(context, clean_html_for_analysis)
+    return assemble_prompt(header, sections, PROMPT_FOOTER, token_budget or DEFAULT_TOKEN_BUDGET)
+
+def build_enhanced_prompt(context: Dict[str, Any], token_budget: Optional[int] = None) -> str:
+    """Build a comprehensive prompt with visual context for better HTML generation"""
+    return build_prompt(context, token_budget).prompt
 
 def clean_html_for_analysis(html_content: str) -> str:
-    """Clean and summarize HTML content for better analysis"""
-    if not html_content:
-        return ""
-    
-    # Remove script tags and their content
-    html_content = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
-    
-    # Remove style tags (we'll use computed styles instead)
-    html_content = re.sub(r'<style[^>]*>.*?</style>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
-    
-    # Remove comments
-    html_content = re.sub(r'<!--.*?-->', '', html_content, flags=re.DOTALL)
-    
-    # Remove excessive whitespace
-    html_content = re.sub(r'\s+', ' ', html_content)
-    
-    # Truncate if too long but preserve structure
-    if len(html_content) > 3000:
-        html_content = html_content[:3000] + "..."
-    
-    return html_content
+    """Summarize HTML content as a structural outline for better analysis"""
+    return summarize_html(html_content)
 
-def generate_cloned_html(context: Dict[str, Any]) -> str:
-    """Generate enhanced HTML with better visual context and error handling"""
-    try:
-        prompt = build_enhanced_prompt(context)
-        
-        system_message = """You are an expert web designer and front-end developer specializing in:
+SYSTEM_MESSAGE = """You are an expert web designer and front-end developer specializing in:
 - Pixel-perfect website replication
 - Modern CSS techniques (Flexbox, Grid, Custom Properties)
 - Responsive web design
@@ -296,35 +124,290 @@ CRITICAL INSTRUCTIONS:
 
 Your output will be directly used as an HTML file, so it must be complete and functional."""
 
-        # Chain the LLM + output parser
-        chain = (
-            llm
-            | StrOutputParser()
-        )
-
-        # Run the chain with system and human message
-        result = chain.invoke([
-            SystemMessage(content=system_message),
-            HumanMessage(content=prompt)
-        ])
-        
+def _build_messages(context: Dict[str, Any]):
+    """Build the system and human messages for a clone request, plus the prompt build report"""
+    with GENERATION_STAGE_SECONDS.time(stage="prompt_build"):
+        build = build_prompt(context)
+    print(f"Prompt uses {build.tokens}/{build.budget} tokens")
+    return [
+        SystemMessage(content=SYSTEM_MESSAGE),
+        HumanMessage(content=build.prompt)
+    ], build
+
+async def _abuild_messages(context: Dict[str, Any]):
+    """_build_messages off the event loop; summarizing a large page is CPU-bound"""
+    return await asyncio.to_thread(_build_messages, context)
+
+def _model_name() -> str:
+    return getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+
+def _cache_key(messages) -> str:
+    """Content address of a generation: model, temperature, system message and prompt"""
+    return LLMCache.make_key(
+        _model_name(),
+        getattr(llm, "temperature", None),
+        messages[0].content,
+        messages[1].content
+    )
+
+def _record_cache_lookup(use_cache: bool, cached: Optional[str]):
+    result = "bypass" if not use_cache else ("hit" if cached is not None else "miss")
+    CACHE_REQUESTS_TOTAL.inc(cache="llm", result=result)
+
+def _record_generation(prompt_tokens: int, result: str):
+    """Token counts for a generation that actually called the model"""
+    LLM_TOKENS_TOTAL.inc(prompt_tokens, type="prompt")
+    LLM_TOKENS_TOTAL.inc(count_tokens(result), type="completion")
+
+async def _acache_result(cache_key: str, result: str):
+    """Store a generation; a failed write is logged, never allowed to lose the result"""
+    try:
+        await llm_cache.aput(cache_key, result, _model_name())
+    except Exception as e:
+        print(f"LLM cache write failed: {str(e)}")
+
+OUTPUT_PATH = "cloned_site.html"
+
+def _clean_output(result: str) -> str:
+    """Clean and validate raw LLM output"""
+    with GENERATION_STAGE_SECONDS.time(stage="finalize"):
         # Clean the result
         cleaned = clean_llm_output(result)
         
         # Validate HTML structure
         if not validate_html_structure(cleaned):
             print("Warning: Generated HTML may be incomplete")
-        
-        # Save to file
-        with open("cloned_site.html", "w", encoding="utf-8") as f:
+    
+    print(f"Generated HTML clone ({len(cleaned)} characters)")
+    return cleaned
+
+def _save_output(cleaned: str):
+    """Write the latest clone to OUTPUT_PATH. Written to a temporary file and renamed
+    into place, so clones finishing together can't interleave their writes"""
+    directory = os.path.dirname(os.path.abspath(OUTPUT_PATH))
+    fd, tmp_path = tempfile.mkstemp(prefix=".cloned_site-", suffix=".html", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
             f.write(cleaned)
+        os.replace(tmp_path, OUTPUT_PATH)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+async def _afinalize_output(result: str, save: bool = True) -> str:
+    """Clean and validate raw LLM output, saving it from a worker thread. Batch and
+    crawl clones pass save=False: the file only ever holds one page"""
+    cleaned = _clean_output(result)
+    if save:
+        try:
+            await asyncio.to_thread(_save_output, cleaned)
+        except OSError as e:
+            print(f"Could not save {OUTPUT_PATH}: {str(e)}")
+    return cleaned
+
+def generate_cloned_html(context: Dict[str, Any], use_cache: bool = True) -> str:
+    """Blocking wrapper over agenerate_cloned_html for scripts; waits for an LLM slot
+    rather than raising Overloaded. Can't be called from a running event loop."""
+    return asyncio.run(agenerate_cloned_html(context, use_cache=use_cache, patient=True))
+
+async def acomplete(messages, prompt_tokens: int, use_cache: bool = True, patient: bool = False) -> Tuple[str, bool]:
+    """One model call through the generation cache and LLM admission control.
+    Returns the raw output and whether it came from the cache."""
+    cache_key = _cache_key(messages)
+    cached = await llm_cache.aget(cache_key) if use_cache else None
+    _record_cache_lookup(use_cache, cached)
+    if cached is not None:
+        print("LLM cache hit")
+        return cached, True
+
+    chain = (
+        llm
+        | StrOutputParser()
+    )
+
+    async with llm_admission.slot(patient=patient):
+        with LLM_REQUESTS_IN_FLIGHT.track(), GENERATION_STAGE_SECONDS.time(stage="llm"):
+            result = await chain.ainvoke(messages)
+    _record_generation(prompt_tokens, result)
+    await _acache_result(cache_key, result)
+    return result, False
+
+async def agenerate_cloned_html(context: Dict[str, Any], use_cache: bool = True, patient: bool = False,
+                                save_output: bool = True) -> str:
+    """Generate a clone with one model call, without blocking the event loop.
+    Raises Overloaded when the model call can't be admitted; `patient` callers
+    (jobs, batch items) wait for a slot instead. `save_output` also writes the
+    clone to OUTPUT_PATH."""
+    start_time = time.perf_counter()
+    try:
+        messages, build = await _abuild_messages(context)
+        result, cached = await acomplete(messages, build.tokens, use_cache=use_cache, patient=patient)
+        GENERATIONS_TOTAL.inc(outcome="cached" if cached else "success")
+        return await _afinalize_output(result, save=save_output)
         
-        print(f"Generated HTML clone ({len(cleaned)} characters)")
-        return cleaned
-        
+    except Overloaded:
+        raise
     except Exception as e:
         print(f"Error in LLM generation: {str(e)}")
+        GENERATIONS_TOTAL.inc(outcome="error")
         return generate_fallback_html(context, str(e))
+    finally:
+        GENERATION_STAGE_SECONDS.observe(time.perf_counter() - start_time, stage="total")
+
+class StreamingHTMLCleaner:
+    """Applies clean_llm_output to a token stream as it arrives.
+
+    The opening code fence and DOCTYPE check are resolved once enough of the
+    document has arrived; the last few characters are held back in case they turn
+    out to be the closing fence. Emitted text concatenates to exactly
+    clean_llm_output(raw). Required tags are tracked as they stream past.
+    """
+
+    REQUIRED_TAGS = ['<!doctype', '<html', '<head', '<body']
+    # Longest suffix that could still become "\n```"
+    HOLD_BACK = 4
+
+    def __init__(self):
+        self.raw_parts = []
+        self._pending = ""
+        self._started = False
+        self._emitted = []
+        self._scan_tail = ""
+        self.seen_tags = set()
+
+    @property
+    def raw(self) -> str:
+        return "".join(self.raw_parts)
+
+    @property
+    def text(self) -> str:
+        return "".join(self._emitted)
+
+    def _start(self, final: bool) -> bool:
+        text = self._pending.lstrip()
+        # Enough to rule the opening fence in or out, and to see the DOCTYPE behind it
+        if not final and len(text) < len("```html\n"):
+            return False
+        body = re.sub(r"^```html\n?", "", text, flags=re.IGNORECASE).lstrip()
+        if not final and len(body) < len("<!doctype"):
+            return False
+        if not body.lower().startswith('<!doctype'):
+            body = '<!DOCTYPE html>\n' + body
+        self._pending = body
+        self._started = True
+        return True
+
+    def _emit(self, text: str) -> str:
+        if text:
+            self._emitted.append(text)
+            # Overlap with the previous chunk so tags split across chunks are found
+            window = (self._scan_tail + text).lower()
+            for tag in self.REQUIRED_TAGS:
+                if tag in window:
+                    self.seen_tags.add(tag)
+            self._scan_tail = window[-len('<!doctype'):]
+        return text
+
+    def feed(self, chunk: str) -> str:
+        """Add a raw chunk; returns the cleaned text that is now safe to emit"""
+        self.raw_parts.append(chunk)
+        self._pending += chunk
+        if not self._started and not self._start(final=False):
+            return ""
+        split = len(self._pending.rstrip()) - self.HOLD_BACK
+        # Never end on whitespace: clean_llm_output may strip it once the fence is gone
+        split = len(self._pending[:max(split, 0)].rstrip())
+        if split <= 0:
+            return ""
+        out, self._pending = self._pending[:split], self._pending[split:]
+        return self._emit(out)
+
+    def finish(self) -> str:
+        """Flush the held-back tail once the stream has ended"""
+        if not self._started:
+            self._start(final=True)
+        tail = re.sub(r"\n?```$", "", self._pending.rstrip()).rstrip()
+        self._pending = ""
+        return self._emit(tail)
+
+    def is_valid(self) -> bool:
+        return len(self.seen_tags) == len(self.REQUIRED_TAGS)
+
+async def _replay(text: str) -> AsyncIterator[str]:
+    yield text
+
+async def astream_cloned_html(context: Dict[str, Any], use_cache: bool = True) -> AsyncIterator[Dict[str, Any]]:
+    """Stream a clone as events: `chunk` (cleaned HTML), `validation` when new
+    required tags appear, then `done` once the artifact has been saved.
+    Errors are reported as an `error` event carrying the fallback HTML, or a
+    429 status and retry_after if the model call was rejected as overloaded."""
+    start_time = time.time()
+    cleaner = StreamingHTMLCleaner()
+    try:
+        messages, prompt_build = await _abuild_messages(context)
+        cache_key = _cache_key(messages)
+        cached = await llm_cache.aget(cache_key) if use_cache else None
+        _record_cache_lookup(use_cache, cached)
+
+        if cached is not None:
+            print("LLM cache hit")
+            source = _replay(cached)
+        else:
+            chain = (
+                llm
+                | StrOutputParser()
+            )
+            source = chain.astream(messages)
+
+        seen = 0
+        first_chunk_at: Optional[float] = None
+        llm_start = time.perf_counter()
+        async with (llm_admission.slot() if cached is None else contextlib.nullcontext()):
+            with (LLM_REQUESTS_IN_FLIGHT.track() if cached is None else contextlib.nullcontext()):
+                async for chunk in source:
+                    text = cleaner.feed(chunk)
+                    if text:
+                        if first_chunk_at is None:
+                            first_chunk_at = time.time()
+                        yield {"event": "chunk", "data": {"html": text}}
+                    if len(cleaner.seen_tags) > seen:
+                        seen = len(cleaner.seen_tags)
+                        yield {"event": "validation", "data": {"seen": sorted(cleaner.seen_tags), "valid": cleaner.is_valid()}}
+
+        tail = cleaner.finish()
+        if tail:
+            yield {"event": "chunk", "data": {"html": tail}}
+
+        raw = cleaner.raw
+        if cached is None:
+            GENERATION_STAGE_SECONDS.observe(time.perf_counter() - llm_start, stage="llm")
+            _record_generation(prompt_build.tokens, raw)
+            await _acache_result(cache_key, raw)
+        GENERATIONS_TOTAL.inc(outcome="cached" if cached is not None else "success")
+        cleaned = await _afinalize_output(raw)
+        GENERATION_STAGE_SECONDS.observe(time.time() - start_time, stage="total")
+
+        yield {"event": "done", "data": {
+            "status": "success",
+            "cached": cached is not None,
+            "valid": validate_html_structure(cleaned),
+            "length": len(cleaned),
+            "prompt_tokens": prompt_build.tokens,
+            "time_to_first_chunk": (first_chunk_at - start_time) if first_chunk_at else None,
+            "processing_time": time.time() - start_time
+        }}
+
+    except Overloaded as e:
+        print(f"LLM streaming generation rejected: {e.detail}")
+        yield {"event": "error", "data": {"detail": e.detail, "status": 429, "retry_after": e.retry_after}}
+    except Exception as e:
+        print(f"Error in LLM streaming generation: {str(e)}")
+        GENERATIONS_TOTAL.inc(outcome="error")
+        yield {"event": "error", "data": {
+            "detail": str(e),
+            "fallback_html": generate_fallback_html(context, str(e))
+        }}
 
 def clean_llm_output(result: str) -> str:
     """Clean and validate LLM output"""
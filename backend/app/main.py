@@ -13,24 +13,46 @@
 #     uvicorn.run(app, host="0.0.0.0", port=8000)
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 import playwright
-from pydantic import BaseModel, HttpUrl
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, HttpUrl, ValidationError
+from typing import Optional, List, Dict, Any, AsyncIterator, Literal
+from contextlib import asynccontextmanager
+import asyncio
 import base64
 from urllib.parse import urljoin, urlparse
 import time
 import os
 from datetime import datetime
 import json
-from .llm_workflow_updated import generate_cloned_html, extract_visual_context
+from .llm_workflow_updated import agenerate_cloned_html, astream_cloned_html, llm_admission, llm_cache, LLM_CONCURRENCY
+from .sectioned_generation import agenerate_sectioned_html, agenerate_site_html, astream_sectioned_html, region_store
+from .crawler import crawl
+from .admission import AdmissionController, Overloaded
+from .host_scheduler import HostScheduler, host_key, parse_retry_after
+from .extraction import extract_page_data
+from .snapshot_extraction import extract_page_data_with_snapshot
+from .readiness import NetworkTracker, wait_for_page_ready
+from .scrape_cache import CachePolicy, ScrapeCache, scrape_cache_key
+from .jobs import JobQueue
+from .asset_store import AssetStore
+from .blob_store import BlobStore
+from .screenshots import CONTENT_TYPES, capture_screenshot
+from .request_filter import RequestFilter
+from .responses import fast_json_response
+from .metrics import (
+    REGISTRY, CONTENT_TYPE as METRICS_CONTENT_TYPE, HTTP_REQUESTS_IN_FLIGHT, HTTP_REQUEST_SECONDS,
+    SCRAPE_STAGE_SECONDS, SCRAPES_TOTAL, SCRAPES_IN_FLIGHT, NAVIGATION_RETRIES_TOTAL,
+    CACHE_REQUESTS_TOTAL, BROWSER_POOL_SLOTS, BROWSER_MEMORY_MB
+)
 
 # For cloud browser solutions
 import requests
-from playwright.sync_api import Playwright, sync_playwright
-from browserbase import Browserbase
+from playwright.async_api import BrowserContext
+from .browser_pool import BrowserPool
+from .browserbase_pool import BrowserbaseSessionPool, BrowserbaseSessionProvider, LocalCDPSessionProvider
 from fastapi import Body
 
 
@@ -47,7 +69,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def track_http_metrics(request: Request, call_next):
+    """In-flight count and latency per route template (until headers are sent, for streams)"""
+    start = time.perf_counter()
+    status = 500
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status)
+        )
+
 # Pydantic Models
+
+# ScrapingResult parts that can be requested with `fields`; url, status and
+# processing_time are always returned
+ScrapeField = Literal[
+    "title", "html", "screenshot", "screenshot_url", "screenshot_info", "styles", "assets",
+    "meta_data", "dom_structure", "visual_context", "readiness", "request_filter"
+]
+ALWAYS_RETURNED_FIELDS = ("url", "status", "processing_time")
+
+# "single": one model call for the whole page. "sectioned": a shared stylesheet, then
+# landmark regions generated concurrently and stitched together
+GenerationMode = Literal["single", "sectioned"]
+
+# "standard" skips ads, analytics and media, and "light" raster images as well.
+# Plain scrapes block nothing unless asked; clone paths use CLONE_BLOCK_MODE, since
+# a clone only needs layout, styles and the asset URLs
+BlockMode = Literal["off", "standard", "light"]
+CLONE_BLOCK_MODE: BlockMode = "standard"
+
 class ScrapingRequest(BaseModel):
     url: HttpUrl
     include_screenshot: bool = True
@@ -58,17 +119,46 @@ class ScrapingRequest(BaseModel):
     viewport_width: int = 1920
     viewport_height: int = 1080
     wait_for_load: bool = True
+    # Hard cap (seconds) on waiting for the page to settle when wait_for_load is set;
+    # never slower than the fixed 3-second wait it replaced
+    readiness_timeout: float = 3.0
+    # "script" walks the DOM in-page; "snapshot" uses CDP DOMSnapshot (Chromium only)
+    extraction_engine: Literal["script", "snapshot"] = "script"
+    # "compact" returns dom_structure as flat parallel arrays (see compact_dom.CompactDOM)
+    dom_format: Literal["tree", "compact"] = "tree"
+    screenshot_format: Literal["png", "jpeg", "webp"] = "jpeg"
+    screenshot_quality: int = 80
+    # Downscale so neither side of the screenshot exceeds this many pixels
+    screenshot_max_dimension: Optional[int] = 8000
+    # "url" stores the image and returns screenshot_url; "inline" embeds base64 in `screenshot`
+    screenshot_mode: Literal["url", "inline"] = "url"
+    # Resource blocking (see BlockMode); clone endpoints default to CLONE_BLOCK_MODE
+    block_mode: BlockMode = "off"
+    # Extra Playwright resource types and domains to block
+    block_resource_types: List[str] = []
+    block_domains: List[str] = []
+    # Download listed assets into the asset store and add hash/local_url to each
+    download_assets: bool = False
+    # Only extract and return these result fields (None returns everything)
+    fields: Optional[List[ScrapeField]] = None
+
+    def wants(self, *names: str) -> bool:
+        return self.fields is None or any(name in self.fields for name in names)
 
 class ScrapingResult(BaseModel):
     url: str
     title: str
     html: str
     screenshot: Optional[str] = None
+    screenshot_url: Optional[str] = None
+    screenshot_info: Optional[Dict[str, Any]] = None
     styles: List[Dict[str, Any]] = []
     assets: List[Dict[str, Any]] = []
     meta_data: Dict[str, Any] = {}
     dom_structure: Optional[Dict[str, Any]] = None
     visual_context: Optional[Dict[str, Any]] = None
+    readiness: Optional[Dict[str, Any]] = None
+    request_filter: Optional[Dict[str, Any]] = None
     status: str
     processing_time: float
 
@@ -76,39 +166,204 @@ class CloneRequest(BaseModel):
     url: Optional[HttpUrl] = None
     context: Optional[Dict[str, Any]] = None
     enhance_quality: bool = True
+    # Skip the LLM generation cache and always call the model
+    bypass_cache: bool = False
+    # None uses GENERATION_MODE
+    generation_mode: Optional[GenerationMode] = None
+    # Store the page's assets locally so the clone references stable /assets URLs
+    download_assets: bool = True
 
 class CloneResponse(BaseModel):
     cloned_html: str
     status: str
     processing_time: float
 
+class BatchCloneRequest(BaseModel):
+    urls: List[HttpUrl]
+    # ScrapingRequest fields (other than url) applied to every URL
+    options: Dict[str, Any] = {}
+    bypass_cache: bool = False
+    generation_mode: Optional[GenerationMode] = None
+    stream_format: Literal["ndjson", "sse"] = "ndjson"
+
+class CrawlCloneRequest(BaseModel):
+    url: HttpUrl
+    # None uses CRAWL_MAX_DEPTH / CRAWL_MAX_PAGES; CRAWL_MAX_PAGES also caps max_pages
+    max_depth: Optional[int] = None
+    max_pages: Optional[int] = None
+    # ScrapingRequest fields (other than url) applied to every page
+    options: Dict[str, Any] = {}
+    bypass_cache: bool = False
+    stream_format: Literal["ndjson", "sse"] = "ndjson"
+
+class CloneJobRequest(ScrapingRequest):
+    # Higher runs first
+    priority: int = 0
+    bypass_cache: bool = False
+    generation_mode: Optional[GenerationMode] = None
+    download_assets: bool = True
+    block_mode: BlockMode = CLONE_BLOCK_MODE
+
 load_dotenv()
 
+# Navigation attempts per scrape; failed and throttled attempts are retried after
+# the host's backoff
+NAVIGATION_ATTEMPTS = 3
+
+
+class RetryNavigation(Exception):
+    """A navigation failed or was throttled and the host has been backed off; the
+    scrape gives its page and browser slot back and tries again after the backoff"""
+
+
 class WebsiteScraper:
     def __init__(self):
         self.browserbase_api_key = os.getenv("BROWSERBASE_API_KEY")
         self.browserbase_project_id = os.getenv("BROWSERBASE_PROJECT_ID")
-        self.use_cloud_browser = bool(self.browserbase_api_key and self.browserbase_project_id)
+        # Serve local Chromium CDP endpoints through the session pool, for offline testing
+        self.use_local_cdp = os.getenv("BROWSERBASE_LOCAL_CDP", "").lower() in ("1", "true", "yes")
+        self.use_cloud_browser = bool(self.browserbase_api_key and self.browserbase_project_id) or self.use_local_cdp
+        self.browser_pool = BrowserPool()
+        self.session_pool = None
+        if self.use_local_cdp:
+            self.session_pool = BrowserbaseSessionPool(LocalCDPSessionProvider())
+        elif self.use_cloud_browser:
+            max_age = float(os.getenv("BROWSERBASE_SESSION_MAX_AGE", "600"))
+            self.session_pool = BrowserbaseSessionPool(
+                BrowserbaseSessionProvider(
+                    self.browserbase_api_key,
+                    self.browserbase_project_id,
+                    # Let Browserbase reap sessions shortly after we would have rotated them
+                    session_timeout=int(max_age) + 60
+                ),
+                max_age=max_age
+            )
+        # Cap on in-flight scrapes; up to SCRAPE_QUEUE_SIZE more wait (at most
+        # SCRAPE_QUEUE_TIMEOUT seconds) and anything beyond that is rejected with 429.
+        # It never exceeds what the browser backend can hold open, so admitted scrapes
+        # don't queue again inside the pool where no 429 reaches the client;
+        # MAX_CONCURRENT_SCRAPES can only lower it
+        capacity = self._browser_capacity()
+        self.max_concurrent_scrapes = min(int(os.getenv("MAX_CONCURRENT_SCRAPES", str(capacity))), capacity)
+        self.admission = AdmissionController(
+            "browser",
+            limit=self.max_concurrent_scrapes,
+            max_queue=int(os.getenv("SCRAPE_QUEUE_SIZE", "64")),
+            queue_timeout=float(os.getenv("SCRAPE_QUEUE_TIMEOUT", "30"))
+        )
+        # Crawls hold a browser context (and its admission slot) for their whole run,
+        # so only a few run at once; kept below the browser limit so their pages,
+        # which take slots of their own, can always get one
+        self.crawl_admission = AdmissionController(
+            "crawl",
+            limit=max(1, min(int(os.getenv("MAX_CONCURRENT_CRAWLS", "2")), self.admission.limit - 1)),
+            max_queue=int(os.getenv("CRAWL_QUEUE_SIZE", "4")),
+            queue_timeout=self.admission.queue_timeout
+        )
+        # Per-target-host concurrency, rate limit and backoff, applied before the browser queue
+        self.host_scheduler = HostScheduler(
+            max_per_host=int(os.getenv("HOST_MAX_CONCURRENCY", "4")),
+            rate=float(os.getenv("HOST_RATE_LIMIT", "2")),
+            burst=float(os.getenv("HOST_BURST", "4")),
+            backoff_base=float(os.getenv("HOST_BACKOFF_BASE", "1")),
+            backoff_max=float(os.getenv("HOST_BACKOFF_MAX", "30")),
+            queue_timeout=self.admission.queue_timeout
+        )
+        self.scrape_cache = ScrapeCache()
+        self.blob_store = BlobStore()
+        self.public_base_url = os.getenv("PUBLIC_BASE_URL", "").rstrip("/")
+        self.asset_store = AssetStore(self.blob_store, self.public_base_url)
         print(f"Using cloud browser: {self.use_cloud_browser}")
         
-    def scrape_website(self, request: ScrapingRequest) -> ScrapingResult:
+    def _browser_capacity(self) -> int:
+        """Scrapes the browser backend can run at once"""
+        if self.session_pool is not None:
+            # Each scrape leases a whole session
+            return self.session_pool.size
+        return self.browser_pool.capacity
+
+    async def scrape_website(self, request: ScrapingRequest,
+                             cache_policy: Optional[CachePolicy] = None,
+                             patient: bool = False,
+                             browser_context: Optional[BrowserContext] = None) -> ScrapingResult:
+        """Scrape a page, or serve it from the cache. Raises Overloaded when no browser
+        slot can be had; `patient` callers (jobs, batch items) wait for one instead.
+        With `browser_context` (see crawl_context) the page opens in that context;
+        it still takes a browser slot of its own while open."""
         start_time = time.time()
+        cache_policy = cache_policy or CachePolicy()
+        cache_key = scrape_cache_key(request)
+        
+        # Serve repeat scrapes from the cache without touching a browser
+        if cache_policy.read:
+            cached = await self.scrape_cache.get(cache_key, max_age=cache_policy.max_age)
+            # Screenshot and asset URLs in the entry must still resolve
+            if cached is not None and not await self.blob_store.ahas_all(_blob_hashes(cached[0])):
+                print(f"Scrape cache entry for {request.url} refers to evicted blobs, scraping again")
+                cached = None
+            if cached is not None:
+                data, age = cached
+                cache_policy.outcome = "HIT"
+                cache_policy.age = age
+                result = ScrapingResult(**data)
+                result.processing_time = time.time() - start_time
+                CACHE_REQUESTS_TOTAL.inc(cache="scrape", result="hit")
+                print(f"Scrape cache hit for {request.url} (age {age:.0f}s)")
+                return result
+            cache_policy.outcome = "MISS"
+        CACHE_REQUESTS_TOTAL.inc(cache="scrape", result=cache_policy.outcome.lower())
         
         try:
-            if self.use_cloud_browser:
-                with sync_playwright() as playwright:
-                    result = self._scrape_with_browserbase(request, playwright)
-            else:
-                result = self._scrape_with_playwright(request)
+            # Wait for the target host (concurrency cap, rate limit, backoff) before
+            # taking a browser slot, so one busy host can't tie up the browsers. Retries
+            # come back through here too, so backoff is never waited out holding a slot
+            host_wait_start = time.perf_counter()
+            async with self.host_scheduler.slot(str(request.url), patient=patient) as host:
+                for attempt in range(NAVIGATION_ATTEMPTS):
+                    await self.host_scheduler.pace(host)
+                    SCRAPE_STAGE_SECONDS.observe(time.perf_counter() - host_wait_start, stage="host_wait")
+                    with SCRAPE_STAGE_SECONDS.time(stage="queue"):
+                        await self.admission.acquire(patient=patient)
+                    held_since = time.monotonic()
+                    try:
+                        with SCRAPES_IN_FLIGHT.track():
+                            result = await self._scrape_once(
+                                request, browser_context, last_attempt=attempt == NAVIGATION_ATTEMPTS - 1
+                            )
+                    except RetryNavigation:
+                        host_wait_start = time.perf_counter()
+                        continue
+                    finally:
+                        self.admission.release(time.monotonic() - held_since)
+                    break
+            
+            # Assets come from many hosts and need no browser, so fetch them after
+            # both slots are given back
+            if request.download_assets and result.assets:
+                with SCRAPE_STAGE_SECONDS.time(stage="assets"):
+                    result.assets = await self.asset_store.fetch_all(result.assets)
             
             processing_time = time.time() - start_time
             result.processing_time = processing_time
             result.status = "success"
+            SCRAPE_STAGE_SECONDS.observe(processing_time, stage="total")
+            SCRAPES_TOTAL.inc(outcome="success")
+            
+            if cache_policy.write:
+                # A failed cache write must not turn a good scrape into an error
+                try:
+                    await self.scrape_cache.put(cache_key, result.model_dump(mode="json"), ttl=cache_policy.ttl)
+                except Exception as e:
+                    print(f"Scrape cache write failed: {str(e)}")
             
             return result
             
+        except Overloaded:
+            SCRAPES_TOTAL.inc(outcome="rejected")
+            raise
         except Exception as e:
             processing_time = time.time() - start_time
+            SCRAPES_TOTAL.inc(outcome="error")
             print(f"Scraping error: {str(e)}")
             return ScrapingResult(
                 url=str(request.url),
@@ -118,423 +373,286 @@ class WebsiteScraper:
                 processing_time=processing_time
             )
 
-    def _scrape_with_browserbase(self, request: ScrapingRequest, playwright: Playwright) -> ScrapingResult:
-        """Use Browserbase cloud browser service with official SDK"""
-        
-        # Initialize Browserbase client
-        bb = Browserbase(api_key=self.browserbase_api_key)
+    @asynccontextmanager
+    async def crawl_context(self, request: ScrapingRequest) -> AsyncIterator[BrowserContext]:
+        """Lease one BrowserContext for a whole crawl, so the HTTP cache and cookies
+        carry over from page to page. The crawl takes a crawl slot and a browser
+        admission slot for the context, so crawls can't drain the pools behind
+        admission's back; each page opened in it also takes a browser slot in
+        scrape_website, so MAX_CONCURRENT_SCRAPES still bounds open pages."""
+        async with self.crawl_admission.slot():
+            await self.admission.acquire()
+            try:
+                acquire_start = time.perf_counter()
+                if self.use_cloud_browser:
+                    leased = self.session_pool.context()
+                else:
+                    leased = self.browser_pool.context(
+                        viewport={'width': request.viewport_width, 'height': request.viewport_height}
+                    )
+                async with leased as context:
+                    SCRAPE_STAGE_SECONDS.observe(time.perf_counter() - acquire_start, stage="browser_acquire")
+                    yield context
+            finally:
+                # No hold time: a crawl's would skew the Retry-After estimate for single scrapes
+                self.admission.release()
+
+    async def _scrape_once(self, request: ScrapingRequest, browser_context: Optional[BrowserContext],
+                           last_attempt: bool) -> ScrapingResult:
+        if browser_context is not None:
+            return await self._scrape_in_context(request, browser_context, keep_http_cache=True,
+                                                 last_attempt=last_attempt)
+        if self.use_cloud_browser:
+            return await self._scrape_with_browserbase(request, last_attempt)
+        return await self._scrape_with_playwright(request, last_attempt)
+
+    async def _scrape_with_browserbase(self, request: ScrapingRequest, last_attempt: bool = True) -> ScrapingResult:
+        """Use a pooled, keep-alive Browserbase session"""
+        try:
+            acquire_start = time.perf_counter()
+            async with self.session_pool.context() as context:
+                SCRAPE_STAGE_SECONDS.observe(time.perf_counter() - acquire_start, stage="browser_acquire")
+                return await self._scrape_in_context(request, context, last_attempt=last_attempt)
+        except RetryNavigation:
+            raise
+        except Exception as e:
+            print(f"Error in Browserbase scraping: {str(e)}")
+            raise e
+
+    async def _scrape_with_playwright(self, request: ScrapingRequest, last_attempt: bool = True) -> ScrapingResult:
+        """Use a pooled local Playwright browser with enhanced error handling"""
+        acquire_start = time.perf_counter()
+        async with self.browser_pool.context(
+            viewport={
+                'width': request.viewport_width,
+                'height': request.viewport_height
+            }
+        ) as context:
+            SCRAPE_STAGE_SECONDS.observe(time.perf_counter() - acquire_start, stage="browser_acquire")
+            return await self._scrape_in_context(request, context, last_attempt=last_attempt)
+
+    async def _scrape_in_context(self, request: ScrapingRequest, context: BrowserContext,
+                                 keep_http_cache: bool = False, last_attempt: bool = True) -> ScrapingResult:
+        """Scrape in a context leased from the browser or session pool. With
+        `keep_http_cache` requests are blocked through CDP rather than page.route,
+        which would turn the context's HTTP cache off for the page. Unless this is
+        the `last_attempt`, a failed or throttled navigation raises RetryNavigation."""
+        page = await context.new_page()
+        tracker = NetworkTracker(page)
+        readiness = None
+        request_filter = None
         
         try:
-            # Create a session
-            session = bb.sessions.create(
-                project_id=self.browserbase_project_id
-            )
-            
-            print("Session replay URL:", f"https://browserbase.com/sessions/{session.id}")
-            
-            # Connect to the remote session
-            chromium = playwright.chromium
-            browser = chromium.connect_over_cdp(session.connect_url)
-            context = browser.contexts[0]
-            page = context.pages[0]
+            if request.block_mode != "off":
+                request_filter = RequestFilter(
+                    request.block_mode,
+                    resource_types=request.block_resource_types,
+                    domains=request.block_domains
+                )
+                if keep_http_cache:
+                    await request_filter.attach_cdp(page)
+                else:
+                    await request_filter.attach(page)
             
-            # Set viewport
-            page.set_viewport_size({
+            # Pooled Browserbase sessions share one context, so size the page itself
+            await page.set_viewport_size({
                 'width': request.viewport_width,
                 'height': request.viewport_height
             })
-                
-            try:
-                # Navigate to URL with better error handling
-                print(f"Navigating to: {request.url}")
-                page.goto(str(request.url), 
-                         timeout=request.timeout * 1000,
-                         wait_until="domcontentloaded")
-                
-                # Wait for page to stabilize
-                if request.wait_for_load:
-                    page.wait_for_timeout(3000)  # Wait 3 seconds for dynamic content
-                
-                # Extract data
-                title = page.title()
-                html = page.content()
-                
-                print(f"Page loaded successfully. Title: {title}")
-                
-                # Screenshot
-                screenshot = None
-                if request.include_screenshot:
-                    try:
-                        screenshot_bytes = page.screenshot(full_page=True)
-                        screenshot = base64.b64encode(screenshot_bytes).decode()
-                        print("Screenshot captured")
-                    except Exception as e:
-                        print(f"Screenshot failed: {str(e)}")
-                
-                # Styles
-                styles = []
-                if request.include_styles:
-                    styles = self._extract_styles(page)
-                    print(f"Extracted {len(styles)} stylesheets")
-                
-                # Assets
-                assets = []
-                if request.include_assets:
-                    assets = self._extract_assets(page, str(request.url))
-                    print(f"Extracted {len(assets)} assets")
-                
-                # DOM structure
-                dom_structure = None
-                if request.include_dom:
-                    dom_structure = self._extract_dom_structure(page)
-                    print("DOM structure extracted")
-                
-                # Meta data and visual context
-                meta_data = self._extract_meta_data(page)
-                visual_context = None
-                
+            
+            # Failures and 429/503 answers back the host off (exponential with jitter,
+            # or the site's Retry-After); scrape_website waits that out and retries
+            print(f"Navigating to: {request.url}")
+            host = host_key(str(request.url))
+            with SCRAPE_STAGE_SECONDS.time(stage="navigate"):
                 try:
-                    visual_context = extract_visual_context(page)
-                    print("Visual context extracted")
+                    response = await page.goto(str(request.url), 
+                                              timeout=request.timeout * 1000,
+                                              wait_until="domcontentloaded")
                 except Exception as e:
-                    print(f"Visual context extraction failed: {str(e)}")
-                
-            finally:
-                # Clean up: close browser connection
-                try:
-                    page.close()
-                    browser.close()
-                    print(f"Closed browser for session: {session.id}")
-                except Exception as cleanup_error:
-                    print(f"Cleanup warning: {cleanup_error}")
-                
-        except Exception as e:
-            print(f"Error in Browserbase scraping: {str(e)}")
-            raise e
-        
-        return ScrapingResult(
-            url=str(request.url),
-            title=title,
-            html=html,
-            screenshot=screenshot,
-            styles=styles,
-            assets=assets,
-            meta_data=meta_data,
-            dom_structure=dom_structure,
-            visual_context=visual_context,
-            status="success",
-            processing_time=0  # Will be set by caller
-        )
-
-    def _scrape_with_playwright(self, request: ScrapingRequest) -> ScrapingResult:
-        """Use local Playwright browser with enhanced error handling"""
-        with sync_playwright() as p:
-            browser = p.chromium.launch(
-                headless=True,
-                args=[
-                    '--no-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-gpu',
-                    '--disable-web-security',
-                    '--disable-features=VizDisplayCompositor',
-                    '--disable-blink-features=AutomationControlled'
-                ]
-            )
+                    delay = self.host_scheduler.record_failure(host)
+                    if last_attempt:
+                        raise e
+                    NAVIGATION_RETRIES_TOTAL.inc()
+                    print(f"Navigation failed, retrying in {delay:.1f}s: {str(e)}")
+                    raise RetryNavigation(str(e))
+                if response is not None and response.status in (429, 503) and not last_attempt:
+                    delay = self.host_scheduler.record_failure(
+                        host, parse_retry_after(response.headers.get("retry-after"))
+                    )
+                    NAVIGATION_RETRIES_TOTAL.inc()
+                    print(f"{host} answered {response.status}, retrying in {delay:.1f}s...")
+                    raise RetryNavigation(f"HTTP {response.status}")
+                if response is None or response.status < 400:
+                    self.host_scheduler.record_success(host)
             
-            context = browser.new_context(
-                viewport={
-                    'width': request.viewport_width,
-                    'height': request.viewport_height
-                },
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            )
+            # Wait for page to stabilize
+            if request.wait_for_load:
+                with SCRAPE_STAGE_SECONDS.time(stage="readiness"):
+                    readiness = await wait_for_page_ready(page, tracker, timeout=request.readiness_timeout)
+                print(f"Page ready via {readiness['signal']} after {readiness['elapsed_ms']}ms")
             
-            page = context.new_page()
+            # Extract data
+            with SCRAPE_STAGE_SECONDS.time(stage="content"):
+                title = await page.title() if request.wants("title") else ""
+                html = await page.content() if request.wants("html") else ""
             
-            try:
-                # Navigate with retry logic
-                print(f"Navigating to: {request.url}")
-                for attempt in range(3):
-                    try:
-                        page.goto(str(request.url), 
-                                 timeout=request.timeout * 1000,
-                                 wait_until="domcontentloaded")
-                        break
-                    except Exception as e:
-                        if attempt == 2:
-                            raise e
-                        print(f"Navigation attempt {attempt + 1} failed, retrying...")
-                        time.sleep(2)
-                
-                # Wait for page to stabilize
-                if request.wait_for_load:
-                    page.wait_for_timeout(3000)
-                
-                # Extract data
-                title = page.title()
-                html = page.content()
-                
-                print(f"Page loaded successfully. Title: {title}")
-                
-                # Screenshot
-                screenshot = None
-                if request.include_screenshot:
+            print(f"Page loaded successfully. Title: {title}")
+            
+            # Screenshot
+            screenshot = None
+            screenshot_url = None
+            screenshot_info = None
+            if request.include_screenshot and request.wants("screenshot", "screenshot_url", "screenshot_info"):
+                with SCRAPE_STAGE_SECONDS.time(stage="screenshot"):
                     try:
-                        screenshot_bytes = page.screenshot(full_page=True)
-                        screenshot = base64.b64encode(screenshot_bytes).decode()
-                        print("Screenshot captured")
+                        screenshot_bytes, screenshot_info = await capture_screenshot(
+                            page,
+                            image_format=request.screenshot_format,
+                            quality=request.screenshot_quality,
+                            max_dimension=request.screenshot_max_dimension
+                        )
+                        if request.screenshot_mode == "inline":
+                            screenshot = base64.b64encode(screenshot_bytes).decode()
+                        else:
+                            digest = await self.blob_store.aput(
+                                screenshot_bytes, CONTENT_TYPES[screenshot_info["format"]]
+                            )
+                            screenshot_info["hash"] = digest
+                            screenshot_url = f"{self.public_base_url}/screenshots/{digest}"
+                        print(f"Screenshot captured ({screenshot_info['bytes']} bytes {screenshot_info['format']})")
                     except Exception as e:
                         print(f"Screenshot failed: {str(e)}")
-                
-                # Styles
-                styles = []
-                if request.include_styles:
-                    styles = self._extract_styles(page)
-                    print(f"Extracted {len(styles)} stylesheets")
-                
-                # Assets
-                assets = []
-                if request.include_assets:
-                    assets = self._extract_assets(page, str(request.url))
-                    print(f"Extracted {len(assets)} assets")
-                
-                # DOM structure
-                dom_structure = None
-                if request.include_dom:
-                    dom_structure = self._extract_dom_structure(page)
-                    print("DOM structure extracted")
-                
-                # Meta data and visual context
-                meta_data = self._extract_meta_data(page)
-                visual_context = None
-                
-                try:
-                    visual_context = extract_visual_context(page)
-                    print("Visual context extracted")
-                except Exception as e:
-                    print(f"Visual context extraction failed: {str(e)}")
-                
-            finally:
-                browser.close()
+            
+            # Styles, assets, DOM structure, meta data and visual context in one pass
+            extract = extract_page_data_with_snapshot if request.extraction_engine == "snapshot" \
+                else extract_page_data
+            with SCRAPE_STAGE_SECONDS.time(stage="extract"):
+                extracted = await extract(
+                    page,
+                    include_styles=request.include_styles and request.wants("styles"),
+                    include_assets=request.include_assets and request.wants("assets"),
+                    include_dom=request.include_dom and request.wants("dom_structure"),
+                    include_visual=request.wants("visual_context"),
+                    include_meta=request.wants("meta_data"),
+                    dom_format=request.dom_format
+                )
+            styles = extracted["styles"]
+            assets = extracted["assets"]
+            dom_structure = extracted["dom_structure"]
+            meta_data = extracted["meta_data"]
+            visual_context = extracted["visual_context"]
+            print(f"Extracted {len(styles)} stylesheets, {len(assets)} assets"
+                  f"{', DOM structure' if dom_structure else ''}"
+                  f"{', visual context' if visual_context else ''}")
+            
+        finally:
+            await page.close()
         
         return ScrapingResult(
             url=str(request.url),
             title=title,
             html=html,
             screenshot=screenshot,
+            screenshot_url=screenshot_url,
+            screenshot_info=screenshot_info,
             styles=styles,
             assets=assets,
             meta_data=meta_data,
             dom_structure=dom_structure,
             visual_context=visual_context,
+            readiness=readiness,
+            request_filter=request_filter.report() if request_filter else None,
             status="success",
             processing_time=0
         )
 
-    def _extract_styles(self, page) -> List[Dict[str, Any]]:
-        """Extract CSS styles from the page with better error handling"""
-        try:
-            stylesheets = page.evaluate("""
-                () => {
-                    const sheets = [];
-                    for (let sheet of document.styleSheets) {
-                        try {
-                            if (sheet.href) {
-                                sheets.push({
-                                    type: 'external',
-                                    href: sheet.href,
-                                    rules: sheet.cssRules ? sheet.cssRules.length : 0
-                                });
-                            } else {
-                                const content = sheet.ownerNode ? sheet.ownerNode.textContent : '';
-                                if (content.trim()) {
-                                    sheets.push({
-                                        type: 'inline',
-                                        content: content.substring(0, 5000), // Limit size
-                                        rules: sheet.cssRules ? sheet.cssRules.length : 0
-                                    });
-                                }
-                            }
-                        } catch (e) {
-                            // Cross-origin stylesheet, skip
-                        }
-                    }
-                    return sheets;
-                }
-            """)
-            return stylesheets
-        except Exception as e:
-            print(f"Style extraction error: {str(e)}")
-            return []
 
-    def _extract_assets(self, page, base_url: str) -> List[Dict[str, Any]]:
-        """Extract assets with better error handling"""
-        try:
-            assets = page.evaluate("""
-                () => {
-                    const assets = [];
-                    
-                    // Images
-                    document.querySelectorAll('img').forEach(img => {
-                        if (img.src && img.src.startsWith('http')) {
-                            assets.push({
-                                type: 'image',
-                                src: img.src,
-                                alt: img.alt || '',
-                                width: img.naturalWidth || img.width,
-                                height: img.naturalHeight || img.height,
-                                className: img.className,
-                                id: img.id
-                            });
-                        }
-                    });
-                    
-                    // Background images
-                    const elements = document.querySelectorAll('*');
-                    elements.forEach(el => {
-                        const style = window.getComputedStyle(el);
-                        const bgImage = style.backgroundImage;
-                        if (bgImage && bgImage !== 'none' && bgImage.includes('url(')) {
-                            const match = bgImage.match(/url\\(["']?([^"'\\)]+)["']?\\)/);
-                            if (match && match[1].startsWith('http')) {
-                                assets.push({
-                                    type: 'background-image',
-                                    src: match[1],
-                                    element: el.tagName,
-                                    className: el.className
-                                });
-                            }
-                        }
-                    });
-                    
-                    // Fonts
-                    document.querySelectorAll('link[rel="stylesheet"]').forEach(link => {
-                        if (link.href && (link.href.includes('fonts') || link.href.includes('font'))) {
-                            assets.push({
-                                type: 'font',
-                                src: link.href
-                            });
-                        }
-                    });
-                    
-                    return assets;
-                }
-            """)
-            return assets
-        except Exception as e:
-            print(f"Asset extraction error: {str(e)}")
-            return []
+def _project_scrape_result(result: ScrapingResult, fields: Optional[List[str]]) -> Dict[str, Any]:
+    """Plain dict of the requested result fields, ready for fast_json_response"""
+    names = ScrapingResult.model_fields if fields is None else ALWAYS_RETURNED_FIELDS + tuple(fields)
+    return {name: getattr(result, name) for name in names}
 
-    def _extract_dom_structure(self, page) -> Dict[str, Any]:
-        """Extract DOM structure with better error handling"""
-        try:
-            dom = page.evaluate("""
-                () => {
-                    function extractElement(element, depth = 0) {
-                        if (depth > 8) return null; // Prevent deep recursion
-                        
-                        const result = {
-                            tag: element.tagName?.toLowerCase(),
-                            id: element.id || null,
-                            classes: element.className ? element.className.split(' ').filter(c => c) : [],
-                            attributes: {},
-                            children: []
-                        };
-                        
-                        // Extract important attributes
-                        const importantAttrs = ['src', 'href', 'alt', 'title', 'type', 'name', 'value'];
-                        for (let attr of element.attributes || []) {
-                            if (importantAttrs.includes(attr.name) || attr.name.startsWith('data-')) {
-                                result.attributes[attr.name] = attr.value;
-                            }
-                        }
-                        
-                        // Extract text content for leaf nodes
-                        if (element.children.length === 0 && element.textContent) {
-                            const text = element.textContent.trim();
-                            if (text && text.length < 200) {
-                                result.text = text;
-                            }
-                        }
-                        
-                        // Process children
-                        for (let child of element.children) {
-                            const childResult = extractElement(child, depth + 1);
-                            if (childResult) {
-                                result.children.push(childResult);
-                            }
-                        }
-                        
-                        return result;
-                    }
-                    
-                    return extractElement(document.body);
-                }
-            """)
-            return dom
-        except Exception as e:
-            print(f"DOM extraction error: {str(e)}")
-            return {}
 
-    def _extract_meta_data(self, page) -> Dict[str, Any]:
-        """Extract metadata from the page"""
-        try:
-            meta_data = page.evaluate("""
-                () => {
-                    const meta = {};
-                    
-                    // Basic meta tags
-                    const description = document.querySelector('meta[name="description"]');
-                    if (description) meta.description = description.content;
-                    
-                    const keywords = document.querySelector('meta[name="keywords"]');
-                    if (keywords) meta.keywords = keywords.content;
-                    
-                    const author = document.querySelector('meta[name="author"]');
-                    if (author) meta.author = author.content;
-                    
-                    // Open Graph
-                    const ogTitle = document.querySelector('meta[property="og:title"]');
-                    if (ogTitle) meta.og_title = ogTitle.content;
-                    
-                    const ogDescription = document.querySelector('meta[property="og:description"]');
-                    if (ogDescription) meta.og_description = ogDescription.content;
-                    
-                    const ogImage = document.querySelector('meta[property="og:image"]');
-                    if (ogImage) meta.og_image = ogImage.content;
-                    
-                    // Twitter Card
-                    const twitterCard = document.querySelector('meta[name="twitter:card"]');
-                    if (twitterCard) meta.twitter_card = twitterCard.content;
-                    
-                    // Viewport
-                    const viewport = document.querySelector('meta[name="viewport"]');
-                    if (viewport) meta.viewport = viewport.content;
-                    
-                    // Favicon
-                    const favicon = document.querySelector('link[rel="icon"]') || 
-                                   document.querySelector('link[rel="shortcut icon"]');
-                    if (favicon) meta.favicon = favicon.href;
-                    
-                    // Canonical URL
-                    const canonical = document.querySelector('link[rel="canonical"]');
-                    if (canonical) meta.canonical = canonical.href;
-                    
-                    return meta;
-                }
-            """)
-            return meta_data
-        except Exception as e:
-            print(f"Meta data extraction error: {str(e)}")
-            return {}
+def _blob_hashes(data: Dict[str, Any]) -> List[str]:
+    """Blob digests a cached scrape result links to (screenshot and downloaded assets)"""
+    hashes = [(data.get("screenshot_info") or {}).get("hash")]
+    hashes += [asset.get("hash") for asset in data.get("assets") or [] if isinstance(asset, dict)]
+    return [digest for digest in hashes if digest]
+
+
+DEFAULT_GENERATION_MODE = os.getenv("GENERATION_MODE", "single")
 
+async def generate_clone(context: Dict[str, Any], generation_mode: Optional[str] = None,
+                         use_cache: bool = True, patient: bool = False, save_output: bool = True) -> str:
+    """Generate a clone with the requested (or default) generation mode"""
+    if (generation_mode or DEFAULT_GENERATION_MODE) == "sectioned":
+        return await agenerate_sectioned_html(context, use_cache=use_cache, patient=patient, save_output=save_output)
+    return await agenerate_cloned_html(context, use_cache=use_cache, patient=patient, save_output=save_output)
+
+def _scrape_result_to_context(scrape_result: ScrapingResult) -> Dict[str, Any]:
+    """Convert a scraping result into the context used for cloning"""
+    return {
+        "url": scrape_result.url,
+        "title": scrape_result.title,
+        "html": scrape_result.html,
+        "meta_data": scrape_result.meta_data,
+        "dom_structure": scrape_result.dom_structure,
+        "visual_context": scrape_result.visual_context,
+        "styles": scrape_result.styles,
+        "assets": scrape_result.assets
+    }
+
+async def run_clone_job(payload: Dict[str, Any], report) -> Dict[str, Any]:
+    """Job runner for background scrape-and-clone jobs"""
+    start_time = time.time()
+    job_request = CloneJobRequest(**payload)
+    
+    await report("scraping", 0.1)
+    # Cloning needs the full scrape, so any `fields` projection is dropped
+    scrape_request = ScrapingRequest(**job_request.model_dump(include=set(ScrapingRequest.model_fields) - {"fields"}))
+    scrape_result = await scraper.scrape_website(scrape_request, patient=True)
+    if scrape_result.status.startswith("error"):
+        raise RuntimeError(f"Scraping failed: {scrape_result.status}")
+    
+    await report("generating", 0.5)
+    cloned_html = await generate_clone(
+        _scrape_result_to_context(scrape_result),
+        job_request.generation_mode,
+        use_cache=not job_request.bypass_cache,
+        patient=True
+    )
+    
+    return {
+        "url": scrape_result.url,
+        "title": scrape_result.title,
+        "cloned_html": cloned_html,
+        "scrape_processing_time": scrape_result.processing_time,
+        "processing_time": time.time() - start_time
+    }
 
 # Initialize scraper
 scraper = WebsiteScraper()
+job_queue = JobQueue(run_clone_job)
+
+def _collect_pool_metrics():
+    """Browser pool occupancy, read when /metrics is scraped"""
+    if scraper.session_pool is not None:
+        stats = scraper.session_pool.stats()
+        BROWSER_POOL_SLOTS.set(stats["leased"], state="active")
+        BROWSER_POOL_SLOTS.set(stats["idle"], state="idle")
+        return
+    stats = scraper.browser_pool.stats()
+    BROWSER_POOL_SLOTS.set(sum(b["active_contexts"] for b in stats["browsers"]), state="active")
+    BROWSER_POOL_SLOTS.set(stats["idle_slots"], state="idle")
+    for browser in stats["browsers"]:
+        BROWSER_MEMORY_MB.set(browser["memory_mb"], browser=str(browser["index"]))
+
+REGISTRY.add_collector(_collect_pool_metrics)
 
 # API Endpoints
 @app.get("/", response_class=HTMLResponse)
-def root():
+async def root():
     """Root endpoint with API documentation"""
     return """
     <!DOCTYPE html>
@@ -568,13 +686,34 @@ def root():
             <p><strong>Body:</strong> CloneRequest JSON</p>
         </div>
         
+        <div class="endpoint">
+            <p><span class="method">POST</span> <code>/clone/stream</code> - Stream an HTML clone as Server-Sent Events</p>
+            <p><strong>Body:</strong> CloneRequest JSON</p>
+        </div>
+        
         <div class="endpoint">
             <p><span class="method">POST</span> <code>/scrape-and-clone</code> - Scrape and clone in one step</p>
             <p><strong>Body:</strong> ScrapingRequest JSON</p>
         </div>
         
+        <div class="endpoint">
+            <p><span class="method">POST</span> <code>/batch/clone</code> - Clone many URLs, streaming per-URL results as NDJSON or SSE</p>
+            <p><strong>Body:</strong> BatchCloneRequest JSON</p>
+        </div>
+
+        <div class="endpoint">
+            <p><span class="method">POST</span> <code>/crawl/clone</code> - Crawl a site from a seed URL and clone its pages with shared layout, streaming per-page results as NDJSON or SSE</p>
+            <p><strong>Body:</strong> CrawlCloneRequest JSON: <code>url</code>, optional <code>max_depth</code>, <code>max_pages</code>, <code>options</code> (ScrapingRequest fields for every page), <code>bypass_cache</code>, <code>stream_format</code></p>
+        </div>
+        
+        <div class="endpoint">
+            <p><span class="method">POST</span> <code>/jobs</code> - Queue a scrape-and-clone job; poll <code>GET /jobs/{id}</code>, cancel with <code>DELETE /jobs/{id}</code></p>
+            <p><strong>Body:</strong> ScrapingRequest JSON plus optional <code>priority</code></p>
+        </div>
+        
         <div class="endpoint">
             <p><span class="method">GET</span> <code>/health</code> - Health check endpoint</p>
+            <p><span class="method">GET</span> <code>/metrics</code> - Prometheus metrics (per-stage latency, pools, caches, tokens)</p>
         </div>
         
         <div class="endpoint">
@@ -598,17 +737,80 @@ def root():
     """
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "version": "2.0.0",
-        "cloud_browser_enabled": scraper.use_cloud_browser
+        "cloud_browser_enabled": scraper.use_cloud_browser,
+        "browser_pool": scraper.browser_pool.stats(),
+        "session_pool": scraper.session_pool.stats() if scraper.session_pool else None,
+        "max_concurrent_scrapes": scraper.max_concurrent_scrapes,
+        "llm_concurrency": LLM_CONCURRENCY,
+        "admission": {"browser": scraper.admission.stats(), "crawl": scraper.crawl_admission.stats(),
+                      "llm": llm_admission.stats()},
+        "hosts": scraper.host_scheduler.stats(),
+        "scrape_cache": scraper.scrape_cache.stats(),
+        "llm_cache": llm_cache.stats(),
+        "region_store": region_store.stats(),
+        "blob_store": scraper.blob_store.stats(),
+        "asset_store": scraper.asset_store.stats(),
+        "jobs": await job_queue.stats()
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Per-stage latency histograms, counters and pool gauges in Prometheus text format"""
+    return Response(content=REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+# Stored blobs come from scraped sites, so never let one run as a document on our origin
+BLOB_SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "Content-Security-Policy": "sandbox; default-src 'none'"
+}
+
+@app.get("/screenshots/{digest}")
+async def get_screenshot(digest: str, http_request: Request):
+    """Serve a stored screenshot by content hash"""
+    etag = f'"{digest}"'
+    headers = {
+        "ETag": etag,
+        # Content-addressed, so the bytes behind a URL never change
+        "Cache-Control": "public, max-age=31536000, immutable",
+        **BLOB_SECURITY_HEADERS
+    }
+    if http_request.headers.get("if-none-match") in (etag, "*") and scraper.blob_store.is_valid_hash(digest):
+        return Response(status_code=304, headers=headers)
+    
+    blob = await scraper.blob_store.aget(digest)
+    if blob is None:
+        raise HTTPException(status_code=404, detail=f"Screenshot {digest} not found")
+    data, content_type = blob
+    return Response(content=data, media_type=content_type, headers=headers)
+
+@app.get("/assets/{digest}")
+async def get_asset(digest: str, http_request: Request):
+    """Serve a downloaded page asset by content hash"""
+    etag = f'"{digest}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable",
+        # Clones opened from other origins load these directly
+        "Access-Control-Allow-Origin": "*",
+        **BLOB_SECURITY_HEADERS
     }
+    if http_request.headers.get("if-none-match") in (etag, "*") and scraper.blob_store.is_valid_hash(digest):
+        return Response(status_code=304, headers=headers)
+    
+    blob = await scraper.blob_store.aget(digest)
+    if blob is None:
+        raise HTTPException(status_code=404, detail=f"Asset {digest} not found")
+    data, content_type = blob
+    return Response(content=data, media_type=content_type, headers=headers)
 
 @app.post("/scrape", response_model=ScrapingResult)
-def scrape_website(request: ScrapingRequest):
+async def scrape_website(request: ScrapingRequest, http_request: Request, fields: Optional[str] = None):
     """
     Scrape a website and extract comprehensive data including:
     - HTML content
@@ -618,18 +820,40 @@ def scrape_website(request: ScrapingRequest):
     - DOM structure
     - Visual context
     - Metadata
+    
+    Results are cached; send `Cache-Control: no-cache` to force a fresh scrape.
+    
+    `fields` (in the body, or `?fields=title,visual_context`) limits the response
+    to those parts, and the others are never extracted. Responses are compressed
+    with zstd, brotli or gzip according to Accept-Encoding.
     """
+    if fields is not None:
+        try:
+            request = ScrapingRequest(**{
+                **request.model_dump(),
+                "fields": [name.strip() for name in fields.split(",") if name.strip()]
+            })
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=f"Invalid fields: {str(e)}")
+    
     try:
         print(f"Scraping request for: {request.url}")
-        result = scraper.scrape_website(request)
+        cache_policy = CachePolicy.from_headers(http_request.headers)
+        result = await scraper.scrape_website(request, cache_policy)
         print(f"Scraping completed in {result.processing_time:.2f}s")
-        return result
+        return await fast_json_response(
+            _project_scrape_result(result, request.fields),
+            http_request.headers.get("accept-encoding"),
+            headers=cache_policy.response_headers()
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Scraping failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Scraping failed: {str(e)}")
 
 @app.post("/clone", response_model=CloneResponse)
-def clone_website(request: CloneRequest):
+async def clone_website(request: CloneRequest, http_request: Request, response: Response):
     """
     Generate an HTML clone of a website using AI.
     Provide either a URL to scrape first, or pre-scraped context data.
@@ -639,6 +863,8 @@ def clone_website(request: CloneRequest):
     try:
         # If URL is provided, scrape it first
         if request.url:
+            # Don't spend a scrape on a request the LLM stage would turn away
+            llm_admission.check()
             print(f"Scraping for cloning: {request.url}")
             scrape_request = ScrapingRequest(
                 url=request.url,
@@ -646,23 +872,19 @@ def clone_website(request: CloneRequest):
                 include_dom=True,
                 include_assets=True,
                 include_styles=True,
-                wait_for_load=True
+                wait_for_load=True,
+                block_mode=CLONE_BLOCK_MODE,
+                download_assets=request.download_assets
             )
-            scrape_result = scraper.scrape_website(scrape_request)
+            cache_policy = CachePolicy.from_headers(http_request.headers)
+            scrape_result = await scraper.scrape_website(scrape_request, cache_policy)
+            response.headers.update(cache_policy.response_headers())
             
             if scrape_result.status.startswith("error"):
                 raise HTTPException(status_code=500, detail=f"Scraping failed: {scrape_result.status}")
             
             # Convert scraping result to context
-            context = {
-                "title": scrape_result.title,
-                "html": scrape_result.html,
-                "meta_data": scrape_result.meta_data,
-                "dom_structure": scrape_result.dom_structure,
-                "visual_context": scrape_result.visual_context,
-                "styles": scrape_result.styles,
-                "assets": scrape_result.assets
-            }
+            context = _scrape_result_to_context(scrape_result)
         elif request.context:
             context = request.context
         else:
@@ -670,7 +892,7 @@ def clone_website(request: CloneRequest):
         
         # Generate HTML clone
         print("Generating HTML clone with LLM...")
-        cloned_html = generate_cloned_html(context)
+        cloned_html = await generate_clone(context, request.generation_mode, use_cache=not request.bypass_cache)
         
         processing_time = time.time() - start_time
         print(f"Cloning completed in {processing_time:.2f}s")
@@ -688,36 +910,94 @@ def clone_website(request: CloneRequest):
         print(f"Cloning failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Cloning failed: {str(e)}")
 
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _stream_event(stream_format: str, event: str, data: Dict[str, Any]) -> str:
+    """One event as an SSE message or an NDJSON line"""
+    if stream_format == "sse":
+        return _sse(event, data)
+    return json.dumps({"event": event, **data}) + "\n"
+
+@app.post("/clone/stream")
+async def clone_website_stream(request: CloneRequest, http_request: Request):
+    """
+    Generate an HTML clone and stream it as Server-Sent Events.
+    Events: `status` (pipeline stage), `chunk` ({"html": ...} pieces of the cleaned
+    document), `validation` (required tags seen so far), `done` and `error`.
+    """
+    if not request.url and not request.context:
+        raise HTTPException(status_code=400, detail="Either 'url' or 'context' must be provided")
+    # Reject up front, while a 429 can still be sent; later rejections become `error` events
+    if request.url:
+        scraper.admission.check()
+    llm_admission.check()
+    
+    cache_policy = CachePolicy.from_headers(http_request.headers)
+    
+    async def events():
+        if request.url:
+            yield _sse("status", {"stage": "scraping"})
+            print(f"Scraping for streamed cloning: {request.url}")
+            try:
+                scrape_result = await scraper.scrape_website(
+                    ScrapingRequest(url=request.url, block_mode=CLONE_BLOCK_MODE,
+                                    download_assets=request.download_assets), cache_policy)
+            except Overloaded as e:
+                yield _sse("error", {"detail": e.detail, "status": 429, "retry_after": e.retry_after})
+                return
+            if scrape_result.status.startswith("error"):
+                yield _sse("error", {"detail": f"Scraping failed: {scrape_result.status}"})
+                return
+            context = _scrape_result_to_context(scrape_result)
+        else:
+            context = request.context
+        
+        yield _sse("status", {"stage": "generating", "scrape_cache": cache_policy.outcome})
+        stream = astream_sectioned_html \
+            if (request.generation_mode or DEFAULT_GENERATION_MODE) == "sectioned" else astream_cloned_html
+        async for event in stream(context, use_cache=not request.bypass_cache):
+            yield _sse(event["event"], event["data"])
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Disable proxy buffering so chunks reach the client as they are produced
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/scrape-and-clone")
-def scrape_and_clone_website(request: ScrapingRequest):
+async def scrape_and_clone_website(request: ScrapingRequest, http_request: Request, response: Response,
+                                   generation_mode: Optional[GenerationMode] = None):
     """
     Scrape a website and immediately generate an HTML clone.
     This is a convenience endpoint that combines both operations.
+    `?generation_mode=sectioned` generates the page region by region.
     """
     start_time = time.time()
     
     try:
         # First scrape the website
         print(f"Scraping and cloning: {request.url}")
-        scrape_result = scraper.scrape_website(request)
+        update = {"fields": None}
+        if "block_mode" not in request.model_fields_set:
+            update["block_mode"] = CLONE_BLOCK_MODE
+        request = request.model_copy(update=update)
+        llm_admission.check()
+        cache_policy = CachePolicy.from_headers(http_request.headers)
+        scrape_result = await scraper.scrape_website(request, cache_policy)
+        response.headers.update(cache_policy.response_headers())
         
         if scrape_result.status.startswith("error"):
             raise HTTPException(status_code=500, detail=f"Scraping failed: {scrape_result.status}")
         
         # Convert to context for cloning
-        context = {
-            "title": scrape_result.title,
-            "html": scrape_result.html,
-            "meta_data": scrape_result.meta_data,
-            "dom_structure": scrape_result.dom_structure,
-            "visual_context": scrape_result.visual_context,
-            "styles": scrape_result.styles,
-            "assets": scrape_result.assets
-        }
+        context = _scrape_result_to_context(scrape_result)
         
         # Generate HTML clone
         print("Generating HTML clone...")
-        cloned_html = generate_cloned_html(context)
+        cloned_html = await generate_clone(context, generation_mode)
         
         processing_time = time.time() - start_time
         print(f"Scrape and clone completed in {processing_time:.2f}s")
@@ -739,24 +1019,226 @@ def scrape_and_clone_website(request: ScrapingRequest):
         print(f"Scrape and clone failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Operation failed: {str(e)}")
 
+BATCH_MAX_URLS = int(os.getenv("BATCH_MAX_URLS", "500"))
+
+async def _clone_batch_item(index: int, scrape_request: ScrapingRequest, bypass_cache: bool,
+                            generation_mode: Optional[str] = None) -> Dict[str, Any]:
+    """Scrape then clone one batch URL; the browser and LLM limits are applied inside"""
+    item = {"index": index, "url": str(scrape_request.url)}
+    try:
+        scrape_start = time.time()
+        scrape_result = await scraper.scrape_website(scrape_request, patient=True)
+        item["scrape_time"] = time.time() - scrape_start
+        if scrape_result.status.startswith("error"):
+            item["status"] = f"error: scraping failed: {scrape_result.status}"
+            return item
+        
+        generate_start = time.time()
+        item["cloned_html"] = await generate_clone(
+            _scrape_result_to_context(scrape_result),
+            generation_mode,
+            use_cache=not bypass_cache,
+            patient=True,
+            # Items finish concurrently, so none of them is "the" clone on disk
+            save_output=False
+        )
+        item["generate_time"] = time.time() - generate_start
+        item["status"] = "success"
+    except Exception as e:
+        print(f"Batch item {index} failed: {str(e)}")
+        item["status"] = f"error: {str(e)}"
+    return item
+
+@app.post("/batch/clone")
+async def batch_clone(request: BatchCloneRequest):
+    """
+    Scrape and clone many URLs, streaming each result as soon as it finishes.
+    Scrapes run in parallel up to MAX_CONCURRENT_SCRAPES and generations up to
+    LLM_CONCURRENCY, so a slow model call never holds a browser. Items queue for
+    capacity instead of being rejected; the batch itself gets a 429 when the
+    queues are already full. Results are
+    NDJSON lines (or SSE `result` events), followed by a summary.
+    """
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="'urls' must not be empty")
+    if len(request.urls) > BATCH_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_URLS} URLs per batch")
+    try:
+        scrape_requests = [ScrapingRequest(**{"download_assets": True, "block_mode": CLONE_BLOCK_MODE,
+                                              **request.options, "url": url, "fields": None})
+                           for url in request.urls]
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid options: {str(e)}")
+    # Items wait for capacity rather than failing, so only refuse a new batch when
+    # the queues are already full
+    scraper.admission.check()
+    llm_admission.check()
+    
+    def encode(event: str, data: Dict[str, Any]) -> str:
+        return _stream_event(request.stream_format, event, data)
+    
+    # Scraped pages wait for the LLM while holding their (large) results, so cap how
+    # many items of this batch are in flight at once
+    in_flight = asyncio.Semaphore(scraper.max_concurrent_scrapes + LLM_CONCURRENCY)
+    
+    async def bounded(index: int, scrape_request: ScrapingRequest) -> Dict[str, Any]:
+        async with in_flight:
+            return await _clone_batch_item(index, scrape_request, request.bypass_cache, request.generation_mode)
+    
+    async def results():
+        start_time = time.time()
+        tasks = [asyncio.create_task(bounded(i, r)) for i, r in enumerate(scrape_requests)]
+        succeeded = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                if item["status"] == "success":
+                    succeeded += 1
+                yield encode("result", item)
+            yield encode("summary", {
+                "total": len(tasks),
+                "succeeded": succeeded,
+                "failed": len(tasks) - succeeded,
+                "processing_time": time.time() - start_time
+            })
+        finally:
+            # Client went away: stop the remaining work
+            for task in tasks:
+                task.cancel()
+    
+    print(f"Batch clone of {len(scrape_requests)} URL(s)")
+    return StreamingResponse(
+        results(),
+        media_type="text/event-stream" if request.stream_format == "sse" else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/crawl/clone")
+async def crawl_and_clone(request: CrawlCloneRequest, http_request: Request):
+    """
+    Crawl a site from a seed URL over same-origin links (breadth first, up to
+    max_depth / max_pages) and clone every page. The crawl reuses one browser
+    context; the clones share one stylesheet, and headers and footers repeated
+    across pages are generated once. Streams `page` events as pages are scraped,
+    then `result` events as clones finish, then a `summary`, as NDJSON or SSE.
+    """
+    try:
+        seed = ScrapingRequest(**{"download_assets": True, "block_mode": CLONE_BLOCK_MODE,
+                                  **request.options, "url": request.url, "fields": None})
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid options: {str(e)}")
+    scraper.crawl_admission.check()
+    scraper.admission.check()
+    llm_admission.check()
+    cache_policy = CachePolicy.from_headers(http_request.headers)
+    
+    def encode(event: str, data: Dict[str, Any]) -> str:
+        return _stream_event(request.stream_format, event, data)
+    
+    async def results():
+        start_time = time.time()
+        contexts = []
+        failed = 0
+        try:
+            async for depth, scrape_result in crawl(scraper, seed, request.max_depth, request.max_pages, cache_policy):
+                if scrape_result.status.startswith("error"):
+                    failed += 1
+                else:
+                    contexts.append(_scrape_result_to_context(scrape_result))
+                yield encode("page", {
+                    "url": scrape_result.url,
+                    "depth": depth,
+                    "title": scrape_result.title,
+                    "status": scrape_result.status
+                })
+            
+            yield encode("status", {"stage": "generating", "pages": len(contexts)})
+            shared_regions = 0
+            async for index, cloned_html, info in agenerate_site_html(contexts, use_cache=not request.bypass_cache):
+                shared_regions += info["shared_regions"]
+                yield encode("result", {
+                    "url": contexts[index]["url"],
+                    "title": contexts[index]["title"],
+                    "status": "success",
+                    "cloned_html": cloned_html,
+                    **info
+                })
+            yield encode("summary", {
+                "pages": len(contexts) + failed,
+                "cloned": len(contexts),
+                "failed": failed,
+                "shared_regions": shared_regions,
+                "processing_time": time.time() - start_time
+            })
+        except Exception as e:
+            print(f"Crawl of {request.url} failed: {str(e)}")
+            yield encode("error", {"detail": f"Crawl failed: {str(e)}"})
+    
+    print(f"Crawl clone of {request.url}")
+    return StreamingResponse(
+        results(),
+        media_type="text/event-stream" if request.stream_format == "sse" else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/jobs", status_code=202)
+async def create_clone_job(request: CloneJobRequest):
+    """
+    Queue a scrape-and-clone job and return its ID immediately.
+    Poll GET /jobs/{id} for stage, progress and the result.
+    """
+    try:
+        payload = request.model_dump(mode="json", exclude={"priority"})
+        job = await job_queue.submit("scrape_and_clone", payload, priority=request.priority)
+        print(f"Queued job {job['id']} for {request.url} (priority {request.priority})")
+        return job
+    except Exception as e:
+        print(f"Job submission failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Job submission failed: {str(e)}")
+
+@app.get("/jobs/{job_id}")
+async def get_clone_job(job_id: str):
+    """Report a job's status, stage, progress and, once finished, its result"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@app.delete("/jobs/{job_id}")
+async def cancel_clone_job(job_id: str):
+    """Cancel a queued or running job"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if job["status"] not in ("queued", "running"):
+        raise HTTPException(status_code=409, detail=f"Job {job_id} already {job['status']}")
+    return await job_queue.cancel(job_id)
+
 @app.post("/preview-clone", response_class=HTMLResponse)
-def preview_clone(request: CloneRequest):
+async def preview_clone(request: CloneRequest, http_request: Request, response: Response):
     """
     Generate and preview an HTML clone directly in the browser.
     Returns the cloned HTML for immediate viewing.
     """
     try:
         # Generate the clone
-        clone_response = clone_website(request)
+        clone_response = await clone_website(request, http_request, response)
         
         if clone_response.status == "success":
-            return HTMLResponse(content=clone_response.cloned_html)
+            cache_headers = {k: v for k, v in response.headers.items() if k in ("x-cache", "age")}
+            return HTMLResponse(content=clone_response.cloned_html, headers=cache_headers)
         else:
             return HTMLResponse(
                 content=f"<html><body><h1>Clone Generation Failed</h1><p>{clone_response.status}</p></body></html>",
                 status_code=500
             )
             
+    except Overloaded as e:
+        return HTMLResponse(
+            content=f"<html><body><h1>Server Busy</h1><p>{e.detail}</p></body></html>",
+            status_code=429,
+            headers=e.headers
+        )
     except Exception as e:
         return HTMLResponse(
             content=f"<html><body><h1>Error</h1><p>{str(e)}</p></body></html>",
@@ -766,22 +1248,42 @@ def preview_clone(request: CloneRequest):
 # Error handlers
 @app.exception_handler(404)
 def not_found_handler(request, exc):
-    return {"error": "Endpoint not found", "available_endpoints": ["/", "/scrape", "/clone", "/scrape-and-clone", "/health", "/docs"]}
+    # Keep the detail of 404s raised by endpoints (e.g. unknown job IDs)
+    detail = getattr(exc, "detail", None)
+    if detail and detail != "Not Found":
+        return JSONResponse(status_code=404, content={"detail": detail})
+    return JSONResponse(status_code=404, content={"error": "Endpoint not found", "available_endpoints": ["/", "/scrape", "/clone", "/clone/stream", "/scrape-and-clone", "/batch/clone", "/crawl/clone", "/jobs", "/health", "/metrics", "/docs"]})
 
 @app.exception_handler(500)
 def internal_error_handler(request, exc):
-    return {"error": "Internal server error", "detail": str(exc)}
+    return JSONResponse(status_code=500, content={"error": "Internal server error", "detail": getattr(exc, "detail", str(exc))})
 
 # Startup event
 @app.on_event("startup")
-def startup_event():
+async def startup_event():
     print("🕷️ Website Scraper API v2.0.0 starting up...")
     print(f"Cloud browser enabled: {scraper.use_cloud_browser}")
     if scraper.use_cloud_browser:
         print("Using Browserbase for browser automation")
+        try:
+            await scraper.session_pool.start()
+        except Exception as e:
+            print(f"Session pool warm-up failed, will retry on first request: {str(e)}")
     else:
         print("Using local Playwright browser")
+        try:
+            await scraper.browser_pool.start()
+        except Exception as e:
+            print(f"Browser pool warm-up failed, will retry on first request: {str(e)}")
+    await job_queue.start()
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await job_queue.stop()
+    await scraper.browser_pool.stop()
+    await scraper.asset_store.aclose()
+    if scraper.session_pool:
+        await scraper.session_pool.stop()
 
 
 if __name__ == "__main__":
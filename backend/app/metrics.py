@@ -0,0 +1,275 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds; spans a cached lookup up to a slow page load or model call
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        """Count the enclosed block as in progress"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Per label set: [per-bucket counts..., sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * len(self.buckets) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the enclosed block, including when it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        series = self._values.get(self._key(labels))
+        return int(sum(series[:-1])) if series else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._values.items())
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide metrics rendered in the Prometheus text exposition format.
+
+    Collectors are called right before rendering, for gauges that are cheaper
+    to read on demand (pool occupancy, cache sizes) than to keep up to date.
+    """
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+        self.collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]):
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self.collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"Metrics collector failed: {str(e)}")
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Optional[Sequence[float]] = None) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets or DEFAULT_BUCKETS))
+
+
+# HTTP layer
+HTTP_REQUESTS_IN_FLIGHT = gauge(
+    "clone_http_requests_in_flight", "HTTP requests currently being handled")
+HTTP_REQUEST_SECONDS = histogram(
+    "clone_http_request_duration_seconds", "Time until response headers are sent, by route",
+    ["method", "route", "status"])
+
+# Scraping
+SCRAPE_STAGE_SECONDS = histogram(
+    "clone_scrape_stage_seconds",
+    "Scrape time by stage: host_wait, queue, browser_acquire, navigate, readiness, content, screenshot, extract, assets, total",
+    ["stage"])
+SCRAPES_TOTAL = counter(
+    "clone_scrapes_total", "Scrapes by outcome (success, error, rejected)", ["outcome"])
+SCRAPES_IN_FLIGHT = gauge(
+    "clone_scrapes_in_flight", "Scrapes holding a browser slot")
+NAVIGATION_RETRIES_TOTAL = counter(
+    "clone_navigation_retries_total", "page.goto attempts that failed and were retried")
+CRAWL_PAGES_TOTAL = counter(
+    "clone_crawl_pages_total", "Pages scraped by site crawls, by outcome (success, error)", ["outcome"])
+ASSET_FETCHES_TOTAL = counter(
+    "clone_asset_fetches_total",
+    "Asset lookups by result (downloaded, indexed, shared, error)", ["result"])
+
+# Caches
+CACHE_REQUESTS_TOTAL = counter(
+    "clone_cache_requests_total", "Cache lookups by cache (scrape, llm) and result (hit, miss, bypass)",
+    ["cache", "result"])
+
+# Generation
+GENERATION_STAGE_SECONDS = histogram(
+    "clone_generation_stage_seconds",
+    "Clone generation time by stage: prompt_build, llm, stylesheet, regions, finalize, total",
+    ["stage"])
+GENERATIONS_TOTAL = counter(
+    "clone_generations_total", "Clone generations by outcome (success, cached, error)", ["outcome"])
+LLM_REQUESTS_IN_FLIGHT = gauge(
+    "clone_llm_requests_in_flight", "Model calls currently in progress")
+LLM_TOKENS_TOTAL = counter(
+    "clone_llm_tokens_total", "Tokens sent to (prompt) and generated by (completion) the model", ["type"])
+REGIONS_TOTAL = counter(
+    "clone_regions_total",
+    "Sectioned-generation regions by source (generated, cached, stored, shared, fallback)", ["source"])
+
+# Resources, filled in by collectors
+BROWSER_POOL_SLOTS = gauge(
+    "clone_browser_pool_slots", "Browser pool context slots by state (active, idle)", ["state"])
+BROWSER_MEMORY_MB = gauge(
+    "clone_browser_memory_mb", "Resident memory of each pooled browser", ["browser"])
+
+# Admission control
+ADMISSION_ACTIVE = gauge(
+    "clone_admission_active", "Requests holding an admission slot", ["pool"])
+ADMISSION_QUEUED = gauge(
+    "clone_admission_queued", "Requests waiting for an admission slot", ["pool"])
+ADMISSION_WAIT_SECONDS = histogram(
+    "clone_admission_wait_seconds", "Time spent waiting for an admission slot", ["pool"])
+ADMISSION_REJECTIONS_TOTAL = counter(
+    "clone_admission_rejections_total", "Requests rejected with 429, by reason (queue_full, queue_timeout)",
+    ["pool", "reason"])
+
+# Per-host politeness
+HOST_BACKOFFS_TOTAL = counter(
+    "clone_host_backoffs_total", "Times a target host was put into backoff after a failed or throttled navigation")
@@ -0,0 +1,61 @@
+import os
+from typing import Dict, Optional
+
+
+def find_process(marker: str) -> Optional[int]:
+    """Pid of the top-level process whose command line contains `marker`.
+
+    Chromium ignores unknown switches, so each pooled browser is launched with a
+    unique `--orchids-pool-slot=<id>` flag that lets us find it here; its helper
+    processes (`--type=...`) are skipped. Returns None where /proc is unavailable.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                cmdline = f.read().decode(errors="replace")
+        except OSError:
+            continue
+        if marker in cmdline and "--type=" not in cmdline:
+            return int(entry)
+    return None
+
+
+def process_tree_rss_mb(root_pid: int) -> float:
+    """Resident memory (MB) of a process and all of its descendants, from /proc"""
+    if not os.path.isdir("/proc"):
+        return 0.0
+
+    parents: Dict[int, int] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read().decode(errors="replace")
+            # The command name may contain spaces, so split after the closing paren
+            parents[int(entry)] = int(stat.rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+
+    tree = {root_pid}
+    changed = True
+    while changed:
+        changed = False
+        for pid, ppid in parents.items():
+            if ppid in tree and pid not in tree:
+                tree.add(pid)
+                changed = True
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    for pid in tree:
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+    return total / (1024 * 1024)
@@ -0,0 +1,240 @@
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+
+_encoding = None
+_encoding_failed = False
+
+
+def _get_encoding():
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(os.getenv("PROMPT_TOKENIZER_ENCODING", "o200k_base"))
+        except Exception as e:
+            # tiktoken missing, or its encoding file can't be downloaded
+            print(f"Tokenizer unavailable, estimating tokens from length: {str(e)}")
+            _encoding_failed = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Token count with the local tokenizer, or ~4 characters per token without it"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+# Computed-style values that carry no information for the model
+DEFAULT_STYLE_VALUES = {
+    "position": {"static"},
+    "padding": {"0px"},
+    "margin": {"0px"},
+    "backgroundColor": {"rgba(0, 0, 0, 0)", "transparent"},
+    "borderRadius": {"0px"},
+    "boxShadow": {"none"},
+    "transform": {"none"},
+    "opacity": {"1"},
+    "zIndex": {"auto"},
+    "textAlign": {"start", "left"},
+    "fontWeight": {"400", "normal"},
+    "width": {"auto"},
+    "height": {"auto"},
+    "flexDirection": {"row"},
+    "justifyContent": {"normal"},
+    "alignItems": {"normal"},
+    "gridTemplateColumns": {"none"},
+    "gridTemplateRows": {"none"}
+}
+FLEX_FIELDS = ("flexDirection", "justifyContent", "alignItems")
+GRID_FIELDS = ("gridTemplateColumns", "gridTemplateRows")
+# Inherited from <body> unless the element overrides them
+INHERITED_FIELDS = ("color", "fontFamily")
+
+
+def compact_styles(styles: Dict[str, Any], inherited: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Drop default, inapplicable and inherited style values"""
+    inherited = inherited or {}
+    display = styles.get("display") or ""
+    compact = {}
+    for name, value in styles.items():
+        if value in (None, ""):
+            continue
+        if value in DEFAULT_STYLE_VALUES.get(name, ()):
+            continue
+        if name == "border" and str(value).startswith("0px none"):
+            continue
+        if name in FLEX_FIELDS and "flex" not in display and "grid" not in display:
+            continue
+        if name in GRID_FIELDS and "grid" not in display:
+            continue
+        if name in INHERITED_FIELDS and inherited.get(name) == value:
+            continue
+        compact[name] = value
+    return compact
+
+
+def compact_element(element: Dict[str, Any], inherited: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Compact form of a visual_context element: no empty fields, rounded geometry"""
+    compact = {"selector": element.get("selector")}
+    tag = (element.get("tagName") or "").lower()
+    if tag and tag != compact["selector"]:
+        compact["tag"] = tag
+    for name in ("id", "className"):
+        if element.get(name) and isinstance(element[name], str):
+            compact[name] = element[name]
+    position = element.get("position") or {}
+    if position:
+        compact["box"] = [round(position.get(k) or 0) for k in ("left", "top", "width", "height")]
+    styles = compact_styles(element.get("styles") or {}, inherited)
+    if styles:
+        compact["styles"] = styles
+    text = " ".join((element.get("textContent") or "").split())
+    if text:
+        compact["text"] = text[:120]
+    return compact
+
+
+def _unique(items: List[str]) -> List[str]:
+    # Repeated entries cost tokens without telling the model anything new
+    return list(dict.fromkeys(items))
+
+
+def _text_items(text: str, chunk_chars: int = 400) -> List[str]:
+    items = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        while len(line) > chunk_chars:
+            items.append(line[:chunk_chars])
+            line = line[chunk_chars:]
+        if line:
+            items.append(line)
+    return items
+
+
+class PromptSection:
+    """A prompt section whose items are included in order until its budget runs out"""
+
+    def __init__(self, name: str, heading: str, items: List[str], max_share: float):
+        self.name = name
+        self.heading = heading
+        self.items = _unique(items)
+        self.max_share = max_share
+        self.item_tokens = [count_tokens(item) + 1 for item in self.items]
+        self.included = 0
+        self.tokens = count_tokens(heading) + 1
+
+    def fill(self, available: int) -> int:
+        """Include further items within `available` tokens; returns the tokens used"""
+        used = 0
+        if self.included == 0:
+            if not self.items or self.tokens > available:
+                return 0
+            used = self.tokens
+        while self.included < len(self.items):
+            cost = self.item_tokens[self.included]
+            if used + cost > available:
+                break
+            used += cost
+            self.included += 1
+        if self.included == 0:
+            return 0
+        return used
+
+    def render(self) -> str:
+        if not self.included:
+            return f"{self.heading}\n(none)"
+        body = "\n".join(self.items[:self.included])
+        if self.included < len(self.items):
+            body += f"\n(+{len(self.items) - self.included} more omitted)"
+        return f"{self.heading}\n{body}"
+
+
+class PromptBuild:
+    def __init__(self, prompt: str, tokens: int, budget: int, sections: Dict[str, Dict[str, int]]):
+        self.prompt = prompt
+        self.tokens = tokens
+        self.budget = budget
+        self.sections = sections
+
+    def report(self) -> Dict[str, Any]:
+        return {"tokens": self.tokens, "budget": self.budget, "sections": self.sections}
+
+
+def assemble_prompt(header: str,
+                    sections: List[PromptSection],
+                    footer: str,
+                    token_budget: int) -> PromptBuild:
+    """Fill `token_budget` with sections in priority (list) order.
+
+    The first pass caps each section at its `max_share` of the budget so one large
+    section can't starve the rest; the second pass hands leftover tokens out in
+    priority order.
+    """
+    fixed = count_tokens(header) + count_tokens(footer) + 2
+    remaining = max(token_budget - fixed, 0)
+    for section in sections:
+        remaining -= section.fill(min(remaining, int(token_budget * section.max_share)))
+    for section in sections:
+        remaining -= section.fill(remaining)
+
+    prompt = "\n\n".join([header] + [section.render() for section in sections] + [footer])
+    return PromptBuild(
+        prompt=prompt,
+        tokens=count_tokens(prompt),
+        budget=token_budget,
+        sections={s.name: {"included": s.included, "available": len(s.items)} for s in sections}
+    )
+
+
+def downloaded_assets(assets: List[Dict[str, Any]], types: Optional[tuple] = None) -> List[Dict[str, Any]]:
+    """Assets stored locally by the asset store, optionally only of the given types"""
+    return [asset for asset in assets or []
+            if asset.get("local_url") and (types is None or asset.get("type") in types)]
+
+
+def asset_items(assets: List[Dict[str, Any]]) -> List[str]:
+    """One line per downloaded asset: its original src and the local url to use instead"""
+    items = []
+    for asset in assets:
+        item = {"type": asset.get("type"), "src": asset.get("src"), "url": asset.get("local_url")}
+        item.update({k: asset[k] for k in ("alt", "width", "height", "className") if asset.get(k)})
+        items.append(compact_json(item))
+    return items
+
+
+def build_sections(context: Dict[str, Any], summarize_html: Callable[[str], str]) -> List[PromptSection]:
+    """Prompt sections for a clone context, highest priority first"""
+    visual_context = context.get("visual_context") or {}
+    layout = visual_context.get("layout") or {}
+    inherited = {name: layout.get(name) for name in INHERITED_FIELDS}
+    layout_items = [compact_json({k: v for k, v in layout.items() if v not in (None, "")})] if layout else []
+
+    return [
+        PromptSection("layout", "### Layout Structure:", layout_items, 0.05),
+        PromptSection("colors", "### Color Palette:",
+                      [str(c) for c in visual_context.get("colors") or []], 0.05),
+        PromptSection("fonts", "### Typography (family|size|weight):",
+                      [str(f) for f in visual_context.get("fonts") or []], 0.05),
+        PromptSection("elements", "### Key Elements (box = left,top,width,height; non-default styles only):",
+                      [compact_json(compact_element(e, inherited)) for e in visual_context.get("elements") or []],
+                      0.35),
+        PromptSection("html", "## ORIGINAL HTML STRUCTURE ANALYSIS:",
+                      _text_items(summarize_html(context.get("html") or "")), 0.25),
+        PromptSection("assets", "### Downloaded Assets (use `url` in place of the original `src`):",
+                      asset_items(downloaded_assets(context.get("assets"))), 0.05),
+        PromptSection("links", "### Navigation Links:",
+                      [compact_json({k: v for k, v in link.items() if v})
+                       for link in visual_context.get("links") or []], 0.05),
+        PromptSection("images", "### Images:",
+                      [compact_json({k: v for k, v in image.items() if v})
+                       for image in visual_context.get("images") or []], 0.05)
+    ]
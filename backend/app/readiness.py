@@ -0,0 +1,130 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+
+# Resolves once no nodes or text have changed for `domQuietMs`, web fonts have
+# loaded and pending images have decoded, or when `timeoutMs` passes. Either way it
+# reports when each signal settled.
+READINESS_SCRIPT = """
+({ domQuietMs, timeoutMs }) => {
+    const start = performance.now();
+    const signals = {};
+    const settle = (name) => {
+        signals[name] = Math.round(performance.now() - start);
+    };
+
+    const fonts = (document.fonts ? document.fonts.ready : Promise.resolve())
+        .catch(() => {})
+        .then(() => settle('fonts'));
+
+    const pending = Array.from(document.images).filter(img => img.src && !img.complete);
+    const images = Promise.all(pending.map(img => img.decode().catch(() => {})))
+        .then(() => settle('images'));
+
+    const dom = new Promise(resolve => {
+        let timer;
+        const finish = () => {
+            observer.disconnect();
+            settle('dom');
+            resolve();
+        };
+        const observer = new MutationObserver(() => {
+            clearTimeout(timer);
+            timer = setTimeout(finish, domQuietMs);
+        });
+        // Structure and text only: animations, carousels and hover effects rewrite
+        // style and class attributes continuously, so the DOM would never look quiet
+        observer.observe(document, { subtree: true, childList: true, characterData: true });
+        timer = setTimeout(finish, domQuietMs);
+    });
+
+    const ready = Promise.all([fonts, images, dom]).then(() => ({ ready: true, signals }));
+    const cap = new Promise(resolve => setTimeout(() => resolve({ ready: false, signals }), timeoutMs));
+    return Promise.race([ready, cap]);
+}
+"""
+
+
+class NetworkTracker:
+    """Counts in-flight requests on a page so we can wait for network quiet.
+
+    Attach before navigation. Requests that stay open longer than `stall_ms`
+    (long polling, streaming) are ignored so they cannot hold the page hostage.
+    """
+
+    def __init__(self, page, stall_ms: float = 5000):
+        self.page = page
+        self.stall_ms = stall_ms
+        self._inflight: Dict[Any, float] = {}
+        self.last_activity = time.monotonic()
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_done)
+        page.on("requestfailed", self._on_done)
+
+    def _on_request(self, request):
+        self._inflight[request] = time.monotonic()
+        self.last_activity = time.monotonic()
+
+    def _on_done(self, request):
+        self._inflight.pop(request, None)
+        self.last_activity = time.monotonic()
+
+    def active_requests(self) -> int:
+        cutoff = time.monotonic() - self.stall_ms / 1000
+        return sum(1 for started in self._inflight.values() if started > cutoff)
+
+    async def wait_for_quiet(self, quiet_ms: float, poll_ms: float = 50):
+        while True:
+            idle_for = (time.monotonic() - self.last_activity) * 1000
+            if self.active_requests() == 0 and idle_for >= quiet_ms:
+                return
+            await asyncio.sleep(poll_ms / 1000)
+
+
+async def wait_for_page_ready(page,
+                              tracker: NetworkTracker,
+                              timeout: float,
+                              network_quiet_ms: Optional[float] = None,
+                              dom_quiet_ms: Optional[float] = None) -> Dict[str, Any]:
+    """Wait until the page is stable, or `timeout` seconds at most.
+
+    Returns which signals settled (ms after the wait started) and `signal`, the one
+    that settled last and so released the wait, or "timeout".
+    """
+    network_quiet_ms = network_quiet_ms or float(os.getenv("READINESS_NETWORK_QUIET_MS", "500"))
+    dom_quiet_ms = dom_quiet_ms or float(os.getenv("READINESS_DOM_QUIET_MS", "300"))
+    start = time.monotonic()
+    timeout_ms = timeout * 1000
+
+    async def network() -> Dict[str, Any]:
+        try:
+            await asyncio.wait_for(tracker.wait_for_quiet(network_quiet_ms), timeout=timeout)
+            return {"ready": True, "elapsed": round((time.monotonic() - start) * 1000)}
+        except asyncio.TimeoutError:
+            return {"ready": False}
+
+    async def in_page() -> Dict[str, Any]:
+        try:
+            return await page.evaluate(READINESS_SCRIPT, {
+                "domQuietMs": dom_quiet_ms,
+                "timeoutMs": timeout_ms
+            })
+        except Exception as e:
+            # Usually a client-side navigation destroyed the context; report what we have
+            print(f"Readiness script interrupted: {str(e)}")
+            return {"ready": False, "signals": {}}
+
+    network_state, page_state = await asyncio.gather(network(), in_page())
+
+    signals = dict(page_state.get("signals") or {})
+    if network_state["ready"]:
+        signals["network"] = network_state["elapsed"]
+    ready = network_state["ready"] and page_state.get("ready", False)
+
+    return {
+        "ready": ready,
+        "signal": max(signals, key=signals.get) if ready and signals else "timeout",
+        "elapsed_ms": round((time.monotonic() - start) * 1000),
+        "signals": signals
+    }
@@ -0,0 +1,137 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _pack(value: str) -> bytes:
+    return zlib.compress(value.encode("utf-8"), 6)
+
+
+def _unpack(value: bytes) -> str:
+    return zlib.decompress(value).decode("utf-8")
+
+
+class RegionStore:
+    """The last sectioned clone of each page, for incremental re-clones.
+
+    Per page (normalized URL) it keeps the shared stylesheet with the fingerprint of
+    its inputs, and each region's fingerprint with the fragment generated for it.
+    A re-clone regenerates only the regions whose fingerprints changed. Pages past
+    `max_pages` are dropped least recently updated first.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_pages: Optional[int] = None):
+        self.path = path or os.getenv("REGION_STORE_PATH", "region_store.sqlite3")
+        self.max_pages = max_pages or int(os.getenv("REGION_STORE_MAX_PAGES", "10000"))
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.lookups = 0
+        self.hits = 0
+        self.stores = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    page_key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    style_fingerprint TEXT NOT NULL,
+                    stylesheet BLOB NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS fragments (
+                    page_key TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    css BLOB NOT NULL,
+                    html BLOB NOT NULL,
+                    PRIMARY KEY (page_key, position)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS pages_updated_at ON pages (updated_at)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, page_key: str, model: str) -> Optional[Dict[str, Any]]:
+        """The page's last clone with this model: style_fingerprint, stylesheet and
+        fragments ({fingerprint: (name, css, html)}), or None"""
+        with self._lock:
+            conn = self._connect()
+            self.lookups += 1
+            page = conn.execute(
+                "SELECT style_fingerprint, stylesheet FROM pages WHERE page_key = ? AND model = ?",
+                (page_key, model)
+            ).fetchone()
+            if page is None:
+                return None
+            rows = conn.execute(
+                "SELECT name, fingerprint, css, html FROM fragments WHERE page_key = ? ORDER BY position",
+                (page_key,)
+            ).fetchall()
+            self.hits += 1
+        return {
+            "style_fingerprint": page[0],
+            "stylesheet": _unpack(page[1]),
+            "fragments": {fingerprint: (name, _unpack(css), _unpack(html)) for name, fingerprint, css, html in rows}
+        }
+
+    def put(self, page_key: str, model: str, style_fingerprint: str, stylesheet: str,
+            fragments: List[Tuple[str, str, str, str]]):
+        """Replace the page's record; fragments are (name, fingerprint, css, html) in page order"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (page_key, model, style_fingerprint, stylesheet, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (page_key, model, style_fingerprint, _pack(stylesheet), time.time())
+            )
+            conn.execute("DELETE FROM fragments WHERE page_key = ?", (page_key,))
+            conn.executemany(
+                "INSERT INTO fragments (page_key, position, name, fingerprint, css, html) VALUES (?, ?, ?, ?, ?, ?)",
+                [(page_key, position, name, fingerprint, _pack(css), _pack(html))
+                 for position, (name, fingerprint, css, html) in enumerate(fragments)]
+            )
+            self._evict(conn)
+            conn.commit()
+            self.stores += 1
+
+    def _evict(self, conn: sqlite3.Connection):
+        excess = conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0] - self.max_pages
+        if excess <= 0:
+            return
+        stale = [row[0] for row in conn.execute(
+            "SELECT page_key FROM pages ORDER BY updated_at LIMIT ?", (excess,)
+        ).fetchall()]
+        conn.executemany("DELETE FROM pages WHERE page_key = ?", [(key,) for key in stale])
+        conn.executemany("DELETE FROM fragments WHERE page_key = ?", [(key,) for key in stale])
+
+    async def aget(self, page_key: str, model: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get, page_key, model)
+
+    async def aput(self, page_key: str, model: str, style_fingerprint: str, stylesheet: str,
+                   fragments: List[Tuple[str, str, str, str]]):
+        await asyncio.to_thread(self.put, page_key, model, style_fingerprint, stylesheet, fragments)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pages = self._connect().execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        return {
+            "path": self.path,
+            "pages": pages,
+            "max_pages": self.max_pages,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "stores": self.stores
+        }
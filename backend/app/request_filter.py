@@ -0,0 +1,187 @@
+import os
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+# Ad, analytics and tracking hosts; subdomains match too
+DEFAULT_BLOCKED_DOMAINS = {
+    "google-analytics.com", "googletagmanager.com", "googletagservices.com",
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "adservice.google.com",
+    "connect.facebook.net", "analytics.tiktok.com", "snap.licdn.com", "static.ads-twitter.com",
+    "bat.bing.com", "ct.pinterest.com", "mc.yandex.ru",
+    "hotjar.com", "clarity.ms", "fullstory.com", "mouseflow.com", "crazyegg.com",
+    "segment.io", "segment.com", "mixpanel.com", "amplitude.com", "heapanalytics.com",
+    "js-agent.newrelic.com", "bam.nr-data.net", "optimizely.com",
+    "criteo.com", "criteo.net", "taboola.com", "outbrain.com", "adnxs.com",
+    "amazon-adsystem.com", "scorecardresearch.com", "quantserve.com", "moatads.com",
+    "hs-analytics.net", "hs-banner.com"
+}
+
+# Resource types that never contribute to the visual context we extract
+STANDARD_BLOCKED_TYPES = {"media", "texttrack", "eventsource", "websocket", "manifest"}
+
+# Rough transfer sizes per resource type, used to estimate what blocking saved
+ESTIMATED_BYTES = {
+    "media": 1_500_000,
+    "image": 60_000,
+    "font": 40_000,
+    "script": 30_000,
+    "stylesheet": 15_000,
+    "document": 50_000,
+    "manifest": 1_000
+}
+DEFAULT_ESTIMATED_BYTES = 5_000
+
+# Kept in light mode: vector and icon images are small and often part of the layout
+LIGHT_KEPT_IMAGE_SUFFIXES = (".svg", ".ico")
+
+MAX_REPORTED_URLS = 200
+
+# CDP Network.ResourceType names; Playwright's resource types are these lowercased
+CDP_RESOURCE_TYPES = {
+    name.lower(): name for name in (
+        "Document", "Stylesheet", "Image", "Media", "Font", "Script", "TextTrack", "XHR", "Fetch",
+        "Prefetch", "EventSource", "WebSocket", "Manifest", "Ping", "Other"
+    )
+}
+
+
+def _extra_blocked_domains() -> set:
+    return {d.strip().lower() for d in os.getenv("REQUEST_BLOCKLIST_EXTRA", "").split(",") if d.strip()}
+
+
+class RequestFilter:
+    """Aborts requests that don't contribute to a scrape, via page.route.
+
+    Modes:
+    - "standard": blocklisted ad/analytics domains plus media, websockets,
+      event streams and similar resource types
+    - "light": standard, plus raster images. Their URLs are still in the DOM, so
+      asset extraction keeps them, and they're listed in the report
+
+    The main document is never blocked. `report()` summarizes what was blocked and
+    estimates the bytes saved.
+
+    Playwright turns the HTTP cache off for routed pages, so pages that should
+    share a cache (crawls) use `attach_cdp` instead, which intercepts the blocked
+    domains and resource types through the CDP Fetch domain and applies the same
+    rules; responses served from the cache aren't intercepted at all.
+    """
+
+    def __init__(self,
+                 mode: str = "standard",
+                 resource_types: Optional[Iterable[str]] = None,
+                 domains: Optional[Iterable[str]] = None):
+        self.mode = mode
+        self.blocked_types = set(STANDARD_BLOCKED_TYPES) | set(resource_types or [])
+        if mode == "light":
+            self.blocked_types.add("image")
+        self.blocked_domains = DEFAULT_BLOCKED_DOMAINS | _extra_blocked_domains() | \
+            {d.lower() for d in (domains or [])}
+
+        self.allowed = 0
+        self.blocked_by_type: Dict[str, int] = {}
+        self.blocked_by_domain: Dict[str, int] = {}
+        self.estimated_bytes_saved = 0
+        self.blocked_asset_urls = []
+        self.method = "route"
+
+    async def attach(self, page):
+        await page.route("**/*", self._handle)
+
+    def cdp_patterns(self) -> List[Dict[str, str]]:
+        """Fetch.enable patterns: every request to a blocked domain, and every
+        request of a blocked type. Paused requests are then judged by _block_reason."""
+        patterns = []
+        for domain in sorted(self.blocked_domains):
+            patterns += [{"urlPattern": f"*://{domain}/*"}, {"urlPattern": f"*://*.{domain}/*"}]
+        for resource_type in sorted(self.blocked_types):
+            if resource_type in CDP_RESOURCE_TYPES:
+                patterns.append({"urlPattern": "*", "resourceType": CDP_RESOURCE_TYPES[resource_type]})
+        return patterns
+
+    async def attach_cdp(self, page) -> bool:
+        """Block through CDP Fetch interception, keeping the HTTP cache on.
+        Returns False (nothing blocked) where CDP isn't available."""
+        try:
+            session = await page.context.new_cdp_session(page)
+            frame_tree = await session.send("Page.getFrameTree")
+            main_frame_id = frame_tree["frameTree"]["frame"]["id"]
+
+            async def paused(event):
+                await self._handle_cdp(session, main_frame_id, event)
+
+            session.on("Fetch.requestPaused", paused)
+            await session.send("Fetch.enable", {"patterns": self.cdp_patterns()})
+        except Exception as e:
+            print(f"CDP request blocking unavailable, not blocking: {str(e)}")
+            self.method = "none"
+            return False
+        self.method = "cdp"
+        return True
+
+    def _blocked_domain(self, host: str) -> Optional[str]:
+        # Check the host and each parent domain: a.b.example.com, b.example.com, example.com
+        parts = host.split(".")
+        for i in range(len(parts) - 1):
+            candidate = ".".join(parts[i:])
+            if candidate in self.blocked_domains:
+                return candidate
+        return None
+
+    def _block_reason(self, url: str, resource_type: str, main_document: bool) -> Optional[str]:
+        if main_document:
+            return None
+
+        domain = self._blocked_domain((urlsplit(url).hostname or "").lower())
+        if domain:
+            self.blocked_by_domain[domain] = self.blocked_by_domain.get(domain, 0) + 1
+            return "domain"
+
+        if resource_type in self.blocked_types:
+            if resource_type == "image" and self.mode == "light":
+                if urlsplit(url).path.lower().endswith(LIGHT_KEPT_IMAGE_SUFFIXES):
+                    return None
+                if len(self.blocked_asset_urls) < MAX_REPORTED_URLS:
+                    self.blocked_asset_urls.append(url)
+            return "type"
+        return None
+
+    def _count_blocked(self, resource_type: str):
+        self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+        self.estimated_bytes_saved += ESTIMATED_BYTES.get(resource_type, DEFAULT_ESTIMATED_BYTES)
+
+    async def _handle(self, route, request):
+        main_document = request.is_navigation_request() and request.frame.parent_frame is None
+        if self._block_reason(request.url, request.resource_type, main_document) is None:
+            self.allowed += 1
+            await route.continue_()
+            return
+        self._count_blocked(request.resource_type)
+        await route.abort("blockedbyclient")
+
+    async def _handle_cdp(self, session, main_frame_id: str, event: Dict[str, Any]):
+        resource_type = (event.get("resourceType") or "other").lower()
+        main_document = resource_type == "document" and event.get("frameId") == main_frame_id
+        request_id = event["requestId"]
+        try:
+            if self._block_reason(event["request"]["url"], resource_type, main_document) is None:
+                self.allowed += 1
+                await session.send("Fetch.continueRequest", {"requestId": request_id})
+                return
+            self._count_blocked(resource_type)
+            await session.send("Fetch.failRequest", {"requestId": request_id, "errorReason": "BlockedByClient"})
+        except Exception as e:
+            # The page may have navigated away or closed with the request paused
+            print(f"CDP request filter warning: {str(e)}")
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "method": self.method,
+            "allowed": self.allowed,
+            "blocked": sum(self.blocked_by_type.values()),
+            "blocked_by_type": self.blocked_by_type,
+            "blocked_by_domain": self.blocked_by_domain,
+            "estimated_bytes_saved": self.estimated_bytes_saved,
+            "blocked_asset_urls": self.blocked_asset_urls
+        }
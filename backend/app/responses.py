@@ -0,0 +1,114 @@
+import asyncio
+import gzip
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import Response
+
+# Optional fast paths; each falls back to (or is skipped for) the stdlib equivalent
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "5"))
+ZSTD_LEVEL = int(os.getenv("RESPONSE_ZSTD_LEVEL", "3"))
+# Bodies from this size are compressed in a worker thread instead of on the event loop
+OFFLOAD_MIN_BYTES = int(os.getenv("RESPONSE_OFFLOAD_MIN_BYTES", "262144"))
+
+
+def available_encodings() -> List[str]:
+    """Supported content codings, in server preference order"""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON, with orjson when it's installed"""
+    if orjson is not None:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the content coding to use for an Accept-Encoding header, or None for identity"""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[name] = quality
+
+    best: Tuple[float, int, Optional[str]] = (0.0, 0, None)
+    supported = available_encodings()
+    for rank, encoding in enumerate(supported):
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        # Highest client weight wins; ties go to the server's preferred coding
+        candidate = (quality, len(supported) - rank, encoding)
+        if quality > 0 and candidate > best:
+            best = candidate
+    return best[2]
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+async def fast_json_response(content: Any,
+                             accept_encoding: Optional[str] = None,
+                             status_code: int = 200,
+                             headers: Optional[Dict[str, str]] = None) -> Response:
+    """JSON response serialized with orjson and compressed per Accept-Encoding.
+
+    `content` must already be plain JSON data (dicts, lists, strings, numbers);
+    it skips FastAPI's response_model validation and jsonable_encoder. Bodies
+    under RESPONSE_COMPRESSION_MIN_BYTES are sent uncompressed, and bodies from
+    RESPONSE_OFFLOAD_MIN_BYTES are compressed in a worker thread.
+    """
+    # orjson handles megabytes in about a millisecond; the stdlib encoder is an
+    # order of magnitude slower, so without orjson serialization is offloaded too
+    body = dumps(content) if orjson is not None else await asyncio.to_thread(dumps, content)
+    response_headers = dict(headers or {})
+    response_headers["Vary"] = "Accept-Encoding"
+    encoding = negotiate_encoding(accept_encoding) if len(body) >= COMPRESSION_MIN_BYTES else None
+    if encoding:
+        if len(body) >= OFFLOAD_MIN_BYTES:
+            body = await asyncio.to_thread(compress, body, encoding)
+        else:
+            body = compress(body, encoding)
+        response_headers["Content-Encoding"] = encoding
+    return Response(content=body, status_code=status_code, headers=response_headers,
+                    media_type="application/json")
@@ -0,0 +1,265 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that never change what a page renders
+TRACKING_PARAMS = re.compile(r"^(utm_[a-z]+|gclid|fbclid|mc_cid|mc_eid|ref|ref_src)$", re.IGNORECASE)
+
+# ScrapingRequest fields that do not affect the scraped content
+NON_KEY_FIELDS = {"url", "timeout", "readiness_timeout"}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for cache keys and de-duplication"""
+    parts = urlsplit(str(url).strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not TRACKING_PARAMS.match(k)
+    ))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def scrape_cache_key(request) -> str:
+    """Cache key for a ScrapingRequest: normalized URL plus every content-affecting option"""
+    options = {
+        name: value for name, value in request.model_dump(mode="json").items()
+        if name not in NON_KEY_FIELDS
+    }
+    payload = json.dumps([normalize_url(request.url), options], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class CachePolicy:
+    """Per-request cache behaviour, derived from request headers.
+
+    - `Cache-Control: no-store` skips the cache entirely
+    - `Cache-Control: no-cache` forces a fresh scrape but stores the result
+    - `Cache-Control: max-age=N` only accepts entries younger than N seconds
+    - `X-Cache-TTL: N` stores the fresh result for N seconds instead of the default
+
+    After the lookup, `outcome` is HIT, MISS or BYPASS and `age` is the entry age.
+    """
+
+    def __init__(self,
+                 read: bool = True,
+                 write: bool = True,
+                 max_age: Optional[float] = None,
+                 ttl: Optional[float] = None):
+        self.read = read
+        self.write = write
+        self.max_age = max_age
+        self.ttl = ttl
+        self.outcome = "BYPASS"
+        self.age: Optional[float] = None
+
+    @classmethod
+    def from_headers(cls, headers: Mapping[str, str]) -> "CachePolicy":
+        policy = cls()
+        directives = [d.strip().lower() for d in headers.get("cache-control", "").split(",") if d.strip()]
+        for directive in directives:
+            if directive == "no-store":
+                policy.read = policy.write = False
+            elif directive == "no-cache":
+                policy.read = False
+            elif directive.startswith("max-age="):
+                try:
+                    policy.max_age = float(directive.split("=", 1)[1])
+                except ValueError:
+                    pass
+        ttl = headers.get("x-cache-ttl")
+        if ttl:
+            try:
+                policy.ttl = float(ttl)
+            except ValueError:
+                pass
+        return policy
+
+    def response_headers(self) -> Dict[str, str]:
+        headers = {"X-Cache": self.outcome}
+        if self.outcome == "HIT" and self.age is not None:
+            headers["Age"] = str(int(self.age))
+        return headers
+
+
+class ScrapeCache:
+    """Two-tier TTL cache of scrape results.
+
+    The memory tier is an LRU bounded by total serialized size. The optional disk
+    tier keeps zlib-compressed JSON blobs in `disk_dir`, bounded by `disk_max_bytes`
+    and evicted oldest-first. Disk hits are promoted back into memory.
+    """
+
+    def __init__(self,
+                 max_memory_bytes: Optional[int] = None,
+                 default_ttl: Optional[float] = None,
+                 disk_dir: Optional[str] = None,
+                 disk_max_bytes: Optional[int] = None):
+        self.max_memory_bytes = max_memory_bytes or int(float(os.getenv("SCRAPE_CACHE_MEMORY_MB", "256")) * 1024 * 1024)
+        self.default_ttl = default_ttl or float(os.getenv("SCRAPE_CACHE_TTL", "3600"))
+        self.disk_dir = disk_dir if disk_dir is not None else os.getenv("SCRAPE_CACHE_DIR") or None
+        self.disk_max_bytes = disk_max_bytes or int(float(os.getenv("SCRAPE_CACHE_DISK_MB", "2048")) * 1024 * 1024)
+
+        # key -> (created_at, expires_at, serialized json)
+        self._memory: "OrderedDict[str, Tuple[float, float, bytes]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_lock = threading.Lock()
+        self._disk_bytes = 0
+        self.stats_counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expired": 0
+        }
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_bytes = sum(
+                entry.stat().st_size for entry in os.scandir(self.disk_dir) if entry.is_file()
+            )
+
+    # Memory tier
+
+    def _memory_get(self, key: str) -> Optional[Tuple[float, float, bytes]]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+        return entry
+
+    def _memory_put(self, key: str, created: float, expires: float, data: bytes):
+        if len(data) > self.max_memory_bytes:
+            return
+        self._memory_drop(key)
+        self._memory[key] = (created, expires, data)
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, (_, _, evicted) = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.stats_counters["evictions"] += 1
+
+    def _memory_drop(self, key: str):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= len(entry[2])
+
+    # Disk tier (blocking; called from a worker thread)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json.z")
+
+    def _disk_get(self, key: str) -> Optional[Tuple[float, float, bytes]]:
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                blob = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            header, data = zlib.decompress(blob).split(b"\n", 1)
+            created, expires = (float(v) for v in header.split(b" "))
+        except (zlib.error, ValueError):
+            self._disk_drop(key)
+            return None
+        return created, expires, data
+
+    def _disk_put(self, key: str, created: float, expires: float, data: bytes):
+        blob = zlib.compress(f"{created} {expires}\n".encode() + data, 6)
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(blob)
+        with self._disk_lock:
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            self._disk_bytes += len(blob) - previous
+            if self._disk_bytes > self.disk_max_bytes:
+                self._disk_evict()
+
+    def _disk_drop(self, key: str):
+        path = self._disk_path(key)
+        with self._disk_lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                self._disk_bytes -= size
+            except FileNotFoundError:
+                pass
+
+    def _disk_evict(self):
+        entries = sorted(
+            (entry for entry in os.scandir(self.disk_dir) if entry.is_file()),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in entries:
+            if self._disk_bytes <= self.disk_max_bytes * 0.9:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                self._disk_bytes -= size
+                self.stats_counters["evictions"] += 1
+            except FileNotFoundError:
+                continue
+
+    # Public API
+
+    async def get(self, key: str, max_age: Optional[float] = None) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Return (value, age in seconds) for a fresh entry, or None"""
+        now = time.time()
+        entry = self._memory_get(key)
+        tier = "memory_hits"
+        if entry is None and self.disk_dir:
+            entry = await asyncio.to_thread(self._disk_get, key)
+            tier = "disk_hits"
+            if entry is not None:
+                self._memory_put(key, *entry)
+
+        if entry is not None:
+            created, expires, data = entry
+            age = now - created
+            if expires <= now:
+                self.stats_counters["expired"] += 1
+                self._memory_drop(key)
+                if self.disk_dir:
+                    await asyncio.to_thread(self._disk_drop, key)
+            elif max_age is None or age <= max_age:
+                self.stats_counters[tier] += 1
+                return json.loads(data), age
+
+        self.stats_counters["misses"] += 1
+        return None
+
+    async def put(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None):
+        created = time.time()
+        expires = created + (ttl if ttl is not None else self.default_ttl)
+        data = json.dumps(value, separators=(",", ":")).encode()
+        self._memory_put(key, created, expires, data)
+        if self.disk_dir:
+            await asyncio.to_thread(self._disk_put, key, created, expires, data)
+        self.stats_counters["stores"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.stats_counters["memory_hits"] + self.stats_counters["disk_hits"]
+        lookups = hits + self.stats_counters["misses"]
+        return {
+            **self.stats_counters,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_enabled": bool(self.disk_dir),
+            "disk_bytes": self._disk_bytes if self.disk_dir else 0
+        }
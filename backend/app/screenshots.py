@@ -0,0 +1,70 @@
+import base64
+from typing import Any, Dict, Optional, Tuple
+
+CONTENT_TYPES = {
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp"
+}
+
+
+async def capture_screenshot(page,
+                             image_format: str = "jpeg",
+                             quality: int = 80,
+                             max_dimension: Optional[int] = None,
+                             full_page: bool = True) -> Tuple[bytes, Dict[str, Any]]:
+    """Capture the page as PNG, JPEG or WebP, downscaled so neither side exceeds `max_dimension`.
+
+    Uses CDP Page.captureScreenshot so the browser encodes and scales the image
+    itself. Browsers without CDP fall back to page.screenshot, which supports PNG
+    and JPEG at full size only.
+    """
+    try:
+        cdp = await page.context.new_cdp_session(page)
+    except Exception as e:
+        print(f"CDP unavailable for screenshot, using page.screenshot: {str(e)}")
+        cdp = None
+
+    if cdp is None:
+        fallback_format = "png" if image_format == "png" else "jpeg"
+        options = {"full_page": full_page, "type": fallback_format}
+        if fallback_format == "jpeg":
+            options["quality"] = quality
+        data = await page.screenshot(**options)
+        return data, {"format": fallback_format, "scale": 1.0, "bytes": len(data)}
+
+    try:
+        metrics = await cdp.send("Page.getLayoutMetrics")
+        if full_page:
+            content = metrics.get("cssContentSize") or metrics["contentSize"]
+            width, height = content["width"], content["height"]
+        else:
+            viewport = metrics.get("cssLayoutViewport") or metrics["layoutViewport"]
+            width, height = viewport["clientWidth"], viewport["clientHeight"]
+
+        scale = 1.0
+        if max_dimension and max(width, height) > max_dimension:
+            scale = max_dimension / max(width, height)
+
+        params = {
+            "format": image_format,
+            "captureBeyondViewport": full_page,
+            "clip": {"x": 0, "y": 0, "width": width, "height": height, "scale": scale}
+        }
+        if image_format != "png":
+            params["quality"] = quality
+        result = await cdp.send("Page.captureScreenshot", params)
+    finally:
+        try:
+            await cdp.detach()
+        except Exception:
+            pass
+
+    data = base64.b64decode(result["data"])
+    return data, {
+        "format": image_format,
+        "width": round(width * scale),
+        "height": round(height * scale),
+        "scale": round(scale, 4),
+        "bytes": len(data)
+    }
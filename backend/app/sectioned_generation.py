@@ -0,0 +1,746 @@
+import asyncio
+import hashlib
+import os
+import re
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from langchain.schema import HumanMessage, SystemMessage
+
+from . import llm_workflow_updated as workflow
+from .admission import Overloaded
+from .compact_dom import CompactDOM, is_compact
+from .metrics import GENERATION_STAGE_SECONDS, GENERATIONS_TOTAL, REGIONS_TOTAL
+from .prompt_builder import (
+    INHERITED_FIELDS, PromptBuild, PromptSection, asset_items, assemble_prompt, compact_element, compact_json,
+    count_tokens, downloaded_assets
+)
+from .region_store import RegionStore
+from .scrape_cache import normalize_url
+
+# Most regions (header and footer included) a page is split into, i.e. concurrent model calls
+SECTIONED_MAX_REGIONS = int(os.getenv("SECTIONED_MAX_REGIONS", "6"))
+STYLESHEET_TOKEN_BUDGET = int(os.getenv("SECTIONED_STYLESHEET_TOKEN_BUDGET", "3000"))
+REGION_TOKEN_BUDGET = int(os.getenv("SECTIONED_REGION_TOKEN_BUDGET", "4000"))
+
+SKIPPED_TAGS = {"script", "style", "noscript", "template", "link", "meta", "svg", "iframe"}
+HEADER_TAGS = {"header", "nav"}
+OUTLINE_ATTRS = ("href", "src", "alt", "type", "placeholder")
+MAX_OUTLINE_TEXT = 80
+
+region_store = RegionStore()
+
+
+class Region:
+    """A contiguous landmark slice of the page body, generated by its own model call"""
+
+    def __init__(self, kind: str, nodes: List[Dict[str, Any]]):
+        self.kind = kind
+        self.nodes = nodes
+        self.name = kind
+        self.elements: List[Dict[str, Any]] = []
+        # Downloaded images and backgrounds used inside the region
+        self.assets: List[Dict[str, Any]] = []
+        self.fingerprint = ""
+
+    @property
+    def css_class(self) -> str:
+        return f"region-{self.name}"
+
+    @property
+    def size(self) -> int:
+        return sum(_subtree_size(node) for node in self.nodes)
+
+    def root_tag(self) -> str:
+        if self.kind == "header":
+            return "header"
+        if self.kind == "footer":
+            return "footer"
+        return "section"
+
+    def outline(self) -> List[str]:
+        lines: List[str] = []
+        for node in self.nodes:
+            _outline(node, 0, lines)
+        return lines
+
+    def describe(self) -> str:
+        first = self.nodes[0]
+        ident = "".join([f"#{first['id']}" if first.get("id") else ""] +
+                        [f".{c}" for c in (first.get("classes") or [])[:2]])
+        return f"{self.name}: {len(self.nodes)} top-level <{first.get('tag')}{ident}> block(s), {self.size} elements"
+
+
+def _fingerprint(value: Any) -> str:
+    return hashlib.sha256(compact_json(value).encode()).hexdigest()
+
+
+def _canonical(node: Dict[str, Any]) -> List[Any]:
+    return [node.get("tag"), node.get("id"), node.get("classes") or [], node.get("attributes") or {},
+            node.get("text"), [_canonical(child) for child in node.get("children") or []
+                               if child.get("tag") not in SKIPPED_TAGS]]
+
+
+def region_fingerprint(region: "Region") -> str:
+    """Hash of the region's DOM subtrees and its elements' computed styles. Element
+    positions are left out, so a change above a region doesn't invalidate it."""
+    elements = []
+    for element in region.elements:
+        compact = compact_element(element)
+        compact.pop("box", None)
+        elements.append(compact)
+    return _fingerprint([[_canonical(node) for node in region.nodes], elements,
+                         [asset["local_url"] for asset in region.assets]])
+
+
+def style_fingerprint(context: Dict[str, Any], regions: List["Region"]) -> str:
+    """Hash of what the shared stylesheet is written from, other than page content"""
+    visual_context = context.get("visual_context") or {}
+    return _fingerprint([
+        visual_context.get("layout") or {},
+        visual_context.get("colors") or [],
+        visual_context.get("fonts") or [],
+        [region.css_class for region in regions],
+        [asset["local_url"] for asset in stylesheet_assets(context)],
+        STYLESHEET_FOOTER
+    ])
+
+
+def _subtree_size(node: Dict[str, Any]) -> int:
+    return 1 + sum(_subtree_size(child) for child in node.get("children") or [])
+
+
+def _outline(node: Dict[str, Any], depth: int, lines: List[str]):
+    tag = node.get("tag") or ""
+    if tag in SKIPPED_TAGS:
+        return
+    label = tag
+    if node.get("id"):
+        label += f"#{node['id']}"
+    for name in (node.get("classes") or [])[:3]:
+        label += f".{name}"
+    attributes = node.get("attributes") or {}
+    details = [f'{name}="{attributes[name][:100]}"' for name in OUTLINE_ATTRS if attributes.get(name)]
+    text = " ".join((node.get("text") or "").split())[:MAX_OUTLINE_TEXT]
+    line = "  " * depth + "<" + " ".join([label] + details) + ">"
+    if text:
+        line += f" {text}"
+    lines.append(line)
+    for child in node.get("children") or []:
+        _outline(child, depth + 1, lines)
+
+
+def _dom_tree(context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    dom_structure = context.get("dom_structure")
+    if not dom_structure:
+        return None
+    if is_compact(dom_structure):
+        dom = CompactDOM(dom_structure)
+        return dom.to_tree() if len(dom) else None
+    return dom_structure
+
+
+def _kind(node: Dict[str, Any]) -> str:
+    tag = node.get("tag") or ""
+    names = set(node.get("classes") or []) | {node.get("id") or ""}
+    if tag in HEADER_TAGS or names & {"header", "navbar", "site-header", "topbar"}:
+        return "header"
+    if tag == "footer" or names & {"footer", "site-footer"}:
+        return "footer"
+    if names & {"hero", "banner", "jumbotron"}:
+        return "hero"
+    return "section"
+
+
+def _top_level_blocks(body: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Body children worth generating separately: single wrappers (app roots, page
+    containers) and <main> are opened up so their sections become the blocks"""
+    blocks = [c for c in body.get("children") or [] if c.get("tag") not in SKIPPED_TAGS]
+    while len(blocks) == 1 and blocks[0].get("children") and _kind(blocks[0]) == "section":
+        blocks = [c for c in blocks[0]["children"] if c.get("tag") not in SKIPPED_TAGS]
+    expanded = []
+    for block in blocks:
+        inner = [c for c in block.get("children") or [] if c.get("tag") not in SKIPPED_TAGS]
+        if block.get("tag") == "main" and len(inner) > 1:
+            expanded.extend(inner)
+        else:
+            expanded.append(block)
+    return expanded
+
+
+def _balanced_groups(blocks: List[Dict[str, Any]], count: int) -> List[List[Dict[str, Any]]]:
+    """Split blocks, in order, into at most `count` runs of roughly equal element
+    count, since the largest run sets the wall time"""
+    if len(blocks) <= count:
+        return [[block] for block in blocks]
+    sizes = [_subtree_size(block) for block in blocks]
+    target = sum(sizes) / count
+    groups: List[List[Dict[str, Any]]] = [[]]
+    filled = 0
+    for index, (block, size) in enumerate(zip(blocks, sizes)):
+        remaining_blocks = len(blocks) - index
+        remaining_groups = count - len(groups)
+        if groups[-1] and (filled + size / 2 > target or remaining_blocks <= remaining_groups) \
+                and remaining_groups > 0:
+            groups.append([])
+            filled = 0
+        groups[-1].append(block)
+        filled += size
+    return groups
+
+
+def _element_matches(element: Dict[str, Any], node: Dict[str, Any]) -> bool:
+    if (element.get("tagName") or "").lower() != node.get("tag"):
+        return False
+    if element.get("id") or node.get("id"):
+        return (element.get("id") or None) == (node.get("id") or None)
+    class_name = element.get("className") if isinstance(element.get("className"), str) else ""
+    return class_name.split() == (node.get("classes") or [])
+
+
+def _assign_elements(regions: List[Region], elements: List[Dict[str, Any]]):
+    """Give each region the visual_context elements that fall in its vertical band.
+    Bands start at the top of the element matching the region's first block."""
+    bands: List[Tuple[float, Region]] = []
+    for region in regions:
+        first = region.nodes[0]
+        for element in elements:
+            if _element_matches(element, first):
+                bands.append(((element.get("position") or {}).get("top") or 0, region))
+                break
+    if not bands:
+        return
+    bands.sort(key=lambda band: band[0])
+    for element in elements:
+        top = (element.get("position") or {}).get("top") or 0
+        owner = bands[0][1]
+        for band_top, region in bands:
+            if band_top <= top + 1:
+                owner = region
+        owner.elements.append(element)
+
+
+def stylesheet_assets(context: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Downloaded font stylesheets and background images, for the shared stylesheet"""
+    return downloaded_assets(context.get("assets"), ("font", "background-image"))
+
+
+def _walk(node: Dict[str, Any]):
+    yield node
+    for child in node.get("children") or []:
+        yield from _walk(child)
+
+
+def _assign_assets(regions: List[Region], context: Dict[str, Any]):
+    """Give each region the downloaded images its subtree references (by resolved
+    src) and the backgrounds of elements whose classes it contains"""
+    base = context.get("url") or ""
+    for asset in downloaded_assets(context.get("assets"), ("image", "background-image")):
+        classes = set((asset.get("className") or "").split())
+        for region in regions:
+            nodes = [node for top in region.nodes for node in _walk(top)]
+            if asset["type"] == "image":
+                found = any(urljoin(base, (node.get("attributes") or {}).get("src") or "") == asset["src"]
+                            for node in nodes if (node.get("attributes") or {}).get("src"))
+            else:
+                found = bool(classes) and any(classes <= set(node.get("classes") or []) for node in nodes)
+            if found:
+                region.assets.append(asset)
+                break
+
+
+def split_regions(context: Dict[str, Any], max_regions: Optional[int] = None) -> List[Region]:
+    """Landmark regions of the page, in document order. Fewer than two means the
+    page isn't worth splitting."""
+    body = _dom_tree(context)
+    if not body:
+        return []
+    blocks = _top_level_blocks(body)
+    head: List[Dict[str, Any]] = []
+    while blocks and _kind(blocks[0]) == "header":
+        head.append(blocks.pop(0))
+    tail: List[Dict[str, Any]] = []
+    while blocks and _kind(blocks[-1]) == "footer":
+        tail.insert(0, blocks.pop())
+
+    regions = []
+    if head:
+        regions.append(Region("header", head))
+    if blocks and _kind(blocks[0]) == "hero":
+        regions.append(Region("hero", [blocks.pop(0)]))
+    groups = _balanced_groups(blocks, max(1, (max_regions or SECTIONED_MAX_REGIONS) - len(regions) - bool(tail)))
+    for index, group in enumerate(groups):
+        region = Region("section", group)
+        region.name = f"section-{index + 1}"
+        regions.append(region)
+    if tail:
+        regions.append(Region("footer", tail))
+
+    _assign_elements(regions, (context.get("visual_context") or {}).get("elements") or [])
+    _assign_assets(regions, context)
+    for region in regions:
+        region.fingerprint = region_fingerprint(region)
+    return regions
+
+
+STYLESHEET_HEADER = """You are a world-class web designer. A website is being cloned region by region; write the shared stylesheet every region will use.
+
+## WEBSITE INFORMATION:
+- Title: {title}
+- Meta Description: {description}
+
+## PAGE REGIONS (in order; each is the root element's class):
+{regions}
+
+## VISUAL DESIGN CONTEXT:"""
+
+STYLESHEET_FOOTER = """## REQUIREMENTS:
+1. CSS custom properties on :root for the palette, font families and spacing scale
+2. Base styles: reset, body, typography scale, links, buttons, images
+3. Layout rules for each region class listed above (.region-header, .region-footer, ...)
+4. Reusable component classes (container, grid, card, button variants) the regions can share
+5. Responsive breakpoints
+6. Downloaded assets: @import font stylesheets by their `url` at the very top, and use background image `url`s in place of the originals
+
+## OUTPUT FORMAT:
+Return ONLY the CSS. No <style> tags, no explanations, no code blocks."""
+
+REGION_HEADER = """You are a world-class front-end developer. A website is being cloned region by region. Write the HTML for ONE region of the page, styled with the shared stylesheet below.
+
+## WEBSITE: {title}
+
+## REGION: {region} ({position} of {total})
+
+## SHARED STYLESHEET (already in the page):
+{stylesheet}"""
+
+REGION_FOOTER = """## REQUIREMENTS:
+1. Return ONE <{tag} class="{css_class}"> element containing the whole region, and nothing else
+2. No <!DOCTYPE>, <html>, <head> or <body>; no JavaScript
+3. Reuse the shared stylesheet's classes and custom properties
+4. Extra CSS only if needed, in a single <style> block before the element, with every selector starting with .{css_class}
+5. Match the original's text, structure and layout; use the Region Assets `url`s for their images, https://via.placeholder.com for any other image
+
+## OUTPUT FORMAT:
+Return ONLY the HTML. No explanations, no code blocks."""
+
+SECTIONED_SYSTEM_MESSAGE = """You are an expert web designer and front-end developer specializing in pixel-perfect website replication with modern, semantic HTML and CSS. Return only the code you are asked for."""
+
+
+def build_stylesheet_prompt(context: Dict[str, Any], regions: List[Region],
+                            token_budget: Optional[int] = None) -> PromptBuild:
+    meta = context.get("meta_data") or {}
+    header = STYLESHEET_HEADER.format(
+        title=context.get("title", ""),
+        description=meta.get("description", "N/A"),
+        regions="\n".join(f"- .{region.css_class}: {region.describe()}" for region in regions)
+    )
+    visual_context = context.get("visual_context") or {}
+    layout = visual_context.get("layout") or {}
+    inherited = {name: layout.get(name) for name in INHERITED_FIELDS}
+    sections = [
+        PromptSection("layout", "### Layout Structure:",
+                      [compact_json({k: v for k, v in layout.items() if v not in (None, "")})] if layout else [],
+                      0.1),
+        PromptSection("colors", "### Color Palette:", [str(c) for c in visual_context.get("colors") or []], 0.1),
+        PromptSection("fonts", "### Typography (family|size|weight):",
+                      [str(f) for f in visual_context.get("fonts") or []], 0.1),
+        PromptSection("elements", "### Key Elements (box = left,top,width,height; non-default styles only):",
+                      [compact_json(compact_element(e, inherited)) for e in visual_context.get("elements") or []],
+                      0.5),
+        PromptSection("assets", "### Downloaded Assets (use `url` in place of the original `src`):",
+                      asset_items(stylesheet_assets(context)), 0.05)
+    ]
+    return assemble_prompt(header, sections, STYLESHEET_FOOTER, token_budget or STYLESHEET_TOKEN_BUDGET)
+
+
+def build_region_prompt(context: Dict[str, Any], regions: List[Region], index: int, stylesheet: str,
+                        token_budget: Optional[int] = None) -> PromptBuild:
+    region = regions[index]
+    header = REGION_HEADER.format(
+        title=context.get("title", ""),
+        region=region.describe(),
+        position=index + 1,
+        total=len(regions),
+        stylesheet=stylesheet
+    )
+    footer = REGION_FOOTER.format(tag=region.root_tag(), css_class=region.css_class)
+    layout = (context.get("visual_context") or {}).get("layout") or {}
+    inherited = {name: layout.get(name) for name in INHERITED_FIELDS}
+    sections = [
+        PromptSection("structure", "### Region Structure (tag#id.class attributes> text):", region.outline(), 0.6),
+        PromptSection("elements", "### Region Elements (box = left,top,width,height; non-default styles only):",
+                      [compact_json(compact_element(e, inherited)) for e in region.elements], 0.3),
+        PromptSection("assets", "### Region Assets (use `url` in place of the original `src`):",
+                      asset_items(region.assets), 0.05)
+    ]
+    # The stylesheet is fixed cost, so the budget is on top of it
+    budget = (token_budget or REGION_TOKEN_BUDGET) + count_tokens(stylesheet)
+    return assemble_prompt(header, sections, footer, budget)
+
+
+def _messages(build: PromptBuild):
+    return [SystemMessage(content=SECTIONED_SYSTEM_MESSAGE), HumanMessage(content=build.prompt)]
+
+
+def _strip_fences(text: str) -> str:
+    text = re.sub(r"^```[a-zA-Z]*\n?", "", text.strip())
+    return re.sub(r"\n?```$", "", text.strip()).strip()
+
+
+def clean_stylesheet(text: str) -> str:
+    text = _strip_fences(text)
+    return re.sub(r"</?style[^>]*>", "", text, flags=re.IGNORECASE).strip()
+
+
+_STYLE_BLOCK = re.compile(r"<style[^>]*>(.*?)</style>", re.IGNORECASE | re.DOTALL)
+_BODY = re.compile(r"<body[^>]*>(.*)</body>", re.IGNORECASE | re.DOTALL)
+
+
+def clean_fragment(text: str) -> Tuple[str, str]:
+    """Split a region's output into (extra CSS, HTML), unwrapping a whole document
+    if the model returned one anyway"""
+    text = _strip_fences(text)
+    styles = "\n".join(block.strip() for block in _STYLE_BLOCK.findall(text))
+    body = _BODY.search(text)
+    html = body.group(1) if body else text
+    html = _STYLE_BLOCK.sub("", html)
+    html = re.sub(r"<!doctype[^>]*>|</?html[^>]*>|<head[^>]*>.*?</head>", "", html,
+                  flags=re.IGNORECASE | re.DOTALL)
+    return styles, html.strip()
+
+
+def fallback_fragment(region: Region) -> str:
+    """Plain rendering of a region whose generation failed, so the page stays whole"""
+    texts = []
+    for line in region.outline():
+        text = line.split(">", 1)[1].strip() if ">" in line else ""
+        if text:
+            texts.append(f"<p>{text}</p>")
+    return f'<{region.root_tag()} class="{region.css_class}">{"".join(texts[:40])}</{region.root_tag()}>'
+
+
+def stitch_head(context: Dict[str, Any], stylesheet: str) -> str:
+    title = context.get("title") or "Website Clone"
+    return ("<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n<meta charset=\"UTF-8\">\n"
+            "<meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\">\n"
+            f"<title>{title}</title>\n<style>\n{stylesheet}\n</style>\n")
+
+
+def stitch(context: Dict[str, Any], stylesheet: str, fragments: List[Tuple[str, str]]) -> str:
+    """One document from the shared stylesheet and the (css, html) region fragments"""
+    extra = "\n".join(css for css, _ in fragments if css)
+    head = stitch_head(context, stylesheet)
+    if extra:
+        head += f"<style>\n{extra}\n</style>\n"
+    return head + "</head>\n<body>\n" + "\n".join(html for _, html in fragments) + "\n</body>\n</html>"
+
+
+def _rename_region(text: str, old: str, new: str) -> str:
+    """Point a stored fragment at the region's current class, if its position moved"""
+    if old == new:
+        return text
+    return re.sub(rf"region-{re.escape(old)}(?![\w-])", f"region-{new}", text)
+
+
+class _Plan:
+    """What a sectioned clone can take from the page's previous clone"""
+
+    def __init__(self, page_key: Optional[str], style_fingerprint: str):
+        self.page_key = page_key
+        self.style_fingerprint = style_fingerprint
+        self.stylesheet = ""
+        self.stylesheet_source = "generated"
+        # Region index -> (css, html) of an unchanged region
+        self.reused: Dict[int, Tuple[str, str]] = {}
+
+
+async def _plan(context: Dict[str, Any], regions: List[Region], use_cache: bool, patient: bool) -> _Plan:
+    """Reuse the previous clone's stylesheet and unchanged regions when the page's
+    design inputs are the same; otherwise generate a new stylesheet (and, since
+    fragments are written against it, every region)"""
+    url = context.get("url")
+    plan = _Plan(normalize_url(url) if url else None, style_fingerprint(context, regions))
+    previous = None
+    if plan.page_key and use_cache:
+        previous = await region_store.aget(plan.page_key, workflow._model_name())
+    if previous and previous["style_fingerprint"] == plan.style_fingerprint:
+        plan.stylesheet = previous["stylesheet"]
+        plan.stylesheet_source = "stored"
+        for index, region in enumerate(regions):
+            stored = previous["fragments"].get(region.fingerprint)
+            if stored is not None:
+                name, css, html = stored
+                plan.reused[index] = (_rename_region(css, name, region.name), _rename_region(html, name, region.name))
+        print(f"Re-clone of {plan.page_key}: reusing {len(plan.reused)}/{len(regions)} regions")
+        return plan
+
+    stylesheet, cached = await _generate_stylesheet(context, regions, use_cache, patient)
+    plan.stylesheet = stylesheet
+    plan.stylesheet_source = "cached" if cached else "generated"
+    return plan
+
+
+async def _remember(plan: _Plan, regions: List[Region], results: List[Tuple[str, str, str]]):
+    """Store the clone for the next re-clone; fallback fragments are left out so
+    those regions are retried"""
+    if not plan.page_key:
+        return
+    try:
+        await region_store.aput(
+            plan.page_key,
+            workflow._model_name(),
+            plan.style_fingerprint,
+            plan.stylesheet,
+            [(region.name, region.fingerprint, css, html)
+             for region, (css, html, source) in zip(regions, results) if source != "fallback"]
+        )
+    except Exception as e:
+        print(f"Region store write failed: {str(e)}")
+
+
+async def _generate_stylesheet(context: Dict[str, Any], regions: List[Region],
+                               use_cache: bool, patient: bool) -> Tuple[str, bool]:
+    with GENERATION_STAGE_SECONDS.time(stage="prompt_build"):
+        build = build_stylesheet_prompt(context, regions)
+    print(f"Stylesheet prompt uses {build.tokens}/{build.budget} tokens for {len(regions)} regions")
+    with GENERATION_STAGE_SECONDS.time(stage="stylesheet"):
+        raw, cached = await workflow.acomplete(_messages(build), build.tokens, use_cache=use_cache, patient=patient)
+    return clean_stylesheet(raw), cached
+
+
+async def _generate_region(context: Dict[str, Any], regions: List[Region], index: int, plan: _Plan,
+                           use_cache: bool) -> Tuple[str, str, str]:
+    """(css, html, source) for one region, where source is stored, cached, generated
+    or fallback. Region calls belong to an already admitted generation, so they wait
+    for LLM capacity instead of being rejected."""
+    region = regions[index]
+    if index in plan.reused:
+        css, html = plan.reused[index]
+        REGIONS_TOTAL.inc(source="stored")
+        return css, html, "stored"
+    try:
+        build = build_region_prompt(context, regions, index, plan.stylesheet)
+        raw, cached = await workflow.acomplete(_messages(build), build.tokens, use_cache=use_cache, patient=True)
+        css, html = clean_fragment(raw)
+        if not html:
+            raise ValueError("empty fragment")
+        source = "cached" if cached else "generated"
+    except Exception as e:
+        print(f"Region {region.name} generation failed, using a plain fallback: {str(e)}")
+        css, html, source = "", fallback_fragment(region), "fallback"
+    REGIONS_TOTAL.inc(source=source)
+    return css, html, source
+
+
+def _all_cached(plan: _Plan, results: List[Tuple[str, str, str]]) -> bool:
+    return plan.stylesheet_source != "generated" and all(source in ("stored", "cached") for _, _, source in results)
+
+
+async def agenerate_sectioned_html(context: Dict[str, Any], use_cache: bool = True, patient: bool = False,
+                                   save_output: bool = True) -> str:
+    """Clone a page as a shared stylesheet plus landmark regions generated concurrently
+    and stitched in order, so wall time follows the slowest region instead of the
+    whole page. Regions unchanged since the page's last sectioned clone are reused
+    from the region store. Pages without at least two regions use the single-call path."""
+    regions = split_regions(context)
+    if len(regions) < 2:
+        return await workflow.agenerate_cloned_html(context, use_cache=use_cache, patient=patient,
+                                                    save_output=save_output)
+
+    start_time = time.perf_counter()
+    try:
+        plan = await _plan(context, regions, use_cache, patient)
+        with GENERATION_STAGE_SECONDS.time(stage="regions"):
+            results = await asyncio.gather(*(
+                _generate_region(context, regions, index, plan, use_cache)
+                for index in range(len(regions))
+            ))
+        await _remember(plan, regions, results)
+        GENERATIONS_TOTAL.inc(outcome="cached" if _all_cached(plan, results) else "success")
+        print(f"Stitched {len(regions)} regions: "
+              f"{', '.join(f'{region.name} ({result[2]})' for region, result in zip(regions, results))}")
+        return await workflow._afinalize_output(
+            stitch(context, plan.stylesheet, [(css, html) for css, html, _ in results]), save=save_output)
+    except Overloaded:
+        raise
+    except Exception as e:
+        print(f"Error in sectioned LLM generation: {str(e)}")
+        GENERATIONS_TOTAL.inc(outcome="error")
+        return workflow.generate_fallback_html(context, str(e))
+    finally:
+        GENERATION_STAGE_SECONDS.observe(time.perf_counter() - start_time, stage="total")
+
+
+async def astream_sectioned_html(context: Dict[str, Any], use_cache: bool = True) -> AsyncIterator[Dict[str, Any]]:
+    """Sectioned generation as astream_cloned_html events. The head is sent once the
+    stylesheet is ready, then each region in document order as soon as it and every
+    region before it are done. Region CSS arrives in <style> blocks inside <body>."""
+    regions = split_regions(context)
+    if len(regions) < 2:
+        async for event in workflow.astream_cloned_html(context, use_cache=use_cache):
+            yield event
+        return
+
+    start_time = time.time()
+    tasks: List[asyncio.Task] = []
+    try:
+        yield {"event": "status", "data": {"stage": "stylesheet", "regions": [region.name for region in regions]}}
+        plan = await _plan(context, regions, use_cache, False)
+        head = stitch_head(context, plan.stylesheet) + "</head>\n<body>\n"
+        yield {"event": "chunk", "data": {"html": head}}
+        first_chunk_at = time.time()
+
+        regions_start = time.perf_counter()
+        tasks = [asyncio.create_task(_generate_region(context, regions, index, plan, use_cache))
+                 for index in range(len(regions))]
+        parts = [head]
+        results = []
+        for region, task in zip(regions, tasks):
+            css, html, source = await task
+            results.append((css, html, source))
+            piece = (f"<style>\n{css}\n</style>\n" if css else "") + html + "\n"
+            parts.append(piece)
+            yield {"event": "status", "data": {"stage": "region", "region": region.name, "source": source}}
+            yield {"event": "chunk", "data": {"html": piece}}
+        GENERATION_STAGE_SECONDS.observe(time.perf_counter() - regions_start, stage="regions")
+        await _remember(plan, regions, results)
+        all_cached = _all_cached(plan, results)
+        tail = "</body>\n</html>"
+        parts.append(tail)
+        yield {"event": "chunk", "data": {"html": tail}}
+
+        GENERATIONS_TOTAL.inc(outcome="cached" if all_cached else "success")
+        cleaned = await workflow._afinalize_output("".join(parts))
+        GENERATION_STAGE_SECONDS.observe(time.time() - start_time, stage="total")
+        yield {"event": "done", "data": {
+            "status": "success",
+            "cached": all_cached,
+            "valid": workflow.validate_html_structure(cleaned),
+            "length": len(cleaned),
+            "regions": len(regions),
+            "regions_reused": len(plan.reused),
+            "time_to_first_chunk": first_chunk_at - start_time,
+            "processing_time": time.time() - start_time
+        }}
+
+    except Overloaded as e:
+        print(f"Sectioned streaming generation rejected: {e.detail}")
+        yield {"event": "error", "data": {"detail": e.detail, "status": 429, "retry_after": e.retry_after}}
+    except Exception as e:
+        print(f"Error in sectioned streaming generation: {str(e)}")
+        GENERATIONS_TOTAL.inc(outcome="error")
+        yield {"event": "error", "data": {
+            "detail": str(e),
+            "fallback_html": workflow.generate_fallback_html(context, str(e))
+        }}
+    finally:
+        # Client went away: stop the remaining region calls
+        for task in tasks:
+            task.cancel()
+
+
+# Region kinds that repeat from page to page of a site
+LAYOUT_KINDS = ("header", "footer")
+
+
+def _layout_node(node: Dict[str, Any]) -> List[Any]:
+    attributes = node.get("attributes") or {}
+    return [node.get("tag"), node.get("id"), " ".join((node.get("text") or "").split()),
+            {name: attributes[name] for name in OUTLINE_ATTRS if attributes.get(name)},
+            [_layout_node(child) for child in node.get("children") or [] if child.get("tag") not in SKIPPED_TAGS]]
+
+
+def layout_signature(region: Region) -> str:
+    """Identity of a header or footer across a site's pages: tags, text, links and
+    images, but not classes or computed styles, which vary with things like the
+    highlighted nav item"""
+    return _fingerprint([region.kind, [_layout_node(node) for node in region.nodes]])
+
+
+def shared_layout(pages: List[List[Region]], min_pages: int = 2) -> Dict[str, Tuple[int, int]]:
+    """Header and footer regions found on at least `min_pages` pages, as layout
+    signature -> (page index, region index) of the first occurrence"""
+    first: Dict[str, Tuple[int, int]] = {}
+    counts: Dict[str, int] = {}
+    for page, regions in enumerate(pages):
+        if len(regions) < 2:
+            continue
+        for index, region in enumerate(regions):
+            if region.kind not in LAYOUT_KINDS:
+                continue
+            signature = layout_signature(region)
+            first.setdefault(signature, (page, index))
+            counts[signature] = counts.get(signature, 0) + 1
+    return {signature: location for signature, location in first.items() if counts[signature] >= min_pages}
+
+
+async def agenerate_site_html(contexts: List[Dict[str, Any]],
+                              use_cache: bool = True) -> AsyncIterator[Tuple[int, str, Dict[str, Any]]]:
+    """Clone several pages of one site, yielding (page index, html, info) as pages finish.
+
+    The site gets one shared stylesheet, written from the first page that splits into
+    regions, and each header or footer that repeats across pages is generated once
+    and reused on every page it appears on. Pages that don't split use the
+    single-call path. Calls wait for LLM capacity rather than being rejected.
+    """
+    page_regions = [split_regions(context) for context in contexts]
+    sectioned = [page for page, regions in enumerate(page_regions) if len(regions) >= 2]
+    shared = shared_layout(page_regions)
+
+    plan = _Plan(None, "")
+    if sectioned:
+        seed = sectioned[0]
+        try:
+            plan.stylesheet, _ = await _generate_stylesheet(contexts[seed], page_regions[seed], use_cache, True)
+        except Exception as e:
+            print(f"Site stylesheet generation failed, cloning pages separately: {str(e)}")
+            sectioned = []
+    print(f"Site clone of {len(contexts)} page(s): {len(sectioned)} sectioned, {len(shared)} shared layout region(s)")
+
+    shared_tasks: Dict[str, asyncio.Task] = {}
+
+    async def region_result(page: int, index: int) -> Tuple[str, str, str]:
+        region = page_regions[page][index]
+        signature = layout_signature(region) if region.kind in LAYOUT_KINDS else None
+        if signature not in shared:
+            return await _generate_region(contexts[page], page_regions[page], index, plan, use_cache)
+        task = shared_tasks.get(signature)
+        if task is None:
+            owner, owner_index = shared[signature]
+            task = shared_tasks[signature] = asyncio.ensure_future(
+                _generate_region(contexts[owner], page_regions[owner], owner_index, plan, use_cache))
+        css, html, source = await asyncio.shield(task)
+        if (page, index) == shared[signature]:
+            return css, html, source
+        REGIONS_TOTAL.inc(source="shared")
+        return css, html, "shared"
+
+    async def clone_page(page: int) -> Tuple[int, str, Dict[str, Any]]:
+        context = contexts[page]
+        if page not in sectioned:
+            generate = agenerate_sectioned_html if len(page_regions[page]) >= 2 else workflow.agenerate_cloned_html
+            html = await generate(context, use_cache=use_cache, patient=True, save_output=False)
+            return page, html, {"regions": 0, "shared_regions": 0}
+        regions = page_regions[page]
+        start_time = time.perf_counter()
+        with GENERATION_STAGE_SECONDS.time(stage="regions"):
+            results = await asyncio.gather(*(region_result(page, index) for index in range(len(regions))))
+        GENERATIONS_TOTAL.inc(outcome="success")
+        html = await workflow._afinalize_output(
+            stitch(context, plan.stylesheet, [(css, html) for css, html, _ in results]), save=False)
+        GENERATION_STAGE_SECONDS.observe(time.perf_counter() - start_time, stage="total")
+        return page, html, {
+            "regions": len(regions),
+            "shared_regions": sum(1 for _, _, source in results if source == "shared"),
+            "sources": {region.name: source for region, (_, _, source) in zip(regions, results)}
+        }
+
+    tasks = [asyncio.create_task(clone_page(page)) for page in range(len(contexts))]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks + list(shared_tasks.values()):
+            task.cancel()
@@ -0,0 +1,414 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin
+
+from .compact_dom import CompactDOMBuilder
+from .extraction import extract_page_data
+
+# Computed properties requested from DOMSnapshot.captureSnapshot, in this order.
+# The camelCase names are the keys the script engine uses for the same values.
+SNAPSHOT_STYLES = [
+    ("display", "display"),
+    ("position", "position"),
+    ("width", "width"),
+    ("height", "height"),
+    ("padding", "padding"),
+    ("margin", "margin"),
+    ("background-color", "backgroundColor"),
+    ("color", "color"),
+    ("font-size", "fontSize"),
+    ("font-family", "fontFamily"),
+    ("font-weight", "fontWeight"),
+    ("text-align", "textAlign"),
+    ("border", "border"),
+    ("border-radius", "borderRadius"),
+    ("box-shadow", "boxShadow"),
+    ("transform", "transform"),
+    ("opacity", "opacity"),
+    ("z-index", "zIndex"),
+    ("flex-direction", "flexDirection"),
+    ("justify-content", "justifyContent"),
+    ("align-items", "alignItems"),
+    ("grid-template-columns", "gridTemplateColumns"),
+    ("grid-template-rows", "gridTemplateRows"),
+    ("border-color", "borderColor"),
+    ("background-image", "backgroundImage"),
+    ("min-height", "minHeight"),
+]
+_STYLE_INDEX = {camel: i for i, (_, camel) in enumerate(SNAPSHOT_STYLES)}
+# Everything except the helper properties appended after gridTemplateRows
+_ELEMENT_STYLE_KEYS = [camel for _, camel in SNAPSHOT_STYLES[:_STYLE_INDEX["gridTemplateRows"] + 1]]
+
+IMPORTANT_SELECTORS = [
+    'header', 'nav', 'main', 'footer', 'section', 'article', 'aside',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'div',
+    '.hero', '#hero', '.container', '.wrapper', '.navbar', '.header',
+    '.footer', '.content', '.main', '.sidebar'
+]
+
+IMPORTANT_ATTRS = {'src', 'href', 'alt', 'title', 'type', 'name', 'value'}
+
+ELEMENT_NODE = 1
+TEXT_NODE = 3
+
+
+class _DecodedSnapshot:
+    """Index over the main document of a DOMSnapshot.captureSnapshot result.
+
+    The snapshot is a set of parallel arrays whose strings are indices into one
+    shared table; values are only looked up when a section needs them.
+    """
+
+    def __init__(self, snapshot: Dict[str, Any]):
+        self.strings: List[str] = snapshot["strings"]
+        document = snapshot["documents"][0]
+        nodes = document["nodes"]
+        layout = document["layout"]
+
+        self.document_url = self.string(document.get("documentURL", -1))
+        self.parent = nodes["parentIndex"]
+        self.node_type = nodes["nodeType"]
+        self.node_name = nodes["nodeName"]
+        self.node_value = nodes["nodeValue"]
+        self.attributes = nodes.get("attributes", [])
+        self.current_source = dict(zip(
+            nodes.get("currentSourceURL", {}).get("index", []),
+            nodes.get("currentSourceURL", {}).get("value", [])
+        ))
+
+        self.children: List[List[int]] = [[] for _ in self.parent]
+        for index, parent in enumerate(self.parent):
+            if parent >= 0:
+                self.children[parent].append(index)
+
+        self.layout_index: Dict[int, int] = {
+            node: i for i, node in enumerate(layout["nodeIndex"])
+        }
+        self.styles = layout["styles"]
+        self.bounds = layout["bounds"]
+        self._text_cache: Dict[int, str] = {}
+
+    def string(self, index: int) -> str:
+        return self.strings[index] if index is not None and index >= 0 else ""
+
+    def tag(self, node: int) -> str:
+        return self.string(self.node_name[node])
+
+    def attrs(self, node: int) -> Dict[str, str]:
+        if node >= len(self.attributes):
+            return {}
+        flat = self.attributes[node]
+        return {self.string(flat[i]): self.string(flat[i + 1]) for i in range(0, len(flat) - 1, 2)}
+
+    def style(self, node: int) -> Optional[List[str]]:
+        layout = self.layout_index.get(node)
+        if layout is None:
+            return None
+        return [self.string(i) for i in self.styles[layout]]
+
+    def rect(self, node: int) -> Dict[str, float]:
+        layout = self.layout_index.get(node)
+        x, y, width, height = self.bounds[layout] if layout is not None else (0, 0, 0, 0)
+        return {"top": y, "left": x, "width": width, "height": height}
+
+    def element_children(self, node: int) -> List[int]:
+        return [c for c in self.children[node] if self.node_type[c] == ELEMENT_NODE]
+
+    def text(self, node: int, limit: Optional[int] = None) -> str:
+        """textContent of a node, stopping early once `limit` characters are collected"""
+        if limit is None and node in self._text_cache:
+            return self._text_cache[node]
+        parts: List[str] = []
+        size = 0
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if self.node_type[current] == TEXT_NODE:
+                value = self.string(self.node_value[current])
+                parts.append(value)
+                size += len(value)
+                if limit is not None and size >= limit:
+                    break
+            else:
+                stack.extend(reversed(self.children[current]))
+        text = "".join(parts)
+        if limit is None:
+            self._text_cache[node] = text
+        return text
+
+    def find(self, tag: str) -> Optional[int]:
+        for index, name in enumerate(self.node_name):
+            if self.node_type[index] == ELEMENT_NODE and self.string(name) == tag:
+                return index
+        return None
+
+
+def _dom_node(snap: _DecodedSnapshot, node: int, depth: int = 0) -> Optional[Dict[str, Any]]:
+    if depth > 8:  # Prevent deep recursion
+        return None
+    attrs = snap.attrs(node)
+    result = {
+        "tag": snap.tag(node).lower(),
+        "id": attrs.get("id") or None,
+        "classes": [c for c in attrs.get("class", "").split(" ") if c],
+        "attributes": {
+            name: value for name, value in attrs.items()
+            if name in IMPORTANT_ATTRS or name.startswith("data-")
+        },
+        "children": []
+    }
+    children = snap.element_children(node)
+    if not children:
+        text = snap.text(node).strip()
+        if text and len(text) < 200:
+            result["text"] = text
+    for child in children:
+        child_result = _dom_node(snap, child, depth + 1)
+        if child_result:
+            result["children"].append(child_result)
+    return result
+
+
+def _compact_dom(snap: _DecodedSnapshot, body: int) -> Dict[str, Any]:
+    """Same nodes as _dom_node, written straight into the columnar payload"""
+    builder = CompactDOMBuilder()
+    stack = [(body, -1, 0)]
+    while stack:
+        node, parent, depth = stack.pop()
+        attrs = snap.attrs(node)
+        children = snap.element_children(node)
+        text = None
+        if not children:
+            text = snap.text(node).strip()
+            if not text or len(text) >= 200:
+                text = None
+        index = builder.add(
+            snap.tag(node).lower(),
+            parent,
+            node_id=attrs.get("id"),
+            classes=attrs.get("class"),
+            attributes={
+                name: value for name, value in attrs.items()
+                if name in IMPORTANT_ATTRS or name.startswith("data-")
+            },
+            text=text
+        )
+        if depth < 8:  # Prevent deep recursion
+            for child in reversed(children):
+                stack.append((child, index, depth + 1))
+    return builder.build()
+
+
+def decode_snapshot(snapshot: Dict[str, Any],
+                    include_assets: bool = True,
+                    include_dom: bool = True,
+                    include_visual: bool = True,
+                    dom_format: str = "tree") -> Dict[str, Any]:
+    """Decode a DOMSnapshot into the `assets`, `dom_structure` and `visual_context` shapes"""
+    snap = _DecodedSnapshot(snapshot)
+    body = snap.find("BODY")
+    result: Dict[str, Any] = {}
+
+    if include_dom:
+        if body is None:
+            result["dom_structure"] = {}
+        elif dom_format == "compact":
+            result["dom_structure"] = _compact_dom(snap, body)
+        else:
+            result["dom_structure"] = _dom_node(snap, body)
+
+    if not include_assets and not include_visual:
+        return result
+
+    by_tag = {s.upper(): i for i, s in enumerate(IMPORTANT_SELECTORS) if s[0] not in ".#"}
+    by_class = {s[1:]: i for i, s in enumerate(IMPORTANT_SELECTORS) if s[0] == "."}
+    by_id = {s[1:]: i for i, s in enumerate(IMPORTANT_SELECTORS) if s[0] == "#"}
+    buckets: List[List[Dict[str, Any]]] = [[] for _ in IMPORTANT_SELECTORS]
+
+    colors: Dict[str, None] = {}
+    fonts: Dict[str, None] = {}
+    images: List[Dict[str, Any]] = []
+    links: List[Dict[str, Any]] = []
+    image_assets: List[Dict[str, Any]] = []
+    background_assets: List[Dict[str, Any]] = []
+    font_assets: List[Dict[str, Any]] = []
+
+    color_i = _STYLE_INDEX["color"]
+    bg_i = _STYLE_INDEX["backgroundColor"]
+    border_i = _STYLE_INDEX["borderColor"]
+    family_i = _STYLE_INDEX["fontFamily"]
+    size_i = _STYLE_INDEX["fontSize"]
+    weight_i = _STYLE_INDEX["fontWeight"]
+    bg_image_i = _STYLE_INDEX["backgroundImage"]
+
+    # Nodes are stored in document order, so a linear scan is a pre-order walk
+    for node, node_type in enumerate(snap.node_type):
+        if node_type != ELEMENT_NODE:
+            continue
+        tag = snap.tag(node)
+        style = snap.style(node)
+        attrs = None
+
+        if include_visual and style is not None:
+            color, bg_color, border_color = style[color_i], style[bg_i], style[border_i]
+            if color and color not in ('rgba(0, 0, 0, 0)', 'rgb(0, 0, 0)'):
+                colors[color] = None
+            if bg_color and bg_color not in ('rgba(0, 0, 0, 0)', 'rgb(255, 255, 255)'):
+                colors[bg_color] = None
+            if border_color and border_color != 'rgba(0, 0, 0, 0)':
+                colors[border_color] = None
+            if style[family_i] and style[family_i] != 'inherit':
+                fonts[f"{style[family_i]}|{style[size_i]}|{style[weight_i]}"] = None
+
+            attrs = snap.attrs(node)
+            matched = []
+            if tag in by_tag:
+                matched.append(by_tag[tag])
+            if attrs.get("id") in by_id:
+                matched.append(by_id[attrs["id"]])
+            for cls in attrs.get("class", "").split():
+                if cls in by_class:
+                    matched.append(by_class[cls])
+            for i in matched:
+                if len(buckets[i]) < 5:  # Limit to prevent overwhelming data
+                    buckets[i].append({
+                        "selector": IMPORTANT_SELECTORS[i],
+                        "tagName": tag,
+                        "className": attrs.get("class", ""),
+                        "id": attrs.get("id", ""),
+                        "position": snap.rect(node),
+                        "styles": {key: style[_STYLE_INDEX[key]] for key in _ELEMENT_STYLE_KEYS},
+                        "textContent": snap.text(node, limit=200)[:200]
+                    })
+
+        if tag not in ("IMG", "A", "LINK") and not (include_assets and style is not None):
+            continue
+        if attrs is None:
+            attrs = snap.attrs(node)
+
+        if tag == "IMG":
+            src = snap.current_source.get(node)
+            src = snap.string(src) if src is not None else urljoin(snap.document_url, attrs.get("src", ""))
+            rect = snap.rect(node)
+            if include_visual:
+                images.append({
+                    "src": src,
+                    "alt": attrs.get("alt", ""),
+                    "width": rect["width"],
+                    "height": rect["height"],
+                    "className": attrs.get("class", ""),
+                    "id": attrs.get("id", "")
+                })
+            if include_assets and src.startswith("http"):
+                image_assets.append({
+                    "type": "image",
+                    "src": src,
+                    "alt": attrs.get("alt", ""),
+                    "width": rect["width"],
+                    "height": rect["height"],
+                    "className": attrs.get("class", ""),
+                    "id": attrs.get("id", "")
+                })
+        elif tag == "A" and include_visual and len(links) < 20:  # Limit links
+            text = snap.text(node).strip()
+            if text:
+                links.append({
+                    "href": urljoin(snap.document_url, attrs.get("href", "")),
+                    "text": text,
+                    "className": attrs.get("class", ""),
+                    "id": attrs.get("id", "")
+                })
+        elif tag == "LINK" and include_assets and attrs.get("rel") == "stylesheet":
+            href = urljoin(snap.document_url, attrs.get("href", ""))
+            if "font" in href:
+                font_assets.append({"type": "font", "src": href})
+
+        if include_assets and style is not None:
+            bg_image = style[bg_image_i]
+            if bg_image and bg_image != "none" and "url(" in bg_image:
+                src = bg_image.split("url(", 1)[1].split(")", 1)[0].strip("\"'")
+                if src.startswith("http"):
+                    background_assets.append({
+                        "type": "background-image",
+                        "src": src,
+                        "element": tag,
+                        "className": attrs.get("class", "")
+                    })
+
+    if include_assets:
+        result["assets"] = image_assets + background_assets + font_assets
+
+    if include_visual:
+        body_style = snap.style(body) if body is not None else None
+        layout_keys = ["display", "flexDirection", "justifyContent", "alignItems", "padding",
+                       "margin", "backgroundColor", "width", "minHeight", "fontFamily"]
+        result["visual_context"] = {
+            "colors": list(colors),
+            "fonts": list(fonts),
+            "layout": {key: body_style[_STYLE_INDEX[key]] for key in layout_keys} if body_style else {},
+            "elements": [element for bucket in buckets for element in bucket],
+            "images": images,
+            "links": links
+        }
+
+    return result
+
+
+async def extract_page_data_with_snapshot(page,
+                                          include_styles: bool = True,
+                                          include_assets: bool = True,
+                                          include_dom: bool = True,
+                                          include_visual: bool = True,
+                                          include_meta: bool = True,
+                                          dom_format: str = "tree") -> Dict[str, Any]:
+    """Extract page sections using one native DOMSnapshot.captureSnapshot call.
+
+    Stylesheets and meta tags still come from the (walk-free) extraction script.
+    Falls back to the script engine if the CDP call fails, e.g. on non-Chromium.
+    """
+    extracted = await extract_page_data(
+        page,
+        include_styles=include_styles,
+        include_assets=False,
+        include_dom=False,
+        include_visual=False,
+        include_meta=include_meta
+    )
+    if not (include_assets or include_dom or include_visual):
+        return extracted
+
+    try:
+        cdp = await page.context.new_cdp_session(page)
+        try:
+            snapshot = await cdp.send("DOMSnapshot.captureSnapshot", {
+                "computedStyles": [name for name, _ in SNAPSHOT_STYLES],
+                "includeDOMRects": True
+            })
+        finally:
+            await cdp.detach()
+        # A pure-Python walk over possibly tens of thousands of nodes; keep it off the loop
+        decoded = await asyncio.to_thread(
+            decode_snapshot,
+            snapshot,
+            include_assets=include_assets,
+            include_dom=include_dom,
+            include_visual=include_visual,
+            dom_format=dom_format
+        )
+    except Exception as e:
+        print(f"DOM snapshot extraction failed, falling back to script: {str(e)}")
+        fallback = await extract_page_data(
+            page,
+            include_styles=False,
+            include_assets=include_assets,
+            include_dom=include_dom,
+            include_visual=include_visual,
+            include_meta=False,
+            dom_format=dom_format
+        )
+        decoded = {key: fallback[key] for key in ("assets", "dom_structure", "visual_context")}
+
+    extracted["assets"] = decoded.get("assets", []) if include_assets else []
+    extracted["dom_structure"] = decoded.get("dom_structure", {}) if include_dom else None
+    extracted["visual_context"] = decoded.get("visual_context") if include_visual else None
+    return extracted
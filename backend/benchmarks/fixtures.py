@@ -0,0 +1,219 @@
+"""Local HTTP server of synthetic pages for offline benchmarks.
+
+Fixtures (all deterministic):
+- /small   small static landing page
+- /large   ~20k DOM nodes of nested sections and cards
+- /images  image-heavy gallery; PNGs and CSS backgrounds served from /img/<n>.png
+- /spa     client-rendered shell that fetches /api/items (after a delay) and renders it
+
+    cd backend && uv run python -m benchmarks.fixtures --port 8900
+"""
+import argparse
+import json
+import random
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+
+FIXTURES = ("small", "large", "images", "spa")
+
+WORDS = ["launch", "platform", "pricing", "teams", "analytics", "secure", "deploy", "scale",
+         "workflow", "insights", "customers", "integrations", "support", "developer", "cloud"]
+
+STYLESHEET = """
+body { margin: 0; font-family: Inter, Helvetica, sans-serif; color: #1f2937; background: #f9fafb; }
+header, footer { display: flex; justify-content: space-between; align-items: center; padding: 16px 48px; }
+header { background: #111827; color: #fff; }
+nav a { color: inherit; margin-left: 24px; text-decoration: none; }
+.hero { padding: 96px 48px; background: linear-gradient(135deg, #4f46e5, #06b6d4); color: #fff; }
+.grid { display: grid; grid-template-columns: repeat(4, 1fr); gap: 24px; padding: 48px; }
+.card { background: #fff; border-radius: 12px; box-shadow: 0 1px 3px rgba(0,0,0,.1); padding: 24px; }
+.tile { height: 180px; background-size: cover; border-radius: 8px; }
+"""
+
+
+def _words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def _page(title: str, body: str, head: str = "") -> str:
+    return (f'<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">'
+            f'<meta name="viewport" content="width=device-width, initial-scale=1">'
+            f'<title>{title}</title><link rel="stylesheet" href="/style.css">{head}</head>'
+            f'<body>{body}</body></html>')
+
+
+def _chrome(rng: random.Random, main: str) -> str:
+    links = "".join(f'<a href="/{w}">{w.title()}</a>' for w in WORDS[:6])
+    return (f'<header><div class="logo">Acme</div><nav>{links}</nav></header>'
+            f'<section class="hero"><h1>{_words(rng, 5).title()}</h1><p>{_words(rng, 20)}</p>'
+            f'<a class="button" href="/signup">Get started</a></section>'
+            f'<main>{main}</main>'
+            f'<footer><p>&copy; Acme</p><nav>{links}</nav></footer>')
+
+
+def small_page() -> str:
+    rng = random.Random(1)
+    cards = "".join(f'<div class="card"><h3>{_words(rng, 2).title()}</h3><p>{_words(rng, 25)}</p></div>'
+                    for _ in range(8))
+    return _page("Small fixture", _chrome(rng, f'<div class="grid">{cards}</div>'))
+
+
+def large_page(nodes: int = 20000) -> str:
+    """Sections of cards; each card is 8 elements, so nodes // 8 cards in total"""
+    rng = random.Random(2)
+    sections = []
+    cards_per_section = 50
+    for s in range(max(1, nodes // (8 * cards_per_section))):
+        cards = "".join(
+            f'<div class="card" data-id="{s}-{c}"><div class="media"><span class="badge">{rng.choice(WORDS)}</span></div>'
+            f'<h3>{_words(rng, 3).title()}</h3><p>{_words(rng, 18)}</p>'
+            f'<ul><li>{rng.choice(WORDS)}</li></ul><a href="/item/{s}-{c}">More</a></div>'
+            for c in range(cards_per_section)
+        )
+        sections.append(f'<section id="section-{s}"><h2>{_words(rng, 4).title()}</h2>'
+                        f'<div class="grid">{cards}</div></section>')
+    return _page("Large fixture", _chrome(rng, "".join(sections)))
+
+
+def images_page(count: int = 60) -> str:
+    rng = random.Random(3)
+    tiles = []
+    for i in range(count):
+        if i % 3 == 0:
+            tiles.append(f'<div class="card"><div class="tile" style="background-image: url(/img/{i}.png)"></div>'
+                         f'<p>{_words(rng, 6)}</p></div>')
+        else:
+            tiles.append(f'<div class="card"><img src="/img/{i}.png" alt="{_words(rng, 2)}" width="256" height="256">'
+                         f'<p>{_words(rng, 6)}</p></div>')
+    return _page("Image fixture", _chrome(rng, f'<div class="grid">{"".join(tiles)}</div>'))
+
+
+def spa_page() -> str:
+    script = """
+<script>
+fetch('/api/items').then(r => r.json()).then(items => {
+  const root = document.getElementById('root');
+  root.innerHTML = '<header><div class="logo">Acme</div><nav><a href="/a">App</a><a href="/b">Docs</a></nav></header>' +
+    '<section class="hero"><h1>Client rendered</h1></section><div class="grid"></div>';
+  const grid = root.querySelector('.grid');
+  for (const item of items) {
+    const card = document.createElement('div');
+    card.className = 'card';
+    card.innerHTML = '<h3>' + item.title + '</h3><p>' + item.body + '</p>';
+    grid.appendChild(card);
+  }
+  // A late update, like a hydration pass or lazy widget
+  setTimeout(() => { root.insertAdjacentHTML('beforeend', '<footer><p>Loaded</p></footer>'); }, 200);
+});
+</script>"""
+    return _page("SPA fixture", '<div id="root"><div class="spinner">Loading...</div></div>', head=script)
+
+
+def spa_items(count: int = 500) -> str:
+    rng = random.Random(4)
+    return json.dumps([{"title": _words(rng, 3).title(), "body": _words(rng, 15)} for _ in range(count)])
+
+
+def noise_png(seed: int, size: int = 256) -> bytes:
+    """Random-noise RGB PNG, so it compresses about as badly as a photo"""
+    rng = random.Random(seed)
+    rows = b"".join(b"\x00" + rng.randbytes(size * 3) for _ in range(size))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows, 6)) + chunk(b"IEND", b"")
+
+
+class FixtureServer:
+    """Serves the fixtures from a background thread; pages are rendered once"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, api_delay: float = 0.3, large_nodes: int = 20000):
+        self.api_delay = api_delay
+        self.pages: Dict[str, Tuple[bytes, str]] = {
+            "/small": (small_page().encode(), "text/html; charset=utf-8"),
+            "/large": (large_page(large_nodes).encode(), "text/html; charset=utf-8"),
+            "/images": (images_page().encode(), "text/html; charset=utf-8"),
+            "/spa": (spa_page().encode(), "text/html; charset=utf-8"),
+            "/style.css": (STYLESHEET.encode(), "text/css"),
+            "/api/items": (spa_items().encode(), "application/json"),
+        }
+        self._images: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, fixture: str) -> str:
+        return f"{self.base_url}/{fixture}"
+
+    def _lookup(self, path: str) -> Optional[Tuple[bytes, str]]:
+        if path in self.pages:
+            if path == "/api/items":
+                time.sleep(self.api_delay)
+            return self.pages[path]
+        if path.startswith("/img/") and path.endswith(".png"):
+            with self._lock:
+                if path not in self._images:
+                    self._images[path] = noise_png(zlib.crc32(path.encode()))
+                return self._images[path], "image/png"
+        return None
+
+    def _handler(self) -> Callable:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                found = server._lookup(self.path.split("?", 1)[0])
+                if found is None:
+                    self.send_error(404)
+                    return
+                body, content_type = found
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the benchmark fixture pages")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    args = parser.parse_args()
+    server = FixtureServer(args.host, args.port).start()
+    print(f"Serving fixtures at {server.base_url}: " + ", ".join(f"/{name}" for name in FIXTURES))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Offline end-to-end load benchmark.
+
+Starts the fixture server and the API (benchmarks.serve, with the stub LLM) and
+runs each endpoint x fixture x concurrency scenario. Reports p50/p95/p99
+latency, requests per second, errors and the peak RSS of the API process tree
+(including its browsers), and saves everything as JSON for comparing commits.
+
+    cd backend && uv run python -m benchmarks.load
+    uv run python -m benchmarks.load --endpoints scrape --fixtures small,large --concurrency 1,8 --requests 40
+
+Needs a local Chromium (`playwright install chromium`); requests are sent with
+`Cache-Control: no-cache` so the scrape cache doesn't short-circuit them unless
+--warm-cache is given.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.process_memory import process_tree_rss_mb
+from benchmarks.fixtures import FIXTURES, FixtureServer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+ENDPOINTS = ("scrape", "clone", "scrape-and-clone")
+
+
+class RSSSampler:
+    """Samples the RSS of a process tree in the background, keeping the peak since
+    the last reset() and the overall peak"""
+
+    def __init__(self, pid: int, interval: float = 0.25):
+        self.pid = pid
+        self.interval = interval
+        self.peak_mb = 0.0
+        self.overall_peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = process_tree_rss_mb(self.pid)
+            self.peak_mb = max(self.peak_mb, rss)
+            self.overall_peak_mb = max(self.overall_peak_mb, rss)
+            self._stop.wait(self.interval)
+
+    def reset(self):
+        self.peak_mb = process_tree_rss_mb(self.pid)
+
+    def __enter__(self) -> "RSSSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+def request_for(endpoint: str, url: str) -> Tuple[str, Dict[str, Any]]:
+    if endpoint == "scrape":
+        return "/scrape", {"url": url}
+    if endpoint == "clone":
+        return "/clone", {"url": url, "bypass_cache": True}
+    return "/scrape-and-clone", {"url": url}
+
+
+async def run_scenario(client: httpx.AsyncClient, endpoint: str, url: str, concurrency: int,
+                       requests: int, headers: Dict[str, str], sampler: RSSSampler) -> Dict[str, Any]:
+    path, body = request_for(endpoint, url)
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def worker():
+        while True:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json=body, headers=headers)
+                response.read()
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+
+    sampler.reset()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value * 1000, 1) if value is not None else None
+
+    return {
+        "requests": requests,
+        "ok": len(latencies),
+        "errors": errors,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else None,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "elapsed_s": round(elapsed, 2),
+        "peak_rss_mb": round(sampler.peak_mb, 1)
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _start_api(args) -> subprocess.Popen:
+    command = [sys.executable, "-m", "benchmarks.serve", "--port", str(args.port),
+               "--llm-latency", str(args.llm_latency), "--llm-first-chunk", str(args.llm_first_chunk)]
+    return subprocess.Popen(command, cwd=BACKEND_DIR)
+
+
+async def _wait_ready(client: httpx.AsyncClient, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError(f"API did not become healthy within {timeout:.0f}s")
+
+
+async def run(args) -> Dict[str, Any]:
+    fixtures = FixtureServer(port=args.fixture_port).start()
+    api = _start_api(args)
+    scenarios = []
+    headers = {} if args.warm_cache else {"Cache-Control": "no-cache"}
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=args.timeout,
+                                     limits=httpx.Limits(max_connections=None)) as client:
+            await _wait_ready(client)
+            with RSSSampler(api.pid) as sampler:
+                for endpoint in args.endpoints:
+                    for fixture in args.fixtures:
+                        url = fixtures.url(fixture)
+                        for _ in range(args.warmup):
+                            await run_scenario(client, endpoint, url, 1, 1, headers, sampler)
+                        for concurrency in args.concurrency:
+                            result = await run_scenario(client, endpoint, url, concurrency,
+                                                        args.requests, headers, sampler)
+                            result.update({"endpoint": endpoint, "fixture": fixture, "concurrency": concurrency})
+                            scenarios.append(result)
+                            print(f"{endpoint:<17} {fixture:<7} c={concurrency:<3} "
+                                  f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms "
+                                  f"rps={result['rps']} errors={sum(result['errors'].values())} "
+                                  f"rss={result['peak_rss_mb']}MB")
+    finally:
+        api.terminate()
+        try:
+            api.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            api.kill()
+        fixtures.stop()
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "endpoints": args.endpoints,
+            "fixtures": args.fixtures,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "llm_latency": args.llm_latency,
+            "llm_first_chunk": args.llm_first_chunk,
+            "warm_cache": args.warm_cache
+        },
+        "peak_rss_mb": round(sampler.overall_peak_mb, 1),
+        "scenarios": scenarios
+    }
+
+
+def _csv(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end load benchmark")
+    parser.add_argument("--endpoints", type=_csv, default=list(ENDPOINTS),
+                        help=f"Comma-separated, from {', '.join(ENDPOINTS)}")
+    parser.add_argument("--fixtures", type=_csv, default=list(FIXTURES),
+                        help=f"Comma-separated, from {', '.join(FIXTURES)}")
+    parser.add_argument("--concurrency", type=lambda v: [int(c) for c in _csv(v)], default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=20, help="Requests per scenario")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed requests before each endpoint/fixture")
+    parser.add_argument("--llm-latency", type=float, default=2.0)
+    parser.add_argument("--llm-first-chunk", type=float, default=0.5)
+    parser.add_argument("--warm-cache", action="store_true", help="Let the scrape cache serve repeat requests")
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--fixture-port", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<timestamp>-<commit>.json)")
+    args = parser.parse_args()
+
+    for name in args.endpoints:
+        if name not in ENDPOINTS:
+            parser.error(f"Unknown endpoint {name}")
+    for name in args.fixtures:
+        if name not in FIXTURES:
+            parser.error(f"Unknown fixture {name}")
+
+    results = asyncio.run(run(args))
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{results['commit'] or 'unknown'}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Peak RSS {results['peak_rss_mb']}MB; results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Payload size and serialization time of /scrape responses on a large page.
+
+Compares the previous path (response_model validation, jsonable_encoder and
+stdlib json) with fast_json_response, with and without a `fields` projection,
+for each available content coding.
+
+    cd backend && uv run python -m benchmarks.serialization [--nodes 10000] [--json out.json]
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+# app.main builds the LLM client and local stores on import
+_scratch = tempfile.mkdtemp(prefix="bench-")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("LLM_CACHE_PATH", os.path.join(_scratch, "llm_cache.sqlite3"))
+os.environ.setdefault("JOBS_DB_PATH", os.path.join(_scratch, "jobs.sqlite3"))
+os.environ.setdefault("BLOB_STORE_DIR", os.path.join(_scratch, "blobs"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from app.compact_dom import encode_tree  # noqa: E402
+from app.main import ScrapingResult, _project_scrape_result  # noqa: E402
+from app.responses import available_encodings, compress, dumps  # noqa: E402
+
+WORDS = ["product", "pricing", "features", "about", "contact", "blog", "team", "careers",
+         "docs", "support", "login", "signup", "hero", "card", "grid", "footer"]
+
+
+def _dom_tree(nodes: int) -> Dict[str, Any]:
+    count = 0
+
+    def node(depth: int) -> Dict[str, Any]:
+        nonlocal count
+        count += 1
+        result = {
+            "tag": random.choice(["div", "section", "li", "a", "span", "p"]),
+            "id": None,
+            "classes": random.sample(WORDS, 2),
+            "attributes": {"data-testid": random.choice(WORDS)} if random.random() < 0.2 else {},
+            "children": []
+        }
+        if depth < 4 and count < nodes:
+            result["children"] = [node(depth + 1) for _ in range(10)]
+        else:
+            result["text"] = " ".join(random.sample(WORDS, 3))
+        return result
+
+    return node(0)
+
+
+def large_page(nodes: int) -> Dict[str, Any]:
+    """Scrape result shaped like a large marketing page"""
+    random.seed(7)
+    html = "".join(
+        f'<div class="card {random.choice(WORDS)}"><h3>{random.choice(WORDS)}</h3>'
+        f'<p>{" ".join(random.choices(WORDS, k=30))}</p></div>'
+        for _ in range(nodes)
+    )
+    styles = {
+        "display": "flex", "position": "relative", "color": "rgb(17, 24, 39)",
+        "backgroundColor": "rgb(255, 255, 255)", "fontFamily": "Inter, sans-serif",
+        "fontSize": "16px", "padding": "24px", "margin": "0px"
+    }
+    return {
+        "url": "https://example.com/",
+        "title": "Example - Large Page",
+        "html": f"<html><head></head><body>{html}</body></html>",
+        # JPEG bytes are effectively incompressible
+        "screenshot": base64.b64encode(os.urandom(600_000)).decode(),
+        "styles": [{"type": "inline", "content": "x{color:red}" * 400, "rules": 400} for _ in range(20)],
+        "assets": [{"type": "image", "src": f"https://cdn.example.com/img/{i}.png", "alt": random.choice(WORDS),
+                    "width": 320, "height": 200, "className": "thumb", "id": ""} for i in range(400)],
+        "meta_data": {"description": "An example page", "viewport": "width=device-width"},
+        "dom_structure": _dom_tree(nodes),
+        "visual_context": {
+            "colors": [f"rgb({i}, {i}, {i})" for i in range(40)],
+            "fonts": ["Inter|16px|400", "Inter|32px|700"],
+            "layout": styles,
+            "elements": [{"selector": "div", "tagName": "DIV", "className": "card", "id": "",
+                          "position": {"top": i * 10, "left": 0, "width": 300, "height": 200},
+                          "styles": styles, "textContent": "card"} for i in range(100)],
+            "images": [], "links": []
+        },
+        "status": "success",
+        "processing_time": 1.0
+    }
+
+
+def _time(fn: Callable[[], bytes], repeat: int) -> Dict[str, Any]:
+    body = fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return {"bytes": len(body), "ms": round((time.perf_counter() - start) * 1000 / repeat, 2), "body": body}
+
+
+def run(nodes: int, repeat: int) -> List[Dict[str, Any]]:
+    data = large_page(nodes)
+    result = ScrapingResult(**data)
+    compact = ScrapingResult(**{**data, "dom_structure": encode_tree(data["dom_structure"])})
+
+    def baseline() -> bytes:
+        # What FastAPI does for response_model=ScrapingResult
+        validated = ScrapingResult.model_validate(result.model_dump())
+        return json.dumps(jsonable_encoder(validated), ensure_ascii=False, allow_nan=False,
+                          separators=(",", ":")).encode("utf-8")
+
+    cases = {
+        "before: full, pydantic + json": baseline,
+        "after: full": lambda: dumps(_project_scrape_result(result, None)),
+        "after: full, compact DOM": lambda: dumps(_project_scrape_result(compact, None)),
+        "after: fields=title,visual_context": lambda: dumps(
+            _project_scrape_result(result, ["title", "visual_context"])),
+    }
+
+    rows = []
+    for name, fn in cases.items():
+        serialized = _time(fn, repeat)
+        rows.append({"case": name, "encoding": "identity",
+                     "bytes": serialized["bytes"], "serialize_ms": serialized["ms"], "compress_ms": 0.0})
+        for encoding in available_encodings():
+            compressed = _time(lambda: compress(serialized["body"], encoding), repeat)
+            rows.append({"case": name, "encoding": encoding, "bytes": compressed["bytes"],
+                         "serialize_ms": serialized["ms"], "compress_ms": compressed["ms"]})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=10000, help="DOM nodes / HTML cards on the page")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.nodes, args.repeat)
+    print(f"{'case':<38} {'encoding':<9} {'bytes':>11} {'serialize ms':>13} {'compress ms':>12}")
+    for row in rows:
+        print(f"{row['case']:<38} {row['encoding']:<9} {row['bytes']:>11,} "
+              f"{row['serialize_ms']:>13.2f} {row['compress_ms']:>12.2f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"nodes": args.nodes, "repeat": args.repeat, "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Run the API with the stub LLM and throwaway local stores, for benchmarks.
+
+    cd backend && uv run python -m benchmarks.serve --port 8901 --llm-latency 2.0
+
+Scrapes use the real browser pool. LLM responses are never cached unless
+--llm-cache is given, so every clone pays the configured model latency.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from typing import Optional
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--llm-latency", type=float, default=2.0, help="Seconds per model call")
+    parser.add_argument("--llm-first-chunk", type=float, default=0.5, help="Seconds to the first streamed chunk")
+    parser.add_argument("--llm-cache", action="store_true", help="Keep the LLM generation cache enabled")
+    args = parser.parse_args()
+
+    # Stores go to a scratch directory; set before the app reads them on import
+    scratch = tempfile.mkdtemp(prefix="clone-bench-")
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("LLM_CACHE_PATH", os.path.join(scratch, "llm_cache.sqlite3"))
+    os.environ.setdefault("JOBS_DB_PATH", os.path.join(scratch, "jobs.sqlite3"))
+    os.environ.setdefault("BLOB_STORE_DIR", os.path.join(scratch, "blobs"))
+    os.environ.setdefault("REGION_STORE_PATH", os.path.join(scratch, "region_store.sqlite3"))
+    os.environ.setdefault("ASSET_INDEX_PATH", os.path.join(scratch, "asset_index.sqlite3"))
+    # cloned_site.html is written to the working directory, so run from the scratch one
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.chdir(scratch)
+
+    import uvicorn
+
+    import app.llm_workflow_updated as workflow
+    from app.llm_cache import LLMCache
+    from benchmarks.stub_llm import StubChatModel
+
+    class _DisabledLLMCache(LLMCache):
+        def get(self, key: str) -> Optional[str]:
+            return None
+
+        def put(self, key: str, value: str, model: str = ""):
+            pass
+
+    workflow.llm = StubChatModel(latency=args.llm_latency, first_chunk_latency=args.llm_first_chunk)
+    if not args.llm_cache:
+        workflow.llm_cache = _DisabledLLMCache()
+
+    from app.main import app
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""LangChain chat model that returns a canned HTML page after a configurable delay"""
+import asyncio
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+STUB_HTML = """```html
+<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<title>Cloned page</title>
+<style>
+body { margin: 0; font-family: Inter, sans-serif; color: #1f2937; }
+header { display: flex; justify-content: space-between; padding: 16px 48px; background: #111827; color: #fff; }
+.hero { padding: 96px 48px; background: linear-gradient(135deg, #4f46e5, #06b6d4); color: #fff; }
+.grid { display: grid; grid-template-columns: repeat(4, 1fr); gap: 24px; padding: 48px; }
+.card { border-radius: 12px; box-shadow: 0 1px 3px rgba(0,0,0,.1); padding: 24px; }
+</style>
+</head>
+<body>
+<header><div>Acme</div><nav>Home Pricing Docs</nav></header>
+<section class="hero"><h1>Cloned hero</h1></section>
+<div class="grid">""" + "".join(f'<div class="card"><h3>Card {i}</h3><p>Lorem ipsum</p></div>' for i in range(24)) + """</div>
+</body>
+</html>
+```"""
+
+
+class StubChatModel(BaseChatModel):
+    """Stands in for the provider model: `latency` seconds per call, streamed as
+    `chunks` evenly spaced pieces. The first chunk arrives after `first_chunk_latency`."""
+
+    latency: float = 2.0
+    first_chunk_latency: float = 0.5
+    chunks: int = 40
+    output: str = STUB_HTML
+    model_name: str = "stub"
+    temperature: float = 0.1
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _pieces(self) -> List[str]:
+        size = max(1, -(-len(self.output) // self.chunks))
+        return [self.output[i:i + size] for i in range(0, len(self.output), size)]
+
+    def _chunk_delay(self, pieces: int) -> float:
+        return max(self.latency - self.first_chunk_latency, 0.0) / max(pieces - 1, 1)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.output))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.output))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        pieces = self._pieces()
+        time.sleep(self.first_chunk_latency)
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep(self._chunk_delay(len(pieces)))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        pieces = self._pieces()
+        await asyncio.sleep(self.first_chunk_latency)
+        for i, piece in enumerate(pieces):
+            if i:
+                await asyncio.sleep(self._chunk_delay(len(pieces)))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
@@ -0,0 +1,11 @@
+import os
+import tempfile
+
+# Importing app modules builds the LLM client and opens local stores, so give them
+# a dummy key and keep their files out of the working tree
+_scratch = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("LLM_CACHE_PATH", os.path.join(_scratch, "llm_cache.sqlite3"))
+os.environ.setdefault("REGION_STORE_PATH", os.path.join(_scratch, "region_store.sqlite3"))
+os.environ.setdefault("JOBS_DB_PATH", os.path.join(_scratch, "jobs.sqlite3"))
+os.environ.setdefault("BLOB_STORE_DIR", os.path.join(_scratch, "blobs"))
@@ -0,0 +1,179 @@
+import asyncio
+
+import pytest
+
+from app.admission import AdmissionController, Overloaded
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def controller(limit=1, max_queue=4, queue_timeout=5.0):
+    return AdmissionController("test", limit=limit, max_queue=max_queue, queue_timeout=queue_timeout)
+
+
+async def queued(controller, count):
+    # Let waiting tasks reach the queue
+    while controller.queued < count:
+        await asyncio.sleep(0)
+
+
+def test_admits_up_to_limit_without_queueing():
+    async def scenario():
+        admission = controller(limit=2)
+        await admission.acquire()
+        await admission.acquire()
+        assert (admission.active, admission.queued) == (2, 0)
+        admission.release()
+        admission.release()
+        assert admission.active == 0
+
+    run(scenario())
+
+
+def test_queue_full_rejects_immediately():
+    async def scenario():
+        admission = controller(limit=1, max_queue=1)
+        await admission.acquire()
+        waiter = asyncio.create_task(admission.acquire())
+        await queued(admission, 1)
+
+        with pytest.raises(Overloaded) as rejected:
+            await admission.acquire()
+        assert rejected.value.status_code == 429
+        assert rejected.value.reason == "queue_full"
+        assert int(rejected.value.headers["Retry-After"]) >= 1
+        assert admission.rejected == {"queue_full": 1}
+        with pytest.raises(Overloaded):
+            admission.check()
+
+        admission.release()
+        await waiter
+        assert (admission.active, admission.queued) == (1, 0)
+
+    run(scenario())
+
+
+def test_patient_callers_skip_the_queue_cap():
+    async def scenario():
+        admission = controller(limit=1, max_queue=0)
+        await admission.acquire()
+        waiter = asyncio.create_task(admission.acquire(patient=True))
+        await queued(admission, 1)
+        admission.release()
+        await waiter
+        assert admission.active == 1
+
+    run(scenario())
+
+
+def test_release_hands_slots_over_in_fifo_order():
+    async def scenario():
+        admission = controller(limit=1)
+        await admission.acquire()
+        order = []
+
+        async def wait(name):
+            await admission.acquire()
+            order.append(name)
+
+        tasks = [asyncio.create_task(wait(name)) for name in "abc"]
+        await queued(admission, 3)
+        for _ in range(3):
+            admission.release()
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        assert order == ["a", "b", "c"]
+        # Each release passed the slot on rather than freeing it
+        assert admission.active == 1
+
+    run(scenario())
+
+
+def test_queue_timeout_rejects_and_leaves_the_queue():
+    async def scenario():
+        admission = controller(limit=1, queue_timeout=0.01)
+        await admission.acquire()
+        with pytest.raises(Overloaded) as rejected:
+            await admission.acquire()
+        assert rejected.value.reason == "queue_timeout"
+        assert (admission.active, admission.queued) == (1, 0)
+
+    run(scenario())
+
+
+def test_slot_handed_over_at_the_timeout_is_kept(monkeypatch):
+    admission = controller(limit=1)
+    real_wait = asyncio.wait
+
+    async def wait_then_time_out(futures, timeout=None):
+        # The holder releases just as the waiter's timeout fires
+        admission.release()
+        return set(), set(futures)
+
+    async def scenario():
+        await admission.acquire()
+        monkeypatch.setattr(asyncio, "wait", wait_then_time_out)
+        try:
+            await admission.acquire()
+        finally:
+            monkeypatch.setattr(asyncio, "wait", real_wait)
+        assert (admission.active, admission.queued) == (1, 0)
+        assert admission.rejected == {}
+
+    run(scenario())
+
+
+def test_cancel_while_queued_leaves_the_slot_alone():
+    async def scenario():
+        admission = controller(limit=1)
+        await admission.acquire()
+        waiter = asyncio.create_task(admission.acquire())
+        await queued(admission, 1)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert (admission.active, admission.queued) == (1, 0)
+        admission.release()
+        assert admission.active == 0
+
+    run(scenario())
+
+
+def test_cancel_after_grant_passes_the_slot_on():
+    async def scenario():
+        admission = controller(limit=1)
+        await admission.acquire()
+        granted = asyncio.create_task(admission.acquire())
+        await queued(admission, 1)
+        next_waiter = asyncio.create_task(admission.acquire())
+        await queued(admission, 2)
+
+        # The slot is handed to `granted`, which is cancelled before it resumes
+        admission.release()
+        granted.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await granted
+        await asyncio.wait_for(next_waiter, timeout=1)
+        assert (admission.active, admission.queued) == (1, 0)
+
+        admission.release()
+        assert admission.active == 0
+
+    run(scenario())
+
+
+def test_cancel_after_grant_with_no_one_waiting_frees_the_slot():
+    async def scenario():
+        admission = controller(limit=1)
+        await admission.acquire()
+        granted = asyncio.create_task(admission.acquire())
+        await queued(admission, 1)
+        admission.release()
+        granted.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await granted
+        assert (admission.active, admission.queued) == (0, 0)
+
+    run(scenario())
@@ -0,0 +1,146 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app import asset_store as asset_store_module
+from app.asset_store import AssetFetchError, AssetStore, check_public_url
+from app.blob_store import BlobStore
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.mark.parametrize("url", [
+    "ftp://93.184.216.34/logo.png",
+    "file:///etc/passwd",
+    "http://127.0.0.1/admin",
+    "http://10.0.0.5/image.png",
+    "http://169.254.169.254/latest/meta-data",
+    "http://[::1]:8000/",
+])
+def test_non_public_urls_are_refused(url):
+    with pytest.raises(AssetFetchError):
+        run(check_public_url(url))
+
+
+def test_public_address_is_allowed():
+    run(check_public_url("https://93.184.216.34/logo.png"))
+
+
+@pytest.fixture
+def responses(monkeypatch):
+    """Routes for the fake origin: path -> (status, headers, body)"""
+    async def allow_test_hosts(url):
+        if "internal" in url:
+            raise AssetFetchError("non-public")
+
+    monkeypatch.setattr(asset_store_module, "check_public_url", allow_test_hosts)
+    return {}
+
+
+@pytest.fixture
+def store(tmp_path, responses):
+    requests = []
+
+    def handler(request):
+        requests.append(str(request.url))
+        status, headers, body = responses.get(request.url.path, (404, {}, b""))
+        return httpx.Response(status, headers=headers, content=body)
+
+    store = AssetStore(BlobStore(str(tmp_path / "blobs")), base_url="http://api.test/",
+                       index_path=str(tmp_path / "assets.sqlite3"), max_bytes=1000)
+    store._client = httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=False)
+    store.requests = requests
+    return store
+
+
+def test_fetch_all_stores_assets_and_records_errors(store, responses):
+    responses["/logo.png"] = (200, {"content-type": "image/png"}, b"png")
+    responses["/page.html"] = (200, {"content-type": "text/html"}, b"<html>")
+    responses["/icon.svg"] = (200, {"content-type": "image/svg+xml"}, b"<svg/>")
+    assets = [
+        {"src": "https://cdn.test/logo.png", "alt": "logo"},
+        {"src": "https://cdn.test/logo.png"},
+        {"src": "https://cdn.test/page.html"},
+        {"src": "https://cdn.test/icon.svg"},
+        {"src": "https://cdn.test/missing.png"},
+        {"src": "data:image/png;base64,AAAA"},
+    ]
+    annotated = run(store.fetch_all(assets))
+
+    logo = annotated[0]
+    assert (logo["content_type"], logo["bytes"], logo["alt"]) == ("image/png", 3, "logo")
+    assert logo["local_url"] == f"http://api.test/assets/{logo['hash']}"
+    assert annotated[1]["hash"] == logo["hash"]
+    assert "unexpected content type text/html" in annotated[2]["fetch_error"]
+    assert "image/svg+xml" in annotated[3]["fetch_error"]
+    assert annotated[4]["fetch_error"] == "HTTP 404"
+    assert annotated[5] == assets[5]
+    # Duplicate URLs in one page are fetched once
+    assert store.requests.count("https://cdn.test/logo.png") == 1
+    assert store.blob_store.get(logo["hash"]) == (b"png", "image/png")
+
+
+def test_index_skips_urls_already_fetched(store, responses):
+    responses["/logo.png"] = (200, {"content-type": "image/png"}, b"png")
+
+    async def scenario():
+        first = await store.fetch("https://cdn.test/logo.png?utm_source=x")
+        second = await store.fetch("https://cdn.test/logo.png")
+        return first, second
+
+    first, second = run(scenario())
+    assert first == second
+    assert len(store.requests) == 1
+    assert (store.stats()["downloaded"], store.stats()["indexed"]) == (1, 1)
+
+
+def test_concurrent_fetches_share_one_download(store, responses):
+    responses["/logo.png"] = (200, {"content-type": "image/png"}, b"png")
+
+    async def scenario():
+        return await asyncio.gather(*(store.fetch("https://cdn.test/logo.png") for _ in range(5)))
+
+    results = run(scenario())
+    assert len({result["hash"] for result in results}) == 1
+    assert len(store.requests) == 1
+    assert store.stats()["shared"] == 4
+
+
+def test_redirects_are_checked_at_every_hop(store, responses):
+    responses["/a.png"] = (302, {"location": "/b.png"}, b"")
+    responses["/b.png"] = (200, {"content-type": "image/png"}, b"b")
+    responses["/leak.png"] = (302, {"location": "http://internal.test/secret.png"}, b"")
+    responses["/loop.png"] = (302, {"location": "/loop.png"}, b"")
+
+    assert run(store.fetch("https://cdn.test/a.png"))["bytes"] == 1
+    with pytest.raises(AssetFetchError, match="non-public"):
+        run(store.fetch("https://cdn.test/leak.png"))
+    with pytest.raises(AssetFetchError, match="redirects"):
+        run(store.fetch("https://cdn.test/loop.png"))
+    assert "http://internal.test/secret.png" not in store.requests
+
+
+def test_oversized_assets_are_refused(store, responses):
+    responses["/declared.png"] = (200, {"content-type": "image/png", "content-length": "5000"}, b"x" * 5000)
+    responses["/streamed.png"] = (200, {"content-type": "image/png"}, b"x" * 5000)
+    for path in ("/declared.png", "/streamed.png"):
+        with pytest.raises(AssetFetchError, match="too large"):
+            run(store.fetch(f"https://cdn.test{path}"))
+    assert store.stats()["failed"] == 2
+
+
+def test_idle_host_limits_are_forgotten(store, responses, monkeypatch):
+    monkeypatch.setattr(asset_store_module, "MAX_TRACKED_HOSTS", 3)
+    responses["/a.png"] = (200, {"content-type": "image/png"}, b"png")
+
+    async def scenario():
+        for i in range(10):
+            await store.fetch(f"https://host{i}.example/a.png")
+        return {host: limit.users for host, limit in store._host_limits.items()}
+
+    limits = run(scenario())
+    assert len(limits) <= 3 and "host9.example" in limits
+    assert set(limits.values()) == {0}
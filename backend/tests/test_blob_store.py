@@ -0,0 +1,89 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+from app.blob_store import BlobStore
+
+
+@pytest.fixture
+def root(tmp_path):
+    return str(tmp_path / "blobs")
+
+
+def test_put_is_content_addressed(root):
+    store = BlobStore(root)
+    digest = store.put(b"png bytes", "image/png")
+    assert digest == hashlib.sha256(b"png bytes").hexdigest()
+    assert os.path.exists(os.path.join(root, digest[:2], digest))
+    assert store.has(digest)
+    assert store.get(digest) == (b"png bytes", "image/png")
+
+
+def test_same_bytes_are_stored_once(root):
+    store = BlobStore(root)
+    assert store.put(b"same") == store.put(b"same", "image/png")
+    stats = store.stats()
+    assert (stats["writes"], stats["dedup_hits"]) == (1, 1)
+
+
+@pytest.mark.parametrize("digest", ["", "../etc/passwd", "A" * 64, "0" * 63])
+def test_invalid_hashes_are_rejected(root, digest):
+    store = BlobStore(root)
+    assert not store.has(digest)
+    assert store.get(digest) is None
+
+
+def test_unknown_blob_and_missing_metadata(root):
+    store = BlobStore(root)
+    assert store.get("0" * 64) is None
+    digest = store.put(b"data", "image/webp")
+    os.remove(os.path.join(root, digest[:2], f"{digest}.meta"))
+    assert store.get(digest) == (b"data", "application/octet-stream")
+
+
+def test_async_wrappers(root):
+    async def scenario():
+        store = BlobStore(root)
+        digest = await store.aput(b"async", "text/plain")
+        return await store.aget(digest)
+
+    assert asyncio.run(scenario()) == (b"async", "text/plain")
+
+
+def test_evicts_oldest_blobs_past_the_limit(root):
+    store = BlobStore(root, max_bytes=2500)
+    digests = []
+    for i in range(3):
+        digests.append(store.put(bytes([i]) * 1000))
+        path = os.path.join(root, digests[-1][:2], digests[-1])
+        os.utime(path, (1000 + i, 1000 + i))
+    assert not store.has(digests[0])
+    assert store.has(digests[1]) and store.has(digests[2])
+    assert store.stats()["evictions"] == 1
+
+
+def test_dedup_and_reads_count_as_use(root):
+    store = BlobStore(root, max_bytes=2500)
+    first = store.put(b"a" * 1000)
+    second = store.put(b"b" * 1000)
+    for i, digest in enumerate((first, second)):
+        os.utime(os.path.join(root, digest[:2], digest), (1000 + i, 1000 + i))
+    # Re-storing the oldest blob makes the other one the eviction candidate
+    store.put(b"a" * 1000)
+    store.put(b"c" * 1000)
+    assert store.has(first) and not store.has(second)
+
+    os.utime(os.path.join(root, first[:2], first), (1000, 1000))
+    assert store.get(first) is not None
+    assert os.path.getmtime(os.path.join(root, first[:2], first)) > 1000
+
+
+def test_has_all(root):
+    async def scenario():
+        store = BlobStore(root)
+        digest = await store.aput(b"kept")
+        return await store.ahas_all([digest]), await store.ahas_all([digest, "0" * 64]), await store.ahas_all([])
+
+    assert asyncio.run(scenario()) == (True, False, True)
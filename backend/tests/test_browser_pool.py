@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from app import browser_pool as browser_pool_module
+from app.browser_pool import BrowserPool
+
+
+class FakeContext:
+    async def close(self):
+        pass
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **options):
+        return FakeContext()
+
+    async def close(self):
+        self.connected = False
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.chromium = self
+        self.launched = 0
+
+    async def launch(self, **options):
+        self.launched += 1
+        return FakeBrowser()
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+
+@pytest.fixture
+def playwright(monkeypatch):
+    fake = FakePlaywright()
+    monkeypatch.setattr(browser_pool_module, "async_playwright", lambda: fake)
+    return fake
+
+
+def pool_with_memory(memory_mb, **kwargs):
+    pool = BrowserPool(size=1, max_pages_per_browser=0, max_memory_mb=500, acquire_timeout=1, **kwargs)
+    samples = []
+
+    def sample(pooled):
+        samples.append(pooled.index)
+        return memory_mb[0]
+
+    pool._sample_memory = sample
+    return pool, samples
+
+
+def test_releases_use_the_last_sample_instead_of_walking_proc(playwright):
+    async def scenario():
+        pool, samples = pool_with_memory([2000], memory_sample_interval=3600)
+        for _ in range(5):
+            async with pool.context():
+                pass
+        await pool.stop()
+        return samples
+
+    assert asyncio.run(scenario()) == []
+    assert playwright.launched == 1
+
+
+def test_background_sample_triggers_a_recycle_on_the_next_release(playwright):
+    async def scenario():
+        memory_mb = [100]
+        pool, samples = pool_with_memory(memory_mb, memory_sample_interval=0.01)
+        async with pool.context():
+            pass
+        await asyncio.sleep(0.05)
+        pooled = pool._browsers[0]
+        assert samples and pooled.memory_mb == 100
+
+        memory_mb[0] = 2000
+        await asyncio.sleep(0.05)
+        assert pooled.memory_mb == 2000
+        async with pool.context():
+            pass
+        launches = pooled.launches
+        await pool.stop()
+        return launches, pool._sampler
+
+    launches, sampler = asyncio.run(scenario())
+    assert launches == 2
+    assert sampler is None
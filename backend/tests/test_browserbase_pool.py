@@ -0,0 +1,100 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app import browserbase_pool as browserbase_pool_module
+from app.admission import Overloaded
+from app.browserbase_pool import BrowserbaseSessionPool
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = ["initial page"]
+
+    def on(self, event, handler):
+        pass
+
+    def remove_listener(self, event, handler):
+        pass
+
+    async def clear_cookies(self):
+        pass
+
+    async def new_cdp_session(self, page):
+        return SimpleNamespace(send=self._send, detach=self._detach)
+
+    async def _send(self, method, params=None):
+        pass
+
+    async def _detach(self):
+        pass
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = [FakeContext()]
+
+    def is_connected(self):
+        return True
+
+    async def close(self):
+        pass
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.chromium = self
+
+    async def connect_over_cdp(self, url):
+        return FakeBrowser()
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+
+class FakeProvider:
+    def __init__(self):
+        self.created = 0
+
+    async def create(self):
+        self.created += 1
+        return f"session-{self.created}", "ws://session"
+
+    async def is_alive(self, session_id):
+        return True
+
+    async def release(self, session_id):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def playwright(monkeypatch):
+    monkeypatch.setattr(browserbase_pool_module, "async_playwright", lambda: FakePlaywright())
+
+
+def test_sessions_are_reused_and_a_full_pool_is_overload():
+    async def scenario():
+        pool = BrowserbaseSessionPool(FakeProvider(), size=1, acquire_timeout=0.05)
+        async with pool.context():
+            with pytest.raises(Overloaded) as busy:
+                async with pool.context():
+                    pass
+        async with pool.context():
+            pass
+        stats = pool.stats()
+        await pool.stop()
+        return busy.value, stats
+
+    busy, stats = asyncio.run(scenario())
+    assert busy.status_code == 429 and busy.headers["Retry-After"] == "1"
+    assert (stats["sessions_created"], stats["idle"], stats["leased"]) == (1, 1, 0)
+
+
+def test_scrape_admission_matches_the_session_pool():
+    from app.main import WebsiteScraper
+    scraper = SimpleNamespace(session_pool=BrowserbaseSessionPool(FakeProvider(), size=3))
+    assert WebsiteScraper._browser_capacity(scraper) == 3
@@ -0,0 +1,91 @@
+import json
+import random
+
+import pytest
+
+from app.compact_dom import CompactDOM, CompactDOMBuilder, encode_tree, is_compact
+
+
+def node(tag, *children, node_id=None, classes=None, attributes=None, text=None):
+    result = {"tag": tag, "id": node_id, "classes": classes or [], "attributes": attributes or {},
+              "children": list(children)}
+    if text is not None:
+        result["text"] = text
+    return result
+
+
+TREE = node(
+    "body",
+    node("header", node("a", text="Home", attributes={"href": "/"}), classes=["site", "dark"]),
+    node("main",
+         node("h1", text="Title", node_id="title"),
+         node("div", node("p", text="One"), classes=["card"]),
+         node("div", node("p", text="Two"), classes=["card", "wide"], attributes={"data-x": ""})),
+    node("footer", classes=["site"]),
+)
+
+
+def random_tree(rng, depth=0):
+    children = [random_tree(rng, depth + 1) for _ in range(rng.randint(0, 4 if depth < 4 else 0))]
+    return node(rng.choice(["div", "p", "span", "a"]), *children,
+                node_id=rng.choice([None, "main", "x"]),
+                classes=rng.sample(["a", "b", "c"], rng.randint(0, 2)),
+                attributes={"data-i": str(rng.randint(0, 3))} if rng.random() < 0.3 else {},
+                text=rng.choice([None, "text", "more text"]))
+
+
+def test_round_trips_the_nested_tree():
+    dom = CompactDOM(encode_tree(TREE))
+    assert dom.to_tree() == TREE
+    assert len(dom) == 10
+
+
+def test_random_trees_round_trip_through_json():
+    rng = random.Random(3)
+    for _ in range(50):
+        tree = random_tree(rng)
+        payload = json.loads(json.dumps(encode_tree(tree)))
+        assert CompactDOM(payload).to_tree() == tree
+
+
+def test_strings_are_interned_once():
+    payload = encode_tree(TREE)
+    assert len(payload["strings"]) == len(set(payload["strings"]))
+    assert payload["strings"].count("div") == 1
+    assert payload["size"] == len(payload["tag"]) == len(payload["attr_start"]) - 1
+
+
+def test_nodes_are_numbered_in_document_order():
+    dom = CompactDOM(encode_tree(TREE))
+    assert [dom.tag(n) for n in dom] == ["body", "header", "a", "main", "h1", "div", "p", "div", "p", "footer"]
+    assert [dom.tag(c) for c in dom.children(3)] == ["h1", "div", "div"]
+    assert dom.parent(0) is None and dom.parent(4) == 3
+
+
+def test_lookups():
+    dom = CompactDOM(encode_tree(TREE))
+    assert dom.find_by_id("title") == 4
+    assert dom.find_by_id("missing") is None
+    assert dom.find_all("div") == [5, 7]
+    assert dom.find_all(class_name="site") == [1, 9]
+    assert dom.find_all("DIV", "wide") == [7]
+    assert dom.find_all("table") == []
+    assert dom.attributes(7) == {"data-x": ""}
+    assert dom.to_tree(5) == TREE["children"][1]["children"][1]
+
+
+def test_builder_normalizes_class_whitespace():
+    builder = CompactDOMBuilder()
+    root = builder.add("div", classes="  a \n b ")
+    builder.add("span", root, text="")
+    dom = CompactDOM(builder.build())
+    assert dom.classes(0) == ["a", "b"]
+    assert dom.text(1) is None
+
+
+def test_empty_and_foreign_payloads():
+    empty = encode_tree(None)
+    assert is_compact(empty) and CompactDOM(empty).to_tree() == {}
+    assert not is_compact(TREE) and not is_compact(None)
+    with pytest.raises(ValueError):
+        CompactDOM(TREE)
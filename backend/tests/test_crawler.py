@@ -0,0 +1,87 @@
+import asyncio
+import contextlib
+from types import SimpleNamespace
+
+from pydantic import BaseModel
+
+from app.crawler import crawl, crawl_links, origin
+
+
+class Request(BaseModel):
+    url: str
+    full_page: bool = True
+
+
+def page(*hrefs):
+    return SimpleNamespace(status="success", visual_context={"links": [{"href": href} for href in hrefs]})
+
+
+def test_origin_drops_default_ports():
+    assert origin("https://Example.com:443/a") == ("https", "example.com")
+    assert origin("http://example.com:8080/") == ("http", "example.com:8080")
+
+
+def test_crawl_links_keeps_same_origin_pages_in_order():
+    result = page("https://example.com/about#team", "http://example.com/insecure", "https://cdn.example.com/x",
+                  "https://example.com:8443/other-port", "mailto:hi@example.com", "/relative",
+                  "https://example.com/brochure.PDF", "https://example.com/blog/", None)
+    assert crawl_links(result, origin("https://example.com/")) == [
+        "https://example.com/about", "https://example.com/blog/"]
+    assert crawl_links(SimpleNamespace(visual_context=None), ("https", "example.com")) == []
+
+
+class FakeScraper:
+    def __init__(self, site):
+        self.site = site
+        self.visited = []
+        self.contexts = 0
+
+    @contextlib.asynccontextmanager
+    async def crawl_context(self, seed):
+        self.contexts += 1
+        yield "context"
+
+    async def scrape_website(self, request, cache_policy=None, patient=False, browser_context=None):
+        assert patient and browser_context == "context"
+        self.visited.append(request.url)
+        await asyncio.sleep(0)
+        if request.url not in self.site:
+            return SimpleNamespace(url=request.url, status="error: 404", visual_context={})
+        return SimpleNamespace(url=request.url, full_page=request.full_page, **vars(page(*self.site[request.url])))
+
+
+SITE = {
+    "https://example.com/": ["https://example.com/a", "https://example.com/b", "https://other.com/"],
+    "https://example.com/a": ["https://example.com/", "https://example.com/a/deep", "https://example.com/gone"],
+    "https://example.com/b": ["https://example.com/?utm_source=nav", "https://example.com/b/deep"],
+    "https://example.com/a/deep": ["https://example.com/a/deeper"],
+    "https://example.com/b/deep": [],
+}
+
+
+def collect(scraper, **kwargs):
+    async def scenario():
+        return [(depth, result) async for depth, result in
+                crawl(scraper, Request(url="https://example.com/", full_page=False), **kwargs)]
+
+    return asyncio.run(scenario())
+
+
+def test_crawl_is_breadth_first_and_deduplicated():
+    scraper = FakeScraper(SITE)
+    pages = collect(scraper, max_depth=2)
+    assert [(depth, result.url) for depth, result in pages] == [
+        (0, "https://example.com/"),
+        (1, "https://example.com/a"), (1, "https://example.com/b"),
+        (2, "https://example.com/a/deep"), (2, "https://example.com/gone"), (2, "https://example.com/b/deep"),
+    ]
+    assert pages[4][1].status.startswith("error")
+    # Seed options carry over to every page, and one context serves the whole crawl
+    assert all(result.full_page is False for _, result in pages if not result.status.startswith("error"))
+    assert scraper.contexts == 1
+
+
+def test_crawl_respects_depth_and_page_limits():
+    assert len(collect(FakeScraper(SITE), max_depth=0)) == 1
+    assert [result.url for _, result in collect(FakeScraper(SITE), max_depth=5, max_pages=3)] == [
+        "https://example.com/", "https://example.com/a", "https://example.com/b"]
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from app.admission import Overloaded
+from app.host_scheduler import HostScheduler, TokenBucket, backoff_delay, host_key, parse_retry_after
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def scheduler(max_per_host=1, rate=0.0, burst=1.0, backoff_base=1.0, backoff_max=30.0, queue_timeout=5.0):
+    return HostScheduler(max_per_host=max_per_host, rate=rate, burst=burst,
+                         backoff_base=backoff_base, backoff_max=backoff_max, queue_timeout=queue_timeout)
+
+
+async def queued(scheduler, host, count):
+    while len(scheduler._state(host).waiters) < count:
+        await asyncio.sleep(0)
+
+
+def test_host_key_lowercases_the_host():
+    assert host_key("https://Example.COM:8443/path?q=1") == "example.com"
+    assert host_key("not a url") == ""
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+    assert 55 <= parse_retry_after(later) <= 60
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_backoff_delay_is_capped():
+    for attempt in range(12):
+        assert 0 <= backoff_delay(attempt, base=1.0, cap=8.0) <= min(8.0, 2 ** attempt)
+
+
+def test_token_bucket_bursts_then_paces():
+    bucket = TokenBucket(rate=10.0, burst=2.0)
+    assert bucket.take() == 0.0
+    assert bucket.take() == 0.0
+    # Tokens go negative, so each later caller waits its turn
+    assert bucket.take() == pytest.approx(0.1, abs=0.02)
+    assert bucket.take() == pytest.approx(0.2, abs=0.02)
+    assert TokenBucket(rate=0.0, burst=1.0).take() == 0.0
+
+
+def test_record_failure_honours_retry_after_up_to_the_cap():
+    hosts = scheduler(backoff_max=10.0)
+    assert hosts.record_failure("a.test", retry_after=3.0) == 3.0
+    assert hosts.record_failure("a.test", retry_after=600.0) == 10.0
+    assert hosts._state("a.test").failures == 2
+    hosts.record_success("a.test")
+    assert hosts._state("a.test").failures == 0
+
+
+def test_pace_waits_out_the_backoff():
+    async def scenario():
+        hosts = scheduler()
+        hosts.record_failure("a.test", retry_after=0.05)
+        start = time.monotonic()
+        await hosts.pace("a.test")
+        assert time.monotonic() - start >= 0.04
+        # Other hosts aren't held back
+        start = time.monotonic()
+        await hosts.pace("b.test")
+        assert time.monotonic() - start < 0.04
+
+    run(scenario())
+
+
+def test_slots_are_per_host():
+    async def scenario():
+        hosts = scheduler(max_per_host=1, queue_timeout=0.01)
+        async with hosts.slot("https://a.test/1") as host:
+            assert host == "a.test"
+            async with hosts.slot("https://b.test/1"):
+                pass
+            with pytest.raises(Overloaded) as rejected:
+                async with hosts.slot("https://a.test/2"):
+                    pass
+            assert rejected.value.reason == "queue_timeout"
+            assert "a.test" in rejected.value.detail
+        state = hosts._state("a.test")
+        assert (state.active, len(state.waiters)) == (0, 0)
+
+    run(scenario())
+
+
+def test_cancel_after_grant_passes_the_host_slot_on():
+    async def scenario():
+        hosts = scheduler(max_per_host=1)
+        state = hosts._state("a.test")
+        await hosts._acquire("a.test", state, patient=False)
+        granted = asyncio.create_task(hosts._acquire("a.test", state, patient=False))
+        await queued(hosts, "a.test", 1)
+        next_waiter = asyncio.create_task(hosts._acquire("a.test", state, patient=False))
+        await queued(hosts, "a.test", 2)
+
+        hosts._release(state)
+        granted.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await granted
+        await asyncio.wait_for(next_waiter, timeout=1)
+        assert (state.active, len(state.waiters)) == (1, 0)
+        hosts._release(state)
+        assert state.active == 0
+
+    run(scenario())
+
+
+def test_cancel_while_queued_for_a_host():
+    async def scenario():
+        hosts = scheduler(max_per_host=1)
+        state = hosts._state("a.test")
+        await hosts._acquire("a.test", state, patient=False)
+        waiter = asyncio.create_task(hosts._acquire("a.test", state, patient=True))
+        await queued(hosts, "a.test", 1)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert (state.active, len(state.waiters)) == (1, 0)
+
+    run(scenario())
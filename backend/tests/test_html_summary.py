@@ -0,0 +1,53 @@
+from app.html_summary import summarize_html
+
+CARDS = "".join(f"<div class=card><h3>Card {i}</h3><p>x</p></div>" for i in range(5))
+PAGE = f"""<html><head><style>.a{{}}</style><script>var x = '<h1>not a heading</h1>'</script></head><body>
+<header id=top class="site dark wide"><nav><a href=/>Home</a><a href=/a>About <b>us</b></a></nav></header>
+<main><h1>Welcome  to
+ the site</h1><section class=cards>{CARDS}</section>
+<!-- <h2>commented out</h2> --><div role=search><input></div></main>
+<footer><p>c</p></footer></body></html>"""
+
+
+def test_outlines_landmarks_headings_links_and_repeats():
+    assert summarize_html(PAGE).splitlines() == [
+        "<header#top.site.dark>",
+        "  <nav>",
+        "    links: Home | About us",
+        "<main>",
+        "  h1: Welcome to the site",
+        "  <section.cards>",
+        "    h3: Card 0",
+        "    h3: Card 1",
+        "    5x div.card",
+        "  <div[role=search]>",
+        "<footer>",
+    ]
+
+
+def test_same_page_gives_the_same_outline():
+    assert summarize_html(PAGE) == summarize_html(PAGE, chunk_size=7)
+
+
+def test_unclosed_elements_are_closed_implicitly():
+    outline = summarize_html("<main><section><h2>Open</h2></main><footer><h2>After</h2></footer>")
+    assert outline.splitlines() == ["<main>", "  <section>", "    h2: Open", "<footer>", "  h2: After"]
+
+
+def test_shells_fall_back_to_visible_text():
+    assert summarize_html("<div id=root><span>Loading   app</span></div>") == "text: Loading app"
+    assert summarize_html("") == ""
+
+
+def test_limits_bound_the_outline():
+    sections = "".join(f"<section><h2>S{i}</h2></section>" for i in range(50))
+    by_lines = summarize_html(sections, max_lines=5).splitlines()
+    assert len(by_lines) == 6 and by_lines[-1] == "(outline truncated)"
+
+    by_bytes = summarize_html(sections, max_bytes=60)
+    assert "S0" in by_bytes and "S5" not in by_bytes
+    assert by_bytes.endswith("(outline truncated)")
+
+    by_elements = summarize_html(sections, max_elements=10, chunk_size=64)
+    assert "S49" not in by_elements
+    assert by_elements.endswith("(outline truncated)")
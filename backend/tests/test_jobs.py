@@ -0,0 +1,171 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from app.jobs import JobQueue, JobStore
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "jobs.sqlite3")
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_claims_by_priority_then_age(path):
+    store = JobStore(path)
+    low = store.insert("scrape", {"n": 1}, 0)
+    high = store.insert("scrape", {"n": 2}, 5)
+    later = store.insert("scrape", {"n": 3}, 0)
+    assert [store.claim()["id"] for _ in range(3)] == [high["id"], low["id"], later["id"]]
+    assert store.claim() is None
+
+
+def test_claim_records_the_owner(path):
+    store = JobStore(path, worker_id="w1")
+    store.insert("scrape", {}, 0)
+    job = store.claim()
+    assert (job["status"], job["worker_id"]) == ("running", "w1")
+    assert store.get(job["id"])["worker_id"] == "w1"
+
+
+def test_processes_sharing_the_file_never_claim_a_job_twice(path):
+    stores = [JobStore(path), JobStore(path)]
+    for i in range(100):
+        stores[0].insert("scrape", {"i": i}, 0)
+    claimed = [[], []]
+
+    def drain(index):
+        while (job := stores[index].claim()) is not None:
+            claimed[index].append(job["id"])
+
+    threads = [threading.Thread(target=drain, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    ids = claimed[0] + claimed[1]
+    assert len(ids) == len(set(ids)) == 100
+
+
+def test_cancel_only_applies_to_queued_jobs(path):
+    store = JobStore(path)
+    queued = store.insert("scrape", {}, 0)
+    assert store.cancel_queued(queued["id"])
+    assert store.get(queued["id"])["status"] == "cancelled"
+    assert not store.cancel_queued(queued["id"])
+
+    store.insert("scrape", {}, 0)
+    running = store.claim()
+    assert not store.cancel_queued(running["id"])
+
+
+def test_requeue_leaves_a_live_peers_jobs_alone(path):
+    mine, peer = JobStore(path, worker_id="mine"), JobStore(path, worker_id="peer")
+    peer.insert("scrape", {}, 0)
+    peer_job = peer.claim()
+    mine.insert("scrape", {}, 0)
+    own_job = mine.claim()
+
+    # A restart of "mine" reclaims its own leftovers but not the peer's fresh lease
+    assert mine.requeue_expired(lease=60) == 1
+    assert mine.get(own_job["id"])["status"] == "queued"
+    assert mine.get(peer_job["id"])["status"] == "running"
+
+
+def test_requeue_takes_back_jobs_whose_lease_lapsed(path):
+    mine, peer = JobStore(path, worker_id="mine"), JobStore(path, worker_id="peer")
+    peer.insert("scrape", {}, 0)
+    job = peer.claim()
+    peer.update(job["id"], heartbeat_at=time.time() - 120)
+    assert mine.requeue_expired(lease=60) == 1
+    requeued = mine.get(job["id"])
+    assert (requeued["status"], requeued["worker_id"], requeued["heartbeat_at"]) == ("queued", None, None)
+
+
+def test_heartbeat_renews_only_own_jobs(path):
+    mine, peer = JobStore(path, worker_id="mine"), JobStore(path, worker_id="peer")
+    peer.insert("scrape", {}, 0)
+    job = peer.claim()
+    peer.update(job["id"], heartbeat_at=0.0)
+    mine.heartbeat([job["id"]])
+    assert mine.get(job["id"])["heartbeat_at"] == 0.0
+    peer.heartbeat([job["id"]])
+    assert peer.get(job["id"])["heartbeat_at"] > 0
+
+
+def test_existing_tables_gain_the_lease_columns(path):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE jobs (
+            id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL,
+            priority INTEGER NOT NULL DEFAULT 0, status TEXT NOT NULL, stage TEXT NOT NULL,
+            progress REAL NOT NULL DEFAULT 0, result TEXT, error TEXT,
+            created_at REAL NOT NULL, started_at REAL, finished_at REAL
+        )
+    """)
+    conn.execute("INSERT INTO jobs (id, kind, payload, status, stage, created_at) "
+                 "VALUES ('old', 'scrape', '{}', 'running', 'scraping', 0)")
+    conn.commit()
+    conn.close()
+    store = JobStore(path)
+    # Rows from before leases have no heartbeat, so they count as abandoned
+    assert store.requeue_expired(lease=60) == 1
+    assert store.get("old")["status"] == "queued"
+
+
+def test_queue_runs_cancels_and_reports_jobs(path):
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def runner(payload, report):
+            await report("working", 0.5)
+            if payload.get("slow"):
+                await gate.wait()
+            if payload.get("fail"):
+                raise RuntimeError("boom")
+            return {"echo": payload}
+
+        queue = JobQueue(runner, store=JobStore(path), workers=2, poll_interval=0.01)
+        await queue.start()
+        try:
+            ok = await queue.submit("scrape", {"n": 1})
+            bad = await queue.submit("scrape", {"fail": True})
+            slow = await queue.submit("scrape", {"slow": True})
+            for _ in range(200):
+                statuses = [(await queue.get(j["id"]))["status"] for j in (ok, bad, slow)]
+                if statuses == ["succeeded", "failed", "running"]:
+                    break
+                await asyncio.sleep(0.01)
+            assert statuses == ["succeeded", "failed", "running"]
+            assert (await queue.get(ok["id"]))["result"] == {"echo": {"n": 1}}
+            assert (await queue.get(bad["id"]))["error"] == "boom"
+            assert (await queue.cancel(slow["id"]))["status"] == "cancelled"
+        finally:
+            await queue.stop()
+
+    run(scenario())
+
+
+def test_jobs_running_at_shutdown_go_back_on_the_queue(path):
+    async def scenario():
+        async def runner(payload, report):
+            await asyncio.sleep(60)
+
+        queue = JobQueue(runner, store=JobStore(path), workers=1, poll_interval=0.01)
+        await queue.start()
+        job = await queue.submit("scrape", {})
+        for _ in range(200):
+            if (await queue.get(job["id"]))["status"] == "running":
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        stopped = await queue.get(job["id"])
+        assert (stopped["status"], stopped["worker_id"]) == ("queued", None)
+
+    run(scenario())
@@ -0,0 +1,58 @@
+import asyncio
+import os
+
+import pytest
+
+from app.llm_cache import LLMCache
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "llm_cache.sqlite3")
+
+
+def test_key_covers_every_input():
+    key = LLMCache.make_key("gpt", 0.2, "system", "prompt")
+    assert key == LLMCache.make_key("gpt", 0.2, "system", "prompt")
+    assert key != LLMCache.make_key("gpt", 0.3, "system", "prompt")
+    assert key != LLMCache.make_key("other", 0.2, "system", "prompt")
+    # Fields are separated, so moving text across the boundary changes the key
+    assert LLMCache.make_key("gpt", 0, "ab", "c") != LLMCache.make_key("gpt", 0, "a", "bc")
+
+
+def test_round_trip_and_counters(path):
+    cache = LLMCache(path)
+    assert cache.get("k") is None
+    cache.put("k", "<html>é</html>", model="gpt")
+    assert cache.get("k") == "<html>é</html>"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["stores"]) == (1, 1, 1)
+
+
+def test_entries_persist_across_instances(path):
+    asyncio.run(LLMCache(path).aput("k", "value"))
+    reopened = LLMCache(path)
+    assert asyncio.run(reopened.aget("k")) == "value"
+    assert reopened.stats()["bytes"] > 0
+
+
+def test_overwrite_keeps_the_size_accounting(path):
+    cache = LLMCache(path)
+    cache.put("k", "a" * 1000)
+    cache.put("k", "b")
+    assert cache.stats()["bytes"] == LLMCache(path)._connect().execute(
+        "SELECT SUM(size) FROM generations").fetchone()[0]
+
+
+def test_evicts_least_recently_used(path):
+    # Random text barely compresses, so each entry costs roughly its length
+    values = {key: os.urandom(300).hex() for key in "abc"}
+    cache = LLMCache(path, max_bytes=800)
+    cache.put("a", values["a"])
+    cache.put("b", values["b"])
+    cache.get("a")
+    cache.put("c", values["c"])
+    assert cache.get("b") is None
+    assert cache.get("a") == values["a"]
+    assert cache.get("c") == values["c"]
+    assert cache.stats()["evictions"] >= 1
@@ -0,0 +1,85 @@
+import pytest
+
+from app.prompt_builder import (PromptSection, assemble_prompt, asset_items, build_sections, compact_element,
+                                compact_styles, downloaded_assets)
+
+
+def test_compact_styles_drops_defaults_inapplicable_and_inherited_values():
+    styles = {"display": "block", "position": "static", "padding": "0px", "margin": "8px",
+              "border": "0px none rgb(0, 0, 0)", "justifyContent": "center", "gridTemplateColumns": "1fr 1fr",
+              "color": "rgb(0, 0, 0)", "fontFamily": "Inter", "opacity": "", "zIndex": None}
+    assert compact_styles(styles, {"color": "rgb(0, 0, 0)"}) == {"display": "block", "margin": "8px",
+                                                                "fontFamily": "Inter"}
+    assert compact_styles({"display": "inline-flex", "justifyContent": "center"}) == {
+        "display": "inline-flex", "justifyContent": "center"}
+    assert "gridTemplateColumns" in compact_styles({"display": "grid", "gridTemplateColumns": "1fr"})
+
+
+def test_compact_element():
+    element = {"selector": "h1", "tagName": "H1", "id": "", "className": "title",
+               "position": {"left": 10.4, "top": 20.6, "width": 300, "height": None},
+               "styles": {"display": "block"}, "textContent": "  Hello \n world  " + "x" * 200}
+    compact = compact_element(element)
+    assert compact["box"] == [10, 21, 300, 0]
+    assert "tag" not in compact and "id" not in compact
+    assert compact["className"] == "title"
+    assert compact["text"].startswith("Hello world x") and len(compact["text"]) == 120
+    assert compact_element({"selector": ".hero", "tagName": "SECTION"}) == {"selector": ".hero", "tag": "section"}
+
+
+def test_section_fills_in_order_and_reports_omissions():
+    section = PromptSection("colors", "### Colors:", ["red", "blue", "red", "green"], 0.5)
+    assert section.items == ["red", "blue", "green"]
+    budget = section.tokens + section.item_tokens[0] + section.item_tokens[1]
+    assert section.fill(budget) == budget
+    assert section.render() == "### Colors:\nred\nblue\n(+1 more omitted)"
+    assert section.fill(section.item_tokens[2]) == section.item_tokens[2]
+    assert section.render() == "### Colors:\nred\nblue\ngreen"
+
+
+def test_section_without_room_renders_none():
+    section = PromptSection("links", "### Links:", ["a"], 0.5)
+    assert section.fill(0) == 0
+    assert section.render() == "### Links:\n(none)"
+    assert PromptSection("empty", "### Empty:", [], 0.5).fill(1000) == 0
+
+
+@pytest.mark.parametrize("budget", [50, 200, 1000, 100000])
+def test_prompt_stays_within_budget(budget):
+    sections = [
+        PromptSection("big", "### Big:", [f"item {i} " + "word " * 20 for i in range(200)], 0.5),
+        PromptSection("small", "### Small:", [f"colour {i}" for i in range(10)], 0.1),
+    ]
+    build = assemble_prompt("Header", sections, "Footer", budget)
+    # Omission markers and the joins between sections aren't charged to the sections
+    assert build.tokens <= budget + 8 * len(sections)
+    report = build.report()
+    assert report["budget"] == budget
+    assert report["sections"]["small"]["available"] == 10
+
+
+def test_share_caps_keep_room_for_lower_priority_sections():
+    big = PromptSection("big", "### Big:", ["word " * 50 for _ in range(100)], 0.5)
+    small = PromptSection("small", "### Small:", ["red", "blue"], 0.1)
+    assemble_prompt("Header", [big, small], "Footer", 2000)
+    assert small.included == 2
+    assert 0 < big.included < 100
+
+
+def test_build_sections_uses_downloaded_assets_only():
+    assets = [{"type": "image", "src": "https://x/a.png", "local_url": "/assets/a", "alt": "A", "width": 0},
+              {"type": "image", "src": "https://x/b.png", "fetch_error": "HTTP 404"},
+              {"type": "font", "src": "https://x/f.css", "local_url": "/assets/f"}]
+    assert [a["src"] for a in downloaded_assets(assets, ("image",))] == ["https://x/a.png"]
+    assert asset_items(downloaded_assets(assets))[0] == \
+        '{"type":"image","src":"https://x/a.png","url":"/assets/a","alt":"A"}'
+
+    context = {"html": "<main><h1>Hi</h1></main>", "assets": assets,
+               "visual_context": {"layout": {"display": "block", "color": ""}, "colors": ["red"],
+                                  "links": [{"href": "/a", "text": "A", "id": ""}]}}
+    sections = {s.name: s for s in build_sections(context, lambda html: "outline\nof page")}
+    assert sections["layout"].items == ['{"display":"block"}']
+    assert sections["html"].items == ["outline", "of page"]
+    assert len(sections["assets"].items) == 2
+    assert sections["links"].items == ['{"href":"/a","text":"A"}']
+    assert sections["images"].items == []
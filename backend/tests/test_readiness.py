@@ -0,0 +1,70 @@
+import asyncio
+import re
+
+from app.readiness import READINESS_SCRIPT, NetworkTracker, wait_for_page_ready
+
+
+class FakePage:
+    def __init__(self, page_state=None, delay=0.0):
+        self.handlers = {}
+        self.page_state = page_state if page_state is not None else {"ready": True, "signals": {"dom": 5}}
+        self.delay = delay
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    async def evaluate(self, script, arg):
+        await asyncio.sleep(self.delay)
+        if isinstance(self.page_state, Exception):
+            raise self.page_state
+        return self.page_state
+
+
+def test_dom_quiet_ignores_attribute_churn():
+    options = re.search(r"observer\.observe\(document, (\{[^}]*\})\)", READINESS_SCRIPT).group(1)
+    assert "childList: true" in options and "characterData: true" in options
+    assert "attributes" not in options
+
+
+def test_default_cap_is_no_slower_than_the_fixed_wait():
+    from app.main import ScrapingRequest
+    assert ScrapingRequest(url="https://example.com").readiness_timeout <= 3
+
+
+def test_tracker_ignores_stalled_requests():
+    page = FakePage()
+    tracker = NetworkTracker(page, stall_ms=0)
+    page.handlers["request"]("long-poll")
+    assert tracker.active_requests() == 0
+    tracker.stall_ms = 60000
+    assert tracker.active_requests() == 1
+    page.handlers["requestfinished"]("long-poll")
+    assert tracker.active_requests() == 0
+
+
+def test_ready_reports_the_last_signal():
+    async def scenario():
+        page = FakePage({"ready": True, "signals": {"fonts": 1, "dom": 40}})
+        tracker = NetworkTracker(page)
+        return await wait_for_page_ready(page, tracker, timeout=1, network_quiet_ms=10)
+
+    result = asyncio.run(scenario())
+    assert result["ready"] is True
+    assert set(result["signals"]) == {"fonts", "dom", "network"}
+    assert result["signal"] == max(result["signals"], key=result["signals"].get)
+
+
+def test_busy_network_or_broken_script_times_out():
+    async def scenario(page, busy):
+        tracker = NetworkTracker(page)
+        if busy:
+            page.handlers["request"]("pending")
+        return await wait_for_page_ready(page, tracker, timeout=0.2, network_quiet_ms=10)
+
+    busy = asyncio.run(scenario(FakePage(), busy=True))
+    assert (busy["ready"], busy["signal"]) == (False, "timeout")
+    assert "network" not in busy["signals"]
+
+    broken = asyncio.run(scenario(FakePage(RuntimeError("context destroyed")), busy=False))
+    assert (broken["ready"], broken["signal"]) == (False, "timeout")
+    assert set(broken["signals"]) == {"network"}
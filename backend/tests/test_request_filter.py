@@ -0,0 +1,173 @@
+import asyncio
+
+from app.request_filter import RequestFilter
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class FakeCDPSession:
+    def __init__(self):
+        self.sent = []
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    async def send(self, method, params=None):
+        self.sent.append((method, params))
+        if method == "Page.getFrameTree":
+            return {"frameTree": {"frame": {"id": "main"}}}
+        return {}
+
+    async def pause(self, url, resource_type, frame_id="main"):
+        await self.handlers["Fetch.requestPaused"]({
+            "requestId": url, "request": {"url": url}, "resourceType": resource_type, "frameId": frame_id
+        })
+        return self.sent[-1]
+
+
+class FakeContext:
+    def __init__(self, session):
+        self.session = session
+
+    async def new_cdp_session(self, page):
+        return self.session
+
+
+class FakePage:
+    def __init__(self, session):
+        self.context = FakeContext(session)
+
+
+def attached(mode="standard"):
+    request_filter = RequestFilter(mode)
+    session = FakeCDPSession()
+    assert run(request_filter.attach_cdp(FakePage(session)))
+    return request_filter, session
+
+
+def test_cdp_patterns_match_types_not_url_substrings():
+    request_filter = RequestFilter("light")
+    patterns = request_filter.cdp_patterns()
+    assert {"urlPattern": "*", "resourceType": "Image"} in patterns
+    assert {"urlPattern": "*", "resourceType": "Media"} in patterns
+    assert {"urlPattern": "*://doubleclick.net/*"} in patterns
+    assert {"urlPattern": "*://*.doubleclick.net/*"} in patterns
+    assert all(p["urlPattern"] == "*" for p in patterns if "resourceType" in p)
+
+
+def test_cdp_never_blocks_the_main_document():
+    request_filter, session = attached()
+
+    async def scenario():
+        for url in ("https://www.movies.com/", "https://www.oggi.it/", "https://example.com/?img=a.png"):
+            method, params = await session.pause(url, "Document")
+            assert method == "Fetch.continueRequest"
+
+    run(scenario())
+    assert request_filter.report()["blocked"] == 0
+    assert request_filter.report()["method"] == "cdp"
+
+
+def test_cdp_blocks_types_and_domains():
+    request_filter, session = attached("light")
+
+    async def scenario():
+        assert (await session.pause("https://example.com/clip.mp4", "Media"))[0] == "Fetch.failRequest"
+        assert (await session.pause("https://example.com/hero.jpg", "Image"))[0] == "Fetch.failRequest"
+        # Light mode keeps vector and icon images
+        assert (await session.pause("https://example.com/logo.svg", "Image"))[0] == "Fetch.continueRequest"
+        # Ad frames are documents too, but not the main one
+        ad = await session.pause("https://ads.doubleclick.net/frame", "Document", frame_id="child")
+        assert ad == ("Fetch.failRequest", {"requestId": "https://ads.doubleclick.net/frame",
+                                            "errorReason": "BlockedByClient"})
+
+    run(scenario())
+    report = request_filter.report()
+    assert report["blocked_by_type"] == {"media": 1, "image": 1, "document": 1}
+    assert report["blocked_by_domain"] == {"doubleclick.net": 1}
+    assert report["blocked_asset_urls"] == ["https://example.com/hero.jpg"]
+    assert report["allowed"] == 1
+
+
+def test_attach_cdp_falls_back_when_cdp_is_unavailable():
+    class NoCDPContext:
+        async def new_cdp_session(self, page):
+            raise RuntimeError("not chromium")
+
+    page = FakePage(None)
+    page.context = NoCDPContext()
+    request_filter = RequestFilter()
+    assert run(request_filter.attach_cdp(page)) is False
+    assert request_filter.report()["method"] == "none"
+
+
+class FakeFrame:
+    def __init__(self, parent_frame=None):
+        self.parent_frame = parent_frame
+
+
+class FakeRequest:
+    def __init__(self, url, resource_type, navigation=False, frame=None):
+        self.url = url
+        self.resource_type = resource_type
+        self.navigation = navigation
+        self.frame = frame or FakeFrame()
+
+    def is_navigation_request(self):
+        return self.navigation
+
+
+class FakeRoute:
+    def __init__(self):
+        self.outcome = None
+
+    async def continue_(self):
+        self.outcome = "continue"
+
+    async def abort(self, error_code=None):
+        self.outcome = error_code
+
+
+def routed(request_filter, *args, **kwargs):
+    route = FakeRoute()
+    run(request_filter._handle(route, FakeRequest(*args, **kwargs)))
+    return route.outcome
+
+
+def test_route_never_blocks_the_main_document():
+    request_filter = RequestFilter("light", domains=["example.com"])
+    assert routed(request_filter, "https://www.example.com/", "document", navigation=True) == "continue"
+    # The same navigation inside an iframe is just another blocked request
+    child = FakeFrame(parent_frame=FakeFrame())
+    assert routed(request_filter, "https://www.example.com/", "document", navigation=True,
+                  frame=child) == "blockedbyclient"
+
+
+def test_route_blocks_domains_types_and_counts_savings():
+    request_filter = RequestFilter(domains=["Tracker.example"])
+    assert routed(request_filter, "https://cdn.tracker.example/t.js", "script") == "blockedbyclient"
+    assert routed(request_filter, "https://www.google-analytics.com/collect", "xhr") == "blockedbyclient"
+    assert routed(request_filter, "https://example.com/intro.webm", "media") == "blockedbyclient"
+    assert routed(request_filter, "https://example.com/hero.jpg", "image") == "continue"
+    assert routed(request_filter, "https://example.com/app.js", "script") == "continue"
+    report = request_filter.report()
+    assert (report["method"], report["allowed"], report["blocked"]) == ("route", 2, 3)
+    assert report["blocked_by_domain"] == {"tracker.example": 1, "google-analytics.com": 1}
+    assert report["estimated_bytes_saved"] == 30_000 + 5_000 + 1_500_000
+
+
+def test_extra_domains_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("REQUEST_BLOCKLIST_EXTRA", " ads.example , ")
+    request_filter = RequestFilter()
+    assert "ads.example" in request_filter.blocked_domains
+    assert routed(request_filter, "https://x.ads.example/a.png", "image") == "blockedbyclient"
+
+
+def test_only_clone_paths_block_by_default():
+    from app.main import CLONE_BLOCK_MODE, CloneJobRequest, ScrapingRequest
+    assert ScrapingRequest(url="https://example.com").block_mode == "off"
+    assert CloneJobRequest(url="https://example.com").block_mode == CLONE_BLOCK_MODE == "standard"
+    assert CloneJobRequest(url="https://example.com", block_mode="off").block_mode == "off"
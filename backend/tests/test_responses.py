@@ -0,0 +1,75 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+from app import responses
+from app.responses import available_encodings, fast_json_response, negotiate_encoding
+
+PREFERRED = available_encodings()[0]
+
+
+@pytest.mark.parametrize("header", [None, "", "identity", "deflate", "gzip;q=0", "*;q=0"])
+def test_identity_when_nothing_usable_is_accepted(header):
+    assert negotiate_encoding(header) is None
+
+
+def test_gzip_is_always_available():
+    assert "gzip" in available_encodings()
+    assert negotiate_encoding("gzip") == "gzip"
+    assert negotiate_encoding("deflate, GZIP") == "gzip"
+
+
+def test_ties_go_to_the_server_preference():
+    assert negotiate_encoding("gzip, deflate, br, zstd") == PREFERRED
+    assert negotiate_encoding("*") == PREFERRED
+
+
+def test_client_weights_win_over_server_preference():
+    assert negotiate_encoding("zstd;q=0.2, br;q=0.5, gzip;q=0.9") == "gzip"
+    assert negotiate_encoding("gzip;q=0.1, *;q=0.5") == PREFERRED
+
+
+def test_explicit_zero_beats_wildcard():
+    assert negotiate_encoding("*, gzip;q=0") == (PREFERRED if PREFERRED != "gzip" else None)
+
+
+def test_malformed_quality_is_treated_as_refused():
+    assert negotiate_encoding("gzip;q=abc") is None
+    assert negotiate_encoding(" gzip ; q=0.5 ,, ;q=1") == "gzip"
+
+
+def respond(content, accept_encoding="gzip"):
+    return asyncio.run(fast_json_response(content, accept_encoding, headers={"X-Cache": "MISS"}))
+
+
+def test_small_bodies_are_sent_uncompressed():
+    response = respond({"title": "Example"})
+    assert json.loads(response.body) == {"title": "Example"}
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["x-cache"] == "MISS"
+
+
+def test_large_bodies_are_compressed_off_the_event_loop(monkeypatch):
+    offloaded = []
+    to_thread = asyncio.to_thread
+
+    async def recording_to_thread(fn, *args):
+        offloaded.append(fn.__name__)
+        return await to_thread(fn, *args)
+
+    monkeypatch.setattr(responses.asyncio, "to_thread", recording_to_thread)
+    content = {"html": "<p>hello</p>" * 5000}
+
+    monkeypatch.setattr(responses, "OFFLOAD_MIN_BYTES", 10 ** 9)
+    inline = respond(content)
+    assert "compress" not in offloaded
+
+    monkeypatch.setattr(responses, "OFFLOAD_MIN_BYTES", 1024)
+    threaded = respond(content)
+    assert "compress" in offloaded
+    assert threaded.headers["content-encoding"] == inline.headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(threaded.body)) == content
+    assert threaded.body == inline.body
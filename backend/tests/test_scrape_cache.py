@@ -0,0 +1,133 @@
+import asyncio
+import os
+
+import pytest
+from pydantic import BaseModel
+
+from app.scrape_cache import CachePolicy, ScrapeCache, normalize_url, scrape_cache_key
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class Request(BaseModel):
+    url: str
+    timeout: int = 30
+    readiness_timeout: float = 3.0
+    full_page: bool = True
+
+
+@pytest.mark.parametrize("url,expected", [
+    ("HTTPS://Example.COM", "https://example.com/"),
+    ("https://example.com:443/a//b", "https://example.com/a/b"),
+    ("http://example.com:8080/", "http://example.com:8080/"),
+    ("https://example.com/?b=2&a=1&utm_source=x&fbclid=y", "https://example.com/?a=1&b=2"),
+    ("https://example.com/page#section", "https://example.com/page"),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_key_ignores_timeouts_but_not_content_options():
+    base = scrape_cache_key(Request(url="https://example.com/?utm_source=mail"))
+    assert scrape_cache_key(Request(url="https://EXAMPLE.com/", timeout=90, readiness_timeout=1)) == base
+    assert scrape_cache_key(Request(url="https://example.com/", full_page=False)) != base
+
+
+def test_policy_from_headers():
+    assert (CachePolicy.from_headers({}).read, CachePolicy.from_headers({}).write) == (True, True)
+    no_store = CachePolicy.from_headers({"cache-control": "no-store"})
+    assert (no_store.read, no_store.write) == (False, False)
+    no_cache = CachePolicy.from_headers({"cache-control": "no-cache, max-age=60", "x-cache-ttl": "5"})
+    assert (no_cache.read, no_cache.write, no_cache.max_age, no_cache.ttl) == (False, True, 60.0, 5.0)
+    assert CachePolicy.from_headers({"cache-control": "max-age=abc", "x-cache-ttl": "x"}).max_age is None
+
+
+def test_memory_hit_miss_and_max_age():
+    async def scenario():
+        cache = ScrapeCache(max_memory_bytes=1 << 20, default_ttl=60, disk_dir="")
+        assert await cache.get("k") is None
+        await cache.put("k", {"html": "<p>hi</p>"})
+        value, age = await cache.get("k")
+        assert value == {"html": "<p>hi</p>"} and age >= 0
+        assert await cache.get("k", max_age=-1) is None
+        return cache.stats()
+
+    stats = run(scenario())
+    assert (stats["memory_hits"], stats["misses"], stats["stores"]) == (1, 2, 1)
+
+
+def test_expired_entries_are_dropped():
+    async def scenario():
+        cache = ScrapeCache(max_memory_bytes=1 << 20, disk_dir="")
+        await cache.put("k", {"v": 1}, ttl=-1)
+        assert await cache.get("k") is None
+        return cache.stats()
+
+    stats = run(scenario())
+    assert (stats["expired"], stats["memory_entries"]) == (1, 0)
+
+
+def test_memory_tier_evicts_least_recently_used():
+    async def scenario():
+        value = {"v": "x" * 100}
+        cache = ScrapeCache(max_memory_bytes=250, default_ttl=60, disk_dir="")
+        await cache.put("a", value)
+        await cache.put("b", value)
+        await cache.get("a")
+        await cache.put("c", value)
+        return [await cache.get(k) is not None for k in "abc"]
+
+    assert run(scenario()) == [True, False, True]
+
+
+def test_disk_tier_survives_a_restart_and_skips_corrupt_entries(tmp_path):
+    disk_dir = str(tmp_path / "scrapes")
+
+    async def scenario():
+        await ScrapeCache(default_ttl=60, disk_dir=disk_dir).put("k", {"v": 1})
+        reopened = ScrapeCache(default_ttl=60, disk_dir=disk_dir)
+        assert reopened.stats()["disk_bytes"] > 0
+        value, _ = await reopened.get("k")
+        assert value == {"v": 1}
+        assert reopened.stats()["disk_hits"] == 1
+
+        with open(os.path.join(disk_dir, "bad.json.z"), "wb") as f:
+            f.write(b"not zlib")
+        assert await ScrapeCache(default_ttl=60, disk_dir=disk_dir).get("bad") is None
+        assert not os.path.exists(os.path.join(disk_dir, "bad.json.z"))
+
+    run(scenario())
+
+
+def test_hit_with_evicted_blobs_scrapes_again(monkeypatch, tmp_path):
+    from app.blob_store import BlobStore
+    from app.main import ScrapingRequest, scraper
+
+    class NoBrowser:
+        def slot(self, url, patient=False):
+            raise RuntimeError("scraped again")
+
+    blob_store = BlobStore(str(tmp_path / "blobs"))
+    monkeypatch.setattr(scraper, "scrape_cache", ScrapeCache(max_memory_bytes=1 << 20, disk_dir=""))
+    monkeypatch.setattr(scraper, "blob_store", blob_store)
+    monkeypatch.setattr(scraper, "host_scheduler", NoBrowser())
+
+    async def scenario():
+        request = ScrapingRequest(url="https://example.com/")
+        digest = await blob_store.aput(b"png", "image/png")
+        entry = {"url": "https://example.com/", "title": "Cached", "html": "<p>hi</p>", "status": "success",
+                 "processing_time": 1.0, "screenshot_info": {"hash": digest}, "assets": [{"src": "https://example.com/a.png"}]}
+        await scraper.scrape_cache.put(scrape_cache_key(request), entry)
+        hit = await scraper.scrape_website(request)
+
+        entry["assets"].append({"src": "https://example.com/b.png", "hash": "0" * 64})
+        await scraper.scrape_cache.put(scrape_cache_key(request), entry)
+        policy = CachePolicy()
+        miss = await scraper.scrape_website(request, policy)
+        return hit, miss, policy.outcome
+
+    hit, miss, outcome = run(scenario())
+    assert hit.title == "Cached"
+    assert miss.status == "error: scraped again" and outcome == "MISS"
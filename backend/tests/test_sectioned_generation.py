@@ -0,0 +1,89 @@
+import copy
+
+import pytest
+
+from app.sectioned_generation import Region, _balanced_groups, _subtree_size, region_fingerprint
+
+
+def node(tag, *children, text=None, classes=None):
+    return {"tag": tag, "id": None, "classes": classes or [], "attributes": {},
+            "text": text, "children": list(children)}
+
+
+def block(size, name="div"):
+    """A block of `size` elements"""
+    return node(name, *[node("p", text=str(i)) for i in range(size - 1)])
+
+
+def region():
+    hero = Region("hero", [node("section", node("h1", text="Hello"), node("p", text="World"),
+                                classes=["hero"])])
+    hero.elements = [{
+        "selector": ".hero", "tagName": "SECTION", "className": "hero",
+        "position": {"left": 0, "top": 120, "width": 1280, "height": 600},
+        "styles": {"backgroundColor": "rgb(0, 0, 0)", "color": "rgb(255, 255, 255)"},
+        "textContent": "Hello World"
+    }]
+    hero.assets = [{"src": "https://example.com/hero.jpg", "local_url": "/assets/abc"}]
+    return hero
+
+
+def test_fingerprint_is_stable():
+    assert region_fingerprint(region()) == region_fingerprint(region())
+
+
+def test_fingerprint_ignores_element_positions():
+    moved = region()
+    moved.elements[0]["position"] = {"left": 0, "top": 900, "width": 1280, "height": 600}
+    assert region_fingerprint(moved) == region_fingerprint(region())
+
+
+def test_fingerprint_ignores_skipped_tags():
+    scripted = region()
+    scripted.nodes[0]["children"].append(node("script", text="track()"))
+    assert region_fingerprint(scripted) == region_fingerprint(region())
+
+
+@pytest.mark.parametrize("change", [
+    lambda r: r.nodes[0]["children"][0].update(text="Goodbye"),
+    lambda r: r.nodes[0]["classes"].append("dark"),
+    lambda r: r.elements[0]["styles"].update(color="rgb(255, 0, 0)"),
+    lambda r: r.assets[0].update(local_url="/assets/def"),
+])
+def test_fingerprint_changes_with_content_styles_and_assets(change):
+    changed = region()
+    change(changed)
+    assert region_fingerprint(changed) != region_fingerprint(region())
+
+
+def test_few_blocks_get_a_group_each():
+    blocks = [block(3), block(50)]
+    assert _balanced_groups(blocks, 4) == [[blocks[0]], [blocks[1]]]
+
+
+@pytest.mark.parametrize("sizes,count", [
+    ([10] * 12, 4),
+    ([1, 1, 1, 1, 40, 1, 1, 1], 3),
+    ([50, 1, 1, 1, 1, 1], 2),
+    ([5, 9, 2, 30, 7, 7, 1, 12, 3], 5),
+])
+def test_groups_keep_order_and_stay_within_count(sizes, count):
+    blocks = [block(size) for size in sizes]
+    original = copy.deepcopy(blocks)
+    groups = _balanced_groups(blocks, count)
+    assert 1 <= len(groups) <= count
+    assert all(groups)
+    assert [b for group in groups for b in group] == original
+
+
+def test_equal_blocks_split_evenly():
+    groups = _balanced_groups([block(10) for _ in range(12)], 4)
+    assert [len(group) for group in groups] == [3, 3, 3, 3]
+
+
+def test_largest_group_stays_near_the_even_share():
+    sizes = [5, 9, 2, 30, 7, 7, 1, 12, 3]
+    groups = _balanced_groups([block(size) for size in sizes], 3)
+    largest = max(sum(_subtree_size(b) for b in group) for group in groups)
+    # No split can do better than the largest block or the even share
+    assert largest <= max(max(sizes), sum(sizes) / 3) * 1.5
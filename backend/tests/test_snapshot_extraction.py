@@ -0,0 +1,132 @@
+from app.compact_dom import CompactDOM
+from app.snapshot_extraction import SNAPSHOT_STYLES, decode_snapshot
+
+URL = "https://example.com/page/"
+
+
+def el(tag, attrs=None, *children, style=None, bounds=(0, 0, 100, 20)):
+    return {"tag": tag, "attrs": attrs or {}, "children": list(children), "style": style, "bounds": bounds}
+
+
+def snapshot(root, current_sources=None):
+    """Flatten an element tree into DOMSnapshot.captureSnapshot's array layout"""
+    strings, string_ids = [], {}
+    nodes = {"parentIndex": [], "nodeType": [], "nodeName": [], "nodeValue": [], "attributes": []}
+    layout = {"nodeIndex": [], "styles": [], "bounds": []}
+
+    def intern(value):
+        if value not in string_ids:
+            string_ids[value] = len(strings)
+            strings.append(value)
+        return string_ids[value]
+
+    def add(item, parent):
+        index = len(nodes["parentIndex"])
+        nodes["parentIndex"].append(parent)
+        if isinstance(item, str):
+            nodes["nodeType"].append(3)
+            nodes["nodeName"].append(intern("#text"))
+            nodes["nodeValue"].append(intern(item))
+            nodes["attributes"].append([])
+            return
+        nodes["nodeType"].append(1)
+        nodes["nodeName"].append(intern(item["tag"].upper()))
+        nodes["nodeValue"].append(-1)
+        nodes["attributes"].append([intern(v) for pair in item["attrs"].items() for v in pair])
+        if item["style"] is not None:
+            layout["nodeIndex"].append(index)
+            layout["styles"].append([intern(item["style"].get(camel, "")) for _, camel in SNAPSHOT_STYLES])
+            layout["bounds"].append(list(item["bounds"]))
+        for child in item["children"]:
+            add(child, index)
+
+    add(root, -1)
+    current = {"index": [], "value": []}
+    for node, url in (current_sources or {}).items():
+        current["index"].append(node)
+        current["value"].append(intern(url))
+    return {"strings": strings, "documents": [{
+        "documentURL": intern(URL), "nodes": {**nodes, "currentSourceURL": current}, "layout": layout
+    }]}
+
+
+VISIBLE = {"color": "rgb(10, 20, 30)", "backgroundColor": "rgb(255, 255, 255)",
+           "fontFamily": "Inter", "fontSize": "16px", "fontWeight": "400", "display": "block"}
+PAGE = el("html", {}, el("head", {}, el("link", {"rel": "stylesheet", "href": "/fonts.css"})),
+          el("body", {"class": "home"},
+             el("header", {"id": "top", "class": "header  dark"},
+                el("a", {"href": "/about", "class": "nav"}, "About ", el("b", {}, "us"), style=VISIBLE),
+                style=VISIBLE),
+             el("section", {"class": "hero", "data-kind": "intro", "onclick": "x()"},
+                el("h1", {}, "  Hello  ", style={**VISIBLE, "color": "rgb(200, 0, 0)"}),
+                el("img", {"src": "hero.jpg", "alt": "Hero"}, style=VISIBLE, bounds=(0, 40, 800, 400)),
+                style={**VISIBLE, "backgroundImage": 'url("https://cdn.example.com/bg.png")'}),
+             style={**VISIBLE, "backgroundColor": "rgb(0, 0, 0)", "minHeight": "100vh"}))
+
+
+def test_dom_tree_keeps_structure_text_and_important_attributes():
+    dom = decode_snapshot(snapshot(PAGE), include_assets=False, include_visual=False)["dom_structure"]
+    assert dom["tag"] == "body" and dom["classes"] == ["home"]
+    header, hero = dom["children"]
+    assert (header["id"], header["classes"]) == ("top", ["header", "dark"])
+    assert header["children"][0]["attributes"] == {"href": "/about"}
+    assert hero["attributes"] == {"data-kind": "intro"}
+    assert hero["children"][0]["text"] == "Hello"
+    assert hero["children"][1]["attributes"] == {"src": "hero.jpg", "alt": "Hero"}
+
+
+def test_compact_format_matches_the_tree():
+    snap = snapshot(PAGE)
+    tree = decode_snapshot(snap, include_assets=False, include_visual=False)["dom_structure"]
+    compact = decode_snapshot(snap, include_assets=False, include_visual=False, dom_format="compact")
+    assert CompactDOM(compact["dom_structure"]).to_tree() == tree
+
+
+def test_deep_trees_are_cut_at_the_same_depth_in_both_formats():
+    deep = el("div", {}, "leaf")
+    for _ in range(12):
+        deep = el("div", {}, deep)
+    snap = snapshot(el("html", {}, el("body", {}, deep)))
+    tree = decode_snapshot(snap, include_assets=False, include_visual=False)["dom_structure"]
+    compact = decode_snapshot(snap, include_assets=False, include_visual=False, dom_format="compact")
+    assert CompactDOM(compact["dom_structure"]).to_tree() == tree
+    depth, node = 0, tree
+    while node["children"]:
+        depth, node = depth + 1, node["children"][0]
+    assert depth == 8
+
+
+def test_assets_resolve_urls_and_prefer_the_current_source():
+    snap = snapshot(PAGE)
+    assets = decode_snapshot(snap, include_dom=False, include_visual=False)["assets"]
+    assert assets == [
+        {"type": "image", "src": "https://example.com/page/hero.jpg", "alt": "Hero", "width": 800,
+         "height": 400, "className": "", "id": ""},
+        {"type": "background-image", "src": "https://cdn.example.com/bg.png", "element": "SECTION",
+         "className": "hero"},
+        {"type": "font", "src": "https://example.com/fonts.css"},
+    ]
+
+    img = snap["documents"][0]["nodes"]["nodeName"].index(snap["strings"].index("IMG"))
+    chosen = decode_snapshot(snapshot(PAGE, {img: "https://cdn.example.com/hero@2x.jpg"}),
+                             include_dom=False, include_visual=False)["assets"]
+    assert chosen[0]["src"] == "https://cdn.example.com/hero@2x.jpg"
+
+
+def test_visual_context():
+    visual = decode_snapshot(snapshot(PAGE), include_assets=False, include_dom=False)["visual_context"]
+    assert visual["colors"] == ["rgb(10, 20, 30)", "rgb(0, 0, 0)", "rgb(200, 0, 0)"]
+    assert visual["fonts"] == ["Inter|16px|400"]
+    assert visual["layout"]["minHeight"] == "100vh"
+    assert visual["links"] == [{"href": "https://example.com/about", "text": "About us",
+                                "className": "nav", "id": ""}]
+    assert [image["src"] for image in visual["images"]] == ["https://example.com/page/hero.jpg"]
+    selectors = [element["selector"] for element in visual["elements"]]
+    assert selectors == ["header", "section", "h1", ".hero", ".header"]
+    h1 = visual["elements"][selectors.index("h1")]
+    assert (h1["textContent"], h1["position"]) == ("  Hello  ", {"top": 0, "left": 0, "width": 100, "height": 20})
+
+
+def test_missing_body_gives_an_empty_dom():
+    result = decode_snapshot(snapshot(el("html", {}, el("head", {}))), include_assets=False, include_visual=False)
+    assert result == {"dom_structure": {}}
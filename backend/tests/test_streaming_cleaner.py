@@ -0,0 +1,93 @@
+import asyncio
+import random
+
+import pytest
+
+from app import llm_workflow_updated as workflow
+from app.llm_workflow_updated import StreamingHTMLCleaner, clean_llm_output, validate_html_structure
+
+DOCUMENT = "<!DOCTYPE html>\n<html>\n<head><title>t</title></head>\n<body>\n<p>Hi ```x``` there</p>\n</body>\n</html>"
+BODY_ONLY = "<html><head></head><body><p>no doctype</p></body></html>"
+
+RAW_OUTPUTS = [
+    DOCUMENT,
+    BODY_ONLY,
+    f"```html\n{DOCUMENT}\n```",
+    f"```HTML{DOCUMENT}```",
+    f"  \n```html\n\n{BODY_ONLY}\n```\n\n",
+    f"{DOCUMENT}\n\n",
+    "```html\n```",
+    "<p>tiny</p>",
+    "",
+    "   ",
+    "```",
+    "<!doctype html>",
+]
+
+
+def split_randomly(text, rng):
+    """Cut text at random points, including empty and single-character chunks"""
+    cuts = sorted(rng.randint(0, len(text)) for _ in range(rng.randint(0, max(1, len(text) // 3))))
+    bounds = [0] + cuts + [len(text)]
+    return [text[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def stream(chunks):
+    cleaner = StreamingHTMLCleaner()
+    emitted = [cleaner.feed(chunk) for chunk in chunks]
+    emitted.append(cleaner.finish())
+    return cleaner, "".join(emitted)
+
+
+@pytest.mark.parametrize("raw", RAW_OUTPUTS)
+def test_any_split_matches_the_batch_cleaner(raw):
+    rng = random.Random(raw)
+    for _ in range(200):
+        chunks = split_randomly(raw, rng)
+        cleaner, text = stream(chunks)
+        assert text == clean_llm_output(raw), chunks
+        assert cleaner.text == text
+        assert cleaner.raw == raw
+        assert cleaner.is_valid() == validate_html_structure(text)
+
+
+def test_generated_documents_match_the_batch_cleaner():
+    rng = random.Random(9)
+    pieces = ["<!DOCTYPE html>", "<html>", "<head>", "<body>", "</body>", "</html>", "```", "```html",
+              "\n", " ", "text", "<p>", "`", "<!doc"]
+    for _ in range(500):
+        raw = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+        _, text = stream(split_randomly(raw, rng))
+        assert text == clean_llm_output(raw), raw
+
+
+def test_nothing_is_emitted_before_the_fence_is_resolved():
+    cleaner = StreamingHTMLCleaner()
+    assert cleaner.feed("```ht") == ""
+    assert cleaner.feed("ml\n<!DOCTYPE html><html>") == "<!DOCTYPE html><h"
+    assert cleaner.finish() == "tml>"
+
+
+def test_finalize_saves_only_when_asked(tmp_path, monkeypatch):
+    output = tmp_path / "cloned_site.html"
+    monkeypatch.setattr(workflow, "OUTPUT_PATH", str(output))
+    assert asyncio.run(workflow._afinalize_output(f"```html\n{DOCUMENT}\n```", save=False)) == DOCUMENT
+    assert not output.exists()
+
+    async def concurrent():
+        await asyncio.gather(*(workflow._afinalize_output(DOCUMENT.replace("Hi", f"Hi {i}")) for i in range(8)))
+
+    asyncio.run(concurrent())
+    assert output.read_text(encoding="utf-8").startswith("<!DOCTYPE html>")
+    assert [path.name for path in tmp_path.iterdir()] == ["cloned_site.html"]
+
+
+def test_blocking_wrapper_uses_the_async_path(tmp_path, monkeypatch):
+    async def complete(messages, prompt_tokens, use_cache=True, patient=False):
+        assert patient
+        return f"```html\n{DOCUMENT}\n```", False
+
+    monkeypatch.setattr(workflow, "acomplete", complete)
+    monkeypatch.setattr(workflow, "OUTPUT_PATH", str(tmp_path / "cloned_site.html"))
+    assert workflow.generate_cloned_html({"title": "t", "html": "<p>hi</p>"}) == DOCUMENT
+    assert (tmp_path / "cloned_site.html").read_text(encoding="utf-8") == DOCUMENT
@@ -17,6 +17,7 @@ interface ScrapingResult {
   title: string;
   html: string;
   screenshot?: string;
+  screenshot_url?: string;
   styles: Array<{
     type: 'external' | 'inline';
     href?: string;
@@ -98,7 +99,12 @@ export async function cloneWebsite(
       html: clonedHtml,
       originalUrl: url,
       timestamp: new Date().toISOString(),
-      screenshot: scrapeData.screenshot,
+      // screenshot_url is absolute when the backend has PUBLIC_BASE_URL set
+      screenshot: scrapeData.screenshot_url
+        ? scrapeData.screenshot_url.startsWith('/')
+          ? `${API_BASE_URL}${scrapeData.screenshot_url}`
+          : scrapeData.screenshot_url
+        : scrapeData.screenshot,
       processingTime: scrapeData.processing_time,
     };
 